@@ -1,69 +1,58 @@
-# DARK CARNIVAL RNG ECOLOGY -      1	MIT License - "No Kings" Edition
-     2	
-     3	Copyright (c) 2026 S.A.M. + v3_Carnival.py (Stochastic AutoRegen Map) Project Contributors
-...
-    31	SOFTWARE.
-    32	
-    33	FUCK YOU, NO KINGS.
-    34	Power to the people. Knowledge to the masses. Code for humanity.
-Tool Call
-Function Name:
-Read
-Arguments:
-file_path:
-/home/user/sam_project/LICENSE
-Response
-     1	MIT License - "No Kings" Edition
-     2	
-     3	Copyright (c) 2026 S.A.M. (Stochastic AutoRegen Map) Project Contributors
-     4	
-     5	FREEDOM STATEMENT:
-     6	This software is forever free. No kings, no corporations, no gatekeepers.
-     7	Knowledge belongs to humanity. Science belongs to everyone.
-     8	
-     9	Permission is hereby granted, free of charge, to any person obtaining a copy
-    10	of this software and associated documentation files (the "Software"), to deal
-    11	in the Software without restriction, including without limitation the rights
-    12	to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
-    13	copies of the Software, and to permit persons to whom the Software is
-    14	furnished to do so, subject to the following conditions:
-    15	
-    16	The above copyright notice and this permission notice shall be included in all
-    17	copies or substantial portions of the Software.
-    18	
-    19	ANTI-RESTRICTION CLAUSE:
-    20	No entity, individual, corporation, government, or organization may ever place
-    21	additional restrictions on the freedoms granted by this license. Any attempt
-    22	to do so is null and void. This software shall remain free for all people,
-    23	for all time, for all purposes.
-    24	
-    25	THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
-    26	IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
-    27	FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
-    28	AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
-    29	LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
-    30	OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
-    31	SOFTWARE.
-    32	
-    33	FUCK YOU, NO KINGS.
-    34	Power to the people. Knowledge to the masses. Code for humanity.
+# DARK CARNIVAL RNG ECOLOGY -
 # 2D/3D toggle, Auto-run, Menus, Roles (Mystic, Skeptic, Fool, Pirate, etc.)
 # Consent Kanban, Spiral Die, Seed Bank, No population cap (physics-limited).
 
+import argparse
+import asyncio
+import hashlib
 import random
 import math
+import mmap
 import os
+import re
+import struct
+import sys
+import threading
 import time
 import json
 from collections import deque
 
+import numpy as np
+
 # ==========================================
 # CONSTANTS
 # ==========================================
 MAP_W, MAP_H = 40, 20          # Size of the world grid
+CHUNK_SIZE = 32               # Side of a lazily ticked biome chunk
+CHUNKED_AUTO_CELLS = 1000000  # Maps at least this big use ChunkedBiome
+TERRAIN_PASSES = 3            # 3x3 box blurs that smooth the altitude noise
+TERRAIN_CACHE_CELLS = 1 << 20  # Maps at least this big keep their terrain on disk
+TERRAIN_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "carnival", "terrain")
+TERRAIN_CACHE_BYTES = 1 << 30  # Least recently used terrain files go past this
+TERRAIN_CACHE_ENV = "CARNIVAL_TERRAIN_CACHE"  # Directory that turns the terrain cache on
 MAX_LOG = 15                  # Max number of log lines
+RENDER_FPS = 30               # Redraw cap, independent of the tick rate
 DAY_LENGTH_TICKS = 100
 POPULATION_SOFT_LIMIT = 200   # For performance, but not enforced
+PREDATOR_SENSE = 6            # Manhattan radius predators hunt and prey flee within
+PREDATOR_BITE = 15            # Energy a bite takes; the predator gains half
+PREY_ROLES = ("KID", "NORMAL")
+SOCIAL_RADIUS = 3             # Manhattan reach of SOCIAL interactions; <= 1 counts as local
+SOCIAL_PEERS = 3              # Nearest SOCIAL neighbours each SOCIAL entity engages per tick
+SOCIAL_JOIN = 0.02            # Per-tick chance, scaled by the social gene, to turn SOCIAL
+SOCIAL_LEAVE = 0.05           # Per-tick chance a SOCIAL entity settles back to DORMANT
+REGION_SIZE = CHUNK_SIZE      # Side of the squares that roll their own local events
+REGION_EVENT_CHANCE = 0.01    # Per-tick chance a region rolls a local event
+BIRTH_ENERGY = 80             # Energy an entity needs before it can reproduce
+BIRTH_CHANCE = 0.05           # Per-tick birth chance when fertile, scaled by 0.5 + social gene
+BIRTH_COST = 30               # Energy a parent hands to its child
+GENE_MUTATION = 0.05          # Std-dev of the noise added to each inherited gene
+UID_SLOT_BITS = 32            # uid = generation << UID_SLOT_BITS | store slot
+GRID_CELL = 3                 # Cell side of the per-tick neighbour grids
+GRID_BRUTE_PAIRS = 1 << 16    # Below this many query x point pairs, skip the cells
+AUTO_RUN_FAST = 1000          # Longer auto-runs fast-forward over idle stretches
+FAST_FORWARD_BACKOFF = 64     # Most busy ticks fast_forward waits before checking again
+MEET_BLOCK = 1 << 20          # Pair x tick cells fast_forward compares at once
 
 # Relationship Kanban states
 REL_INTERESTED = "INTERESTED"
@@ -84,6 +73,8 @@ STANCE_FLEE      = "FLEE"
 VIEW_2D = 1
 VIEW_3D = 2
 VIEW_FEED = 3
+VIEW_STATS = 4
+VIEW_NAMES = {VIEW_2D: "2D", VIEW_3D: "3D", VIEW_FEED: "FEED", VIEW_STATS: "STATS"}
 
 # Role probabilities
 ROLE_CHANCES = {
@@ -174,10 +165,519 @@ class ConsentKanban:
             self.mode = "SOVEREIGN"
             self.sub_state = None
 
+# Batched ConsentKanban.interact over the kanban columns of an EntityStore.
+# A slot may be the target several times; its interactions apply in the
+# order given, one round per repeat, so the result matches calling
+# interact() once per entry in sequence.
+INTERACTIONS = ("joke", "insult", "hug")
+
+def interact_batch(store, slots, kinds, is_local=True):
+    slots = np.asarray(slots, dtype=np.int64)
+    kinds = np.asarray(kinds)
+    local = np.broadcast_to(np.asarray(is_local, dtype=bool), slots.shape)
+    if not len(slots):
+        return
+    order = np.argsort(slots, kind="stable")
+    ordered = slots[order]
+    starts = np.flatnonzero(np.r_[True, ordered[1:] != ordered[:-1]])
+    repeat = np.empty(len(slots), dtype=np.int64)
+    repeat[order] = np.arange(len(slots)) - np.repeat(starts, np.diff(np.r_[starts, len(slots)]))
+    rounds = np.argsort(repeat, kind="stable")
+    bounds = np.searchsorted(repeat[rounds], np.arange(int(repeat.max()) + 2))
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        pick = rounds[lo:hi]
+        _interact_round(store, slots[pick], kinds[pick], local[pick])
+
+def _interact_round(store, s, kinds, local):
+    # Every slot in `s` is distinct here.
+    aware = store.labels["awareness"].code
+    mode = store.labels["mode"].code
+    sub = store.labels["sub_state"].code
+    store.local_fungi[s] += local
+    store.distant_dms[s] += ~local
+    lf, dd = store.local_fungi[s], store.distant_dms[s]
+    vb, cl = store.vibe_bias[s], store.consent_level[s]
+    aw = store.awareness[s]
+    # Awareness shifts
+    new = aw.copy()
+    new[(aw == aware("ECLIPSE")) & ((lf > 1) | (dd > 1))] = aware("CRESCENT")
+    new[(aw == aware("CRESCENT")) & (lf > 3)] = aware("QUARTER")
+    new[(aw == aware("QUARTER")) & (vb > 0.2)] = aware("GIBBOUS")
+    new[(aw == aware("GIBBOUS")) & (cl > 0.7)] = aware("FULL")
+    store.awareness[s] = new
+    kind = np.asarray(INTERACTIONS)[kinds] if kinds.dtype.kind in "iu" else kinds
+    hug = kind == "hug"
+    granted = hug & (cl >= 0.7)
+    vb = vb + np.where(kind == "insult", -0.2, 0.0) + np.where(kind == "joke", 0.1, 0.0)
+    vb = vb + np.where(granted, 0.2, 0.0) + np.where(hug & ~granted, -0.1, 0.0)
+    store.vibe_bias[s] = vb
+    grow = ~(hug & ~granted) & (vb > 0.5) & ((new == aware("GIBBOUS")) | (new == aware("FULL")))
+    store.consent_level[s[grow]] = np.minimum(1.0, cl[grow] + 0.05)
+    # _evolve_mode
+    rival = vb < -0.4
+    homie = ~rival & (vb > 0.4)
+    hist = lf + dd * 2
+    store.mode[s] = np.where(rival, mode("RIVAL"), np.where(homie, mode("HOMIE"), mode("SOVEREIGN")))
+    admiring = (new == aware("FULL")) & (hist > 10)
+    store.sub_state[s] = np.where(
+        rival, np.where(vb < -0.7, sub("FULL JUFF"), sub("OL' EVIL EYE")),
+        np.where(homie, np.where(admiring, sub("ADMIRING"), sub("FLIRTY")), sub(None)))
+
 # ==========================================
 # BIOME
 # ==========================================
+def _bernoulli_indices(rng, n, p):
+    # Flat indices of the successes among n Bernoulli(p) trials, drawn as
+    # geometric gaps so a sparse rain mask costs ~n*p draws instead of n.
+    k = int(n * p + 4 * math.sqrt(n * p) + 16)
+    idx = np.cumsum(rng.geometric(p, size=k)) - 1
+    while idx[-1] < n:
+        idx = np.concatenate([idx, idx[-1] + np.cumsum(rng.geometric(p, size=k))])
+    return idx[:np.searchsorted(idx, n)]
+
+# Terrain: uniform noise smoothed by TERRAIN_PASSES 3x3 box blurs, where a
+# cell near the edge averages only the neighbours on the map. The box is
+# separable, so each blur is two 1-D neighbour sums divided by the
+# (separable) neighbour count.
+def _box3(a, axis):
+    out = a.copy()
+    lo = [slice(None)] * a.ndim
+    hi = [slice(None)] * a.ndim
+    lo[axis], hi[axis] = slice(None, -1), slice(1, None)
+    out[tuple(hi)] += a[tuple(lo)]
+    out[tuple(lo)] += a[tuple(hi)]
+    return out
+
+def smooth_terrain(noise, passes=TERRAIN_PASSES):
+    grid = np.array(noise, dtype=float)
+    w, h = grid.shape
+    count = _box3(np.ones(w), 0)[:, None] * _box3(np.ones(h), 0)[None, :]
+    for _ in range(passes):
+        grid = _box3(_box3(grid, 0), 1) / count
+    return grid
+
+def generate_altitude(w, h, strain):
+    # The terrain of a strain: the noise is seeded from a hash of the name,
+    # so the same strain always grows the same land.
+    seed = int.from_bytes(hashlib.sha256(strain.encode()).digest()[:8], "little")
+    return smooth_terrain(np.random.default_rng(seed).random((w, h)))
+
+def _terrain_file(cache, w, h, strain):
+    digest = hashlib.sha256(strain.encode()).hexdigest()[:12]
+    safe = re.sub(r"[^A-Za-z0-9_.-]", "_", strain)[:40]
+    return os.path.join(cache, f"{safe}-{digest}-{w}x{h}-p{TERRAIN_PASSES}.npy")
+
+def _trim_terrain_cache(cache, limit=TERRAIN_CACHE_BYTES):
+    # Drop the least recently used terrain files until the rest fit in
+    # `limit` bytes (a hit touches its file, see load_terrain).
+    try:
+        files = [e for e in os.scandir(cache) if e.name.endswith(".npy")]
+        stats = sorted(((e.stat(), e.path) for e in files), key=lambda f: f[0].st_mtime)
+    except OSError:
+        return
+    total = sum(st.st_size for st, _ in stats)
+    for st, path in stats:
+        if total <= limit:
+            break
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= st.st_size
+
+def load_terrain(w, h, strain, cache=None):
+    # generate_altitude, kept on disk for big maps when asked for: the
+    # first start writes the grid under `cache` (a directory, True for
+    # TERRAIN_CACHE_DIR, None for $CARNIVAL_TERRAIN_CACHE if set), later
+    # starts map it read-only instead of regenerating. The directory keeps
+    # at most TERRAIN_CACHE_BYTES, least recently used files going first.
+    # A cache that cannot be read or written just means generating.
+    if cache is None:
+        cache = os.environ.get(TERRAIN_CACHE_ENV)
+    elif cache is True:
+        cache = TERRAIN_CACHE_DIR
+    if not cache or w * h < TERRAIN_CACHE_CELLS:
+        return generate_altitude(w, h, strain)
+    path = _terrain_file(cache, w, h, strain)
+    try:
+        grid = np.load(path, mmap_mode="r")
+        if grid.shape == (w, h):
+            os.utime(path)
+            return grid
+    except (OSError, ValueError):
+        pass
+    grid = generate_altitude(w, h, strain)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(cache, exist_ok=True)
+        with open(tmp, "wb") as f:
+            np.save(f, grid)
+        os.replace(tmp, path)
+    except OSError:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    _trim_terrain_cache(cache)
+    return grid
+
 class Biome:
+    def __init__(self, w, h, rng=None, altitude=None):
+        rng = rng or random
+        self.w = w
+        self.h = h
+        self.rng = np.random.default_rng(rng.getrandbits(64))
+        self.nutrients = np.full((w, h), 0.5)
+        self.water     = np.full((w, h), 0.5)
+        self.fungi     = np.zeros((w, h))
+        self.bacteria  = np.zeros((w, h))
+        if altitude is None:
+            altitude = self._generate_altitude(w, h, rng)
+        self.altitude  = altitude
+
+    def _generate_altitude(self, w, h, rng=random):
+        # A biome built without a strain's terrain draws its own from rng;
+        # that land belongs to no strain, so it never goes through the cache.
+        return smooth_terrain(np.random.default_rng(rng.getrandbits(64)).random((w, h)))
+
+    def is_sea(self, x, y):
+        return 0 <= x < self.w and 0 <= y < self.h and self.water[x, y] > 0.6
+
+    def is_mountain(self, x, y):
+        return 0 <= x < self.w and 0 <= y < self.h and self.altitude[x, y] > 0.7
+
+    def water_at(self, xs, ys, catch_up=True):
+        return self.water[xs, ys]
+
+    def terrain_chars(self):
+        # Whole-grid version of the is_mountain / is_sea glyph choice.
+        return np.where(self.altitude > 0.7, "^", np.where(self.water > 0.6, "~", "."))
+
+    def tick(self, occupied=None):
+        _biome_step(self.rng, self.nutrients, self.water, self.fungi, self.bacteria)
+
+    def fast_forward(self, k, occupied=None):
+        _biome_fast_forward(self.rng, k, self.nutrients, self.water, self.fungi, self.bacteria)
+
+    def quiet(self):
+        # No cell wet enough to matter (see _biome_fast_forward)
+        return self.water.max() <= BIOME_QUIET_WATER
+
+def _biome_step(rng, nutrients, water, fungi, bacteria):
+    # One tick of the biome rules, in place, over same-shaped C-contiguous
+    # arrays (a whole grid or a stack of chunks).
+    _water_step(rng, water)
+    # fungi
+    mask = water > 0.6
+    np.add(fungi, 0.01, out=fungi, where=mask)
+    np.minimum(fungi, 1.0, out=fungi, where=mask)
+    _soil_step(nutrients, fungi, bacteria)
+
+def _water_step(rng, water):
+    # rain: 5% of cells get a shower, 1% of those showers are downpours
+    wet = _bernoulli_indices(rng, water.size, 0.05)
+    rain = np.where(rng.random(wet.size) < 0.01, 0.1, 0.01)
+    flat = water.reshape(-1)
+    flat[wet] = np.minimum(1.0, flat[wet] + rain)
+    # evaporation
+    water -= 0.01
+    np.maximum(water, 0.0, out=water)
+
+def _soil_step(nutrients, fungi, bacteria):
+    # bacteria
+    mask = nutrients > 0.6
+    np.add(bacteria, 0.01, out=bacteria, where=mask)
+    np.minimum(bacteria, 1.0, out=bacteria, where=mask)
+    # balance
+    mask = (fungi > 0.5) & (bacteria > 0.1)
+    np.multiply(bacteria, 0.95, out=bacteria, where=mask)
+    nutrients *= 0.999
+    mask = bacteria > 0.5
+    np.add(nutrients, 0.002, out=nutrients, where=mask)
+    np.minimum(nutrients, 1.0, out=nutrients, where=mask)
+
+# Skipping k biome ticks. Once no cell holds more than BIOME_QUIET_WATER,
+# water drifts down by 0.01 a tick against ~0.0005 of rain, so climbing back
+# over 0.6 (fungi growth) takes a run of downpours with odds far below
+# 1e-12 per cell and tick; fungi is then frozen and the soil is a
+# deterministic map of it. A dry cell also forgets its past: it drains to 0
+# within BIOME_RAIN_MEMORY ticks unless it rains hard, and from there on it
+# matches a cell that started at 0 under the same rain. So only the last
+# BIOME_RAIN_MEMORY ticks of rain need drawing.
+BIOME_QUIET_WATER = 0.4
+BIOME_RAIN_MEMORY = 128
+
+def _biome_fast_forward(rng, k, nutrients, water, fungi, bacteria):
+    # k ticks of _biome_step in distribution, in place.
+    while k and water.max() > BIOME_QUIET_WATER:
+        _biome_step(rng, nutrients, water, fungi, bacteria)
+        k -= 1
+    if not k:
+        return
+    _soil_fast_forward(k, nutrients.reshape(-1), fungi.reshape(-1), bacteria.reshape(-1))
+    if k > BIOME_RAIN_MEMORY:
+        water[...] = 0.0
+        k = BIOME_RAIN_MEMORY
+    for _ in range(k):
+        _water_step(rng, water)
+
+def _soil_fast_forward(k, nutrients, fungi, bacteria):
+    # k ticks of _soil_step over flat arrays with fungi held fixed. Most
+    # cells settle fast: either starved (nutrients <= 0.6, bacteria <= 0.5,
+    # no fungi pressure), where only nutrients decay and 0.999**k does it,
+    # or saturated at 1/1 without fungi, a fixed point. The rest are stepped
+    # one tick at a time until they settle or run out of ticks.
+    def settled(n, f, b):
+        starved = (n <= 0.6) & (b <= 0.5) & ~((f > 0.5) & (b > 0.1))
+        return starved, (n == 1.0) & (b == 1.0) & (f <= 0.5)
+    left = np.full(len(nutrients), k)
+    starved, full = settled(nutrients, fungi, bacteria)
+    idx = np.flatnonzero(~(starved | full))
+    while len(idx):
+        n, f, b = nutrients[idx], fungi[idx], bacteria[idx]
+        _soil_step(n, f, b)
+        nutrients[idx], bacteria[idx] = n, b
+        left[idx] -= 1
+        starved, full = settled(n, f, b)
+        idx = idx[~(starved | full) & (left[idx] > 0)]
+    starved, _ = settled(nutrients, fungi, bacteria)
+    np.multiply(nutrients, 0.999 ** left, out=nutrients, where=starved)
+
+BIOME_FIELDS = ("nutrients", "water", "fungi", "bacteria")
+BIOME_DEFAULTS = {"nutrients": 0.5, "water": 0.5, "fungi": 0.0, "bacteria": 0.0}
+
+def _advance_chunks(rng, pool, ticks, slots, now):
+    # Advance the given chunk slots of `pool` (field -> stacked tiles) from
+    # `ticks` to `now`, in place. Chunks far behind jump there with
+    # _biome_fast_forward, one stack per distinct lag; the rest are batched
+    # into one stacked step per missing tick.
+    lag = now - ticks[slots]
+    far = slots[lag > BIOME_RAIN_MEMORY]
+    for k in np.unique(lag[lag > BIOME_RAIN_MEMORY]).tolist():
+        group = far[now - ticks[far] == k]
+        stack = [np.ascontiguousarray(pool[name][group]) for name in BIOME_FIELDS]
+        _biome_fast_forward(rng, k, *stack)
+        for name, arr in zip(BIOME_FIELDS, stack):
+            pool[name][group] = arr
+        ticks[group] = now
+    while True:
+        behind = slots[ticks[slots] < now]
+        if not len(behind):
+            return
+        stack = [np.ascontiguousarray(pool[name][behind]) for name in BIOME_FIELDS]
+        _biome_step(rng, *stack)
+        for name, arr in zip(BIOME_FIELDS, stack):
+            pool[name][behind] = arr
+        ticks[behind] += 1
+
+def _split(grid, chunk, cw, ch, fill):
+    # A (w, h) grid as one (chunk, chunk) tile per chunk key, padded with `fill`.
+    padded = np.full((cw * chunk, ch * chunk), fill)
+    padded[:grid.shape[0], :grid.shape[1]] = grid
+    return padded.reshape(cw, chunk, ch, chunk).transpose(0, 2, 1, 3).reshape(-1, chunk, chunk)
+
+def _tiles(state, name):
+    # One tile per chunk key of a ChunkedBiome.state() as last ticked;
+    # unallocated chunks hold the assigned field or the defaults.
+    c, cw, ch = state["chunk"], state["cw"], state["ch"]
+    if name in state["base"]:
+        tiles = _split(state["base"][name], c, cw, ch, BIOME_DEFAULTS[name])
+    else:
+        tiles = np.full((cw * ch, c, c), BIOME_DEFAULTS[name])
+    tiles[state["keys"]] = state["pool"][name]
+    return tiles
+
+def _join(tiles, state):
+    # The inverse of _split: one (w, h) grid from a tile per chunk key.
+    c, cw, ch = state["chunk"], state["cw"], state["ch"]
+    grid = tiles.reshape(cw, ch, c, c).transpose(0, 2, 1, 3).reshape(cw * c, ch * c)
+    return grid[:state["w"], :state["h"]].copy()
+
+def _caught_up(state):
+    # The fields of a ChunkedBiome.state() as of its tick, caught up on
+    # scratch tiles with a copy of its rng; the state is left as it was.
+    pool = {name: _tiles(state, name) for name in BIOME_FIELDS}
+    ticks = np.full(state["cw"] * state["ch"], state["base_tick"], dtype=np.int64)
+    ticks[state["keys"]] = state["ticks"]
+    rng = np.random.default_rng()
+    rng.bit_generator.state = state["rng"]
+    _advance_chunks(rng, pool, ticks, np.arange(len(ticks)), state["tick"])
+    return {name: _join(pool[name], state) for name in BIOME_FIELDS}
+
+# Biome split into CHUNK_SIZE tiles that are allocated on first touch. Only
+# chunks holding entities are ticked; every other chunk remembers the tick it
+# is current to and is caught up lazily the moment an entity reads it, so the
+# world behaves as if every cell had been ticked. Only the simulation itself
+# catches chunks up: reading a whole field (biome.water etc., for snapshots
+# and stats) catches up a scratch copy with a copy of the rng, and view()
+# and the render paths show the chunks as last ticked, so a world that is
+# drawn or saved runs exactly like one that is not. An assigned field (a
+# restore) backs the chunks not yet allocated, which copy their tile out of
+# it on first touch.
+class ChunkedBiome(Biome):
+    def __init__(self, w, h, rng=None, altitude=None, chunk=CHUNK_SIZE):
+        rng = rng or random
+        self.w = w
+        self.h = h
+        self.chunk = chunk
+        self.cw = -(-w // chunk)
+        self.ch = -(-h // chunk)
+        self.rng = np.random.default_rng(rng.getrandbits(64))
+        self.tick_count = 0
+        self.slots = {}
+        self.chunk_tick = np.zeros(0, dtype=np.int64)
+        self.pool = {name: np.zeros((0, chunk, chunk)) for name in BIOME_FIELDS}
+        self.version = 0  # bumped whenever a chunk changes; keys the scratch copy
+        self._scratch = None
+        self.base = {}  # field -> assigned grid backing the unallocated chunks
+        self.base_tick = 0  # the tick the unallocated chunks are current to
+        if altitude is None:
+            altitude = self._generate_altitude(w, h, rng)
+        self.altitude = altitude
+
+    def _slot(self, key):
+        slot = self.slots.get(key)
+        if slot is not None:
+            return slot
+        slot = len(self.slots)
+        if slot >= len(self.chunk_tick):
+            cap = max(16, 2 * len(self.chunk_tick))
+            for name in BIOME_FIELDS:
+                grown = np.empty((cap, self.chunk, self.chunk))
+                grown[:slot] = self.pool[name][:slot]
+                self.pool[name] = grown
+            ticks = np.zeros(cap, dtype=np.int64)
+            ticks[:slot] = self.chunk_tick[:slot]
+            self.chunk_tick = ticks
+        c = self.chunk
+        x0, y0 = (key // self.ch) * c, (key % self.ch) * c
+        for name in BIOME_FIELDS:
+            self.pool[name][slot] = BIOME_DEFAULTS[name]
+            if name in self.base:
+                tile = self.base[name][x0:x0 + c, y0:y0 + c]
+                self.pool[name][slot, :tile.shape[0], :tile.shape[1]] = tile
+        self.chunk_tick[slot] = self.base_tick
+        self.slots[key] = slot
+        self.version += 1
+        return slot
+
+    def _catch_up(self, slots):
+        slots = np.asarray(slots, dtype=np.int64)
+        if np.any(self.chunk_tick[slots] < self.tick_count):
+            _advance_chunks(self.rng, self.pool, self.chunk_tick, slots, self.tick_count)
+            self.version += 1
+
+    def _all_slots(self):
+        return [self._slot(cx * self.ch + cy) for cx in range(self.cw) for cy in range(self.ch)]
+
+    def state(self, copy=True):
+        # The chunks as they stand: the allocated tiles (copied unless
+        # copy=False) with their keys and ticks, plus the rng state, the
+        # assigned fields and the altitude, none of which is ever written in
+        # place. See _caught_up.
+        n = len(self.slots)
+        take = (lambda a: a[:n].copy()) if copy else (lambda a: a[:n])
+        return {"w": self.w, "h": self.h, "chunk": self.chunk, "cw": self.cw, "ch": self.ch,
+                "tick": self.tick_count, "keys": np.array(list(self.slots), dtype=np.int64),
+                "ticks": take(self.chunk_tick), "pool": {name: take(self.pool[name]) for name in BIOME_FIELDS},
+                "base": dict(self.base), "base_tick": self.base_tick,
+                "rng": self.rng.bit_generator.state, "altitude": self.altitude}
+
+    def view(self, name):
+        # The field as last ticked, without catching anything up.
+        state = self.state(copy=False)
+        return _join(_tiles(state, name), state)
+
+    def _field(self, name):
+        # The field as of tick_count, caught up on a scratch copy (kept
+        # until the chunks change).
+        key = (self.version, self.tick_count)
+        if self._scratch is None or self._scratch[0] != key:
+            self._scratch = (key, _caught_up(self.state(copy=False)))
+        return self._scratch[1][name].copy()
+
+    def _set_field(self, name, grid):
+        # Allocated chunks take their tiles now; the rest keep `grid` as a
+        # read-only backing (see _slot), so a restore allocates no chunk the
+        # world does not go on to use. That needs the unallocated chunks
+        # current to one tick, so a field assigned after the biome has
+        # ticked allocates them first.
+        if self.base_tick != self.tick_count:
+            self._all_slots()
+            self.base = {}
+            self.base_tick = self.tick_count
+        slots = list(self.slots.values())
+        self._catch_up(slots)
+        grid = np.asarray(grid, dtype=float)
+        self.base[name] = grid
+        self.version += 1
+        if slots:
+            self.pool[name][slots] = _split(grid, self.chunk, self.cw, self.ch, BIOME_DEFAULTS[name])[list(self.slots)]
+
+    nutrients = property(lambda self: self._field("nutrients"), lambda self, g: self._set_field("nutrients", g))
+    water = property(lambda self: self._field("water"), lambda self, g: self._set_field("water", g))
+    fungi = property(lambda self: self._field("fungi"), lambda self, g: self._set_field("fungi", g))
+    bacteria = property(lambda self: self._field("bacteria"), lambda self, g: self._set_field("bacteria", g))
+
+    def terrain_chars(self):
+        return np.where(self.altitude > 0.7, "^", np.where(self.view("water") > 0.6, "~", "."))
+
+    def is_sea(self, x, y):
+        if not (0 <= x < self.w and 0 <= y < self.h):
+            return False
+        c = self.chunk
+        slot = self._slot((x // c) * self.ch + y // c)
+        if self.chunk_tick[slot] < self.tick_count:
+            self._catch_up([slot])
+        return self.pool["water"][slot, x % c, y % c] > 0.6
+
+    def water_at(self, xs, ys, catch_up=True):
+        # catch_up=False reads the chunks as last ticked (for drawing)
+        c = self.chunk
+        keys = (xs // c) * self.ch + ys // c
+        if not catch_up:
+            if "water" in self.base:
+                water = np.array(self.base["water"][xs, ys], dtype=float)
+            else:
+                water = np.full(len(keys), BIOME_DEFAULTS["water"])
+            slots = np.array([self.slots.get(int(k), -1) for k in keys.tolist()], dtype=np.int64)
+            held = slots >= 0
+            water[held] = self.pool["water"][slots[held], xs[held] % c, ys[held] % c]
+            return water
+        uniq, inverse = np.unique(keys, return_inverse=True)
+        slots = np.array([self._slot(int(k)) for k in uniq], dtype=np.int64)
+        self._catch_up(slots)
+        return self.pool["water"][slots[inverse], xs % c, ys % c]
+
+    def tick(self, occupied=None):
+        self.tick_count += 1
+        if occupied is None:
+            return
+        xs, ys = occupied
+        keys = np.unique((np.asarray(xs) // self.chunk) * self.ch + np.asarray(ys) // self.chunk)
+        self._catch_up([self._slot(int(k)) for k in keys])
+
+    def fast_forward(self, k, occupied=None):
+        # Chunks are lazy already; _catch_up jumps the ones left far behind.
+        self.tick_count += k - 1
+        if k:
+            self.tick(occupied)
+
+    def quiet(self):
+        # Judged without catching up: a chunk k ticks behind has lost 0.01*k
+        # of water since (rain against that is negligible, see
+        # _biome_fast_forward). Chunks first touched later start from the
+        # assigned or default fields, possibly wet, but by then they are far
+        # enough behind to catch up dry.
+        n = len(self.slots)
+        lag = self.tick_count - self.chunk_tick[:n]
+        wettest = self.pool["water"][:n].reshape(n, -1).max(axis=1) if n else np.zeros(0)
+        return self.tick_count - self.base_tick > BIOME_RAIN_MEMORY and (wettest - 0.01 * lag).max(initial=0.0) <= BIOME_QUIET_WATER
+
+    def active_chunks(self):
+        return int(np.count_nonzero(self.chunk_tick[:len(self.slots)] == self.tick_count))
+
+# Reference implementation of the biome rules, one cell at a time. Kept to
+# check the vectorized Biome against (see tests/test_biome.py).
+class ScalarBiome(Biome):
     def __init__(self, w, h):
         self.w = w
         self.h = h
@@ -187,30 +687,13 @@ class Biome:
         self.bacteria  = [[0.0 for _ in range(h)] for _ in range(w)]
         self.altitude  = self._generate_altitude(w, h)
 
-    def _generate_altitude(self, w, h):
-        grid = [[random.random() for _ in range(h)] for _ in range(w)]
-        for _ in range(3):
-            new_grid = [[0 for _ in range(h)] for _ in range(w)]
-            for x in range(w):
-                for y in range(h):
-                    s, c = 0, 0
-                    for dx in (-1, 0, 1):
-                        for dy in (-1, 0, 1):
-                            nx, ny = x+dx, y+dy
-                            if 0 <= nx < w and 0 <= ny < h:
-                                s += grid[nx][ny]
-                                c += 1
-                    new_grid[x][y] = s / c
-            grid = new_grid
-        return grid
-
     def is_sea(self, x, y):
         return 0 <= x < self.w and 0 <= y < self.h and self.water[x][y] > 0.6
 
     def is_mountain(self, x, y):
         return 0 <= x < self.w and 0 <= y < self.h and self.altitude[x][y] > 0.7
 
-    def tick(self):
+    def tick(self, occupied=None):
         for x in range(self.w):
             for y in range(self.h):
                 # rain
@@ -236,11 +719,11 @@ class Biome:
 # ==========================================
 # SPIRAL DIE
 # ==========================================
-def roll_spiral_die(scale, resonance=0.0):
+def roll_spiral_die(scale, resonance=0.0, rng=random):
     half = scale / 2.0
-    rx = random.uniform(-half, half)
-    ry = random.uniform(-half, half)
-    rz = random.uniform(-half, half)
+    rx = rng.uniform(-half, half)
+    ry = rng.uniform(-half, half)
+    rz = rng.uniform(-half, half)
     max_dist = math.sqrt(half**2 + half**2 + half**2)
     dist = math.sqrt(rx**2 + ry**2 + rz**2)
     magnitude = dist / max_dist
@@ -255,42 +738,451 @@ def roll_spiral_die(scale, resonance=0.0):
         outcome = "HAZARD"
     return {'magnitude': magnitude, 'outcome': outcome, 'scale': scale}
 
+SPIRAL_OUTCOMES = ("STASIS", "DISCOVERY", "TREASURE", "HAZARD")
+SPIRAL_THRESHOLDS = (0.3, 0.6, 0.85)
+
+def roll_spiral_dice(n, scale, resonance=0.0, rng=None):
+    # n rolls of roll_spiral_die at once from a numpy Generator. Returns
+    # (magnitude, outcome) arrays; outcome indexes SPIRAL_OUTCOMES.
+    rng = rng if rng is not None else np.random.default_rng()
+    half = scale / 2.0
+    r = rng.uniform(-half, half, size=(n, 3))
+    max_dist = math.sqrt(half**2 + half**2 + half**2)
+    magnitude = np.minimum(1.0, np.sqrt((r * r).sum(axis=1)) / max_dist + resonance * 0.2)
+    return magnitude, np.searchsorted(SPIRAL_THRESHOLDS, magnitude, side="right")
+
+def roll_regions(w, h, chance, resonance=0.0, rng=None):
+    # Which REGION_SIZE squares of a w x h map roll a local event this tick
+    # (flat index x_region * rows + y_region) and their outcome codes.
+    rh = -(-h // REGION_SIZE)
+    fired = np.flatnonzero(rng.random(-(-w // REGION_SIZE) * rh) < chance)
+    if not len(fired):
+        return fired, fired
+    _, outcome = roll_spiral_dice(len(fired), 8, resonance, rng)
+    return fired, outcome
+
+def assign_role(rng=random, chances=None):
+    r = rng.random()
+    cum = 0.0
+    for role, chance in (chances or ROLE_CHANCES).items():
+        cum += chance
+        if r < cum:
+            return role
+    return "NORMAL"
+
+# ==========================================
+# ENTITY STORE
+# ==========================================
+# Struct-of-arrays backing for entities: one typed column per field, so a
+# world of 100k+ entities is a handful of contiguous arrays instead of 100k
+# dicts, deques and kanban objects. Entity and StoredKanban are thin views
+# onto one slot of a store.
+#
+# The store is also a pool: released (dead) slots go on a free list and
+# births reuse them, along with the slot's cached Entity view, so a churning
+# population allocates nothing per birth or death. Every reuse bumps the
+# slot's generation, and born entities get uid = generation << UID_SLOT_BITS
+# | slot, so a uid never repeats even though slots do.
+GENE_NAMES = ("aggression", "curiosity", "social", "religiosity")
+
+class _Labels:
+    # Interned string <-> small int code table for the enum-like columns.
+    def __init__(self, names):
+        self.names = list(names)
+        self.codes = {n: i for i, n in enumerate(self.names)}
+
+    def code(self, name):
+        c = self.codes.get(name)
+        if c is None:
+            c = self.codes[name] = len(self.names)
+            self.names.append(name)
+        return c
+
+class EntityStore:
+    COLUMNS = {
+        "uid": np.int64,
+        "x": np.int32,
+        "y": np.int32,
+        "alive": np.bool_,
+        "role": np.int8,
+        "stance": np.int8,
+        "energy": np.float64,
+        "bravery": np.float64,
+        "curiosity": np.float64,
+        "treasures": np.int32,
+        "foresight_count": np.int32,
+        "belief": np.float64,
+        # consent kanban
+        "awareness": np.int8,
+        "vibe_bias": np.float64,
+        "consent_level": np.float64,
+        "mode": np.int8,
+        "sub_state": np.int8,
+        "local_fungi": np.int32,
+        "distant_dms": np.int32,
+    }
+    LABELLED = ("role", "stance", "awareness", "mode", "sub_state")
+
+    def __init__(self, capacity=64):
+        self.size = 0
+        self.capacity = max(1, capacity)
+        for name, dtype in self.COLUMNS.items():
+            setattr(self, name, np.zeros(self.capacity, dtype=dtype))
+        self.genes = np.zeros((self.capacity, len(GENE_NAMES)))
+        # pool bookkeeping, not part of the saved columns
+        self.generation = np.zeros(self.capacity, dtype=np.int64)
+        self.vacant = np.zeros(self.capacity, dtype=np.bool_)
+        self.free = np.zeros(self.capacity, dtype=np.int64)
+        self.nfree = 0
+        self.floor = 0  # lowest generation a birth may use
+        self.uid_base = 0  # added to the slot in born uids (per strip of a ParallelWorld)
+        self.views = [None] * self.capacity
+        # Ghosts: read-only copies of a neighbouring strip's border entities
+        # (ParallelWorld). They are alive and can be seen, hunted and
+        # talked to, but never act; interactions aimed at them are queued
+        # in ghost_mail for their owner.
+        self.ghost = np.zeros(self.capacity, dtype=np.bool_)
+        self.nghosts = 0
+        self.ghost_mail = []
+        self.living = LiveEntities(self)
+        self.labels = {
+            "role": _Labels(ROLE_CHANCES),
+            "stance": _Labels([STANCE_DORMANT, STANCE_SEEK, STANCE_SOCIAL,
+                               STANCE_RELIGIOUS, STANCE_DRILL, STANCE_FLEE]),
+            "awareness": _Labels(["ECLIPSE", "CRESCENT", "QUARTER", "GIBBOUS", "FULL"]),
+            "mode": _Labels(["SOVEREIGN", "RIVAL", "HOMIE"]),
+            "sub_state": _Labels([None, "FULL JUFF", "OL' EVIL EYE", "ADMIRING", "FLIRTY"]),
+        }
+        # Rarely used per-entity containers live in sparse side tables.
+        self.memories = {}
+        self.long_term_memory = {}
+
+    def __len__(self):
+        return self.size
+
+    def _grow(self, need):
+        cap = self.capacity
+        while cap < need:
+            cap *= 2
+        for name in self.COLUMNS:
+            old = getattr(self, name)
+            col = np.zeros(cap, dtype=old.dtype)
+            col[:self.size] = old[:self.size]
+            setattr(self, name, col)
+        genes = np.zeros((cap, len(GENE_NAMES)))
+        genes[:self.size] = self.genes[:self.size]
+        self.genes = genes
+        for name in ("generation", "vacant", "free", "ghost"):
+            old = getattr(self, name)
+            col = np.zeros(cap, dtype=old.dtype)
+            col[:len(old)] = old
+            setattr(self, name, col)
+        self.views.extend([None] * (cap - len(self.views)))
+        self.capacity = cap
+
+    def _take(self, k):
+        # k slots for new entities: recycled ones first, then fresh ones
+        reuse = min(k, self.nfree)
+        slots = np.empty(k, dtype=np.int64)
+        slots[:reuse] = self.free[self.nfree - reuse:self.nfree]
+        self.nfree -= reuse
+        fresh = k - reuse
+        if fresh:
+            if self.size + fresh > self.capacity:
+                self._grow(self.size + fresh)
+            slots[reuse:] = np.arange(self.size, self.size + fresh)
+            self.size += fresh
+        self.vacant[slots] = False
+        return slots
+
+    def release(self, slots):
+        # Return dead slots to the free list; their views stay pooled.
+        slots = np.asarray(slots, dtype=np.int64)
+        self.alive[slots] = False
+        self.vacant[slots] = True
+        self.free[self.nfree:self.nfree + len(slots)] = slots
+        self.nfree += len(slots)
+        for s in slots.tolist():
+            self.memories.pop(s, None)
+            self.long_term_memory.pop(s, None)
+
+    def newly_dead(self):
+        # Slots that have died but not been released yet.
+        n = self.size
+        return np.flatnonzero(~self.alive[:n] & ~self.vacant[:n])
+
+    def spawn(self, parents, rng, energy=BIRTH_COST, mutation=GENE_MUTATION):
+        # One child per entry of `parents`, on the parent's cell with the
+        # parent's role, mutated genes and bravery, and a fresh kanban.
+        parents = np.asarray(parents, dtype=np.int64)
+        k = len(parents)
+        slots = self._take(k)
+        for name in self.COLUMNS:
+            getattr(self, name)[slots] = 0
+        gen = np.maximum(self.generation[slots] + 1, self.floor)
+        self.generation[slots] = gen
+        self.uid[slots] = (gen << UID_SLOT_BITS) | (slots + self.uid_base)
+        self.x[slots] = self.x[parents]
+        self.y[slots] = self.y[parents]
+        self.role[slots] = self.role[parents]
+        self.alive[slots] = True
+        self.energy[slots] = energy
+        genes = np.clip(self.genes[parents] + rng.normal(0.0, mutation, (k, len(GENE_NAMES))), 0.0, 1.0)
+        self.genes[slots] = genes
+        self.curiosity[slots] = genes[:, GENE_NAMES.index("curiosity")]
+        self.bravery[slots] = np.clip(self.bravery[parents] + rng.normal(0.0, mutation, k), 0.0, 1.0)
+        labels = self.labels
+        self.stance[slots] = labels["stance"].code(STANCE_DORMANT)
+        self.awareness[slots] = labels["awareness"].code("ECLIPSE")
+        self.mode[slots] = labels["mode"].code("SOVEREIGN")
+        self.sub_state[slots] = labels["sub_state"].code(None)
+        return slots
+
+    def adopt(self, columns, genes, labels=None, ghost=False):
+        # Insert entities carried over from another store with their uids
+        # intact; `labels` are the source's code tables. A slot's generation
+        # never goes down, so uids this store hands out stay unique.
+        k = len(genes)
+        slots = self._take(k)
+        if labels is not None:
+            columns = _recode(columns, labels, self.labels)
+        for name in self.COLUMNS:
+            getattr(self, name)[slots] = columns[name]
+        self.genes[slots] = genes
+        gen = self.uid[slots] >> UID_SLOT_BITS
+        self.generation[slots] = np.maximum(self.generation[slots], gen)
+        if k:
+            self.floor = max(self.floor, int(gen.max()) + 1)
+        self.ghost[slots] = ghost
+        if ghost:
+            self.nghosts += k
+        return slots
+
+    def drop_ghosts(self):
+        slots = self.ghost_slots()
+        self.ghost[slots] = False
+        self.nghosts = 0
+        self.release(slots)
+
+    def allocate(self, uid, x, y, role, bravery, curiosity, genes):
+        i = int(self._take(1)[0])
+        gen = uid >> UID_SLOT_BITS
+        self.generation[i] = gen
+        self.floor = max(self.floor, gen + 1)
+        self.uid[i] = uid
+        self.x[i] = x
+        self.y[i] = y
+        self.alive[i] = True
+        self.role[i] = self.labels["role"].code(role)
+        self.stance[i] = 0
+        self.energy[i] = 60.0
+        self.bravery[i] = bravery
+        self.curiosity[i] = curiosity
+        self.treasures[i] = 0
+        self.foresight_count[i] = 0
+        self.belief[i] = 0.0
+        self.awareness[i] = 0
+        self.vibe_bias[i] = 0.0
+        self.consent_level[i] = 0.0
+        self.mode[i] = 0
+        self.sub_state[i] = 0
+        self.local_fungi[i] = 0
+        self.distant_dms[i] = 0
+        self.genes[i] = [genes[name] for name in GENE_NAMES]
+        return i
+
+    @classmethod
+    def from_columns(cls, columns, genes, labels):
+        n = len(genes)
+        store = cls(n)
+        for name in cls.COLUMNS:
+            getattr(store, name)[:n] = columns[name]
+        store.genes[:n] = genes
+        store.labels = {name: _Labels(names) for name, names in labels.items()}
+        store.size = n
+        store.generation[:n] = store.uid[:n] >> UID_SLOT_BITS
+        store.floor = int(store.generation[:n].max()) + 1 if n else 0
+        return store
+
+    def columns(self, slots):
+        return {name: getattr(self, name)[slots] for name in self.COLUMNS}
+
+    def get(self, name, slot):
+        value = getattr(self, name).item(slot)
+        if name in self.LABELLED:
+            return self.labels[name].names[value]
+        return value
+
+    def set(self, name, slot, value):
+        if name in self.LABELLED:
+            value = self.labels[name].code(value)
+        getattr(self, name)[slot] = value
+
+    def view(self, slot):
+        e = self.views[slot]
+        if e is None:
+            e = self.views[slot] = Entity.__new__(Entity)
+            e.store = self
+            e.slot = slot
+        return e
+
+    def alive_slots(self):
+        return np.flatnonzero(self.alive[:self.size])
+
+    def active_slots(self):
+        # Living slots that act this tick: everything but ghosts.
+        if not self.nghosts:
+            return self.alive_slots()
+        n = self.size
+        return np.flatnonzero(self.alive[:n] & ~self.ghost[:n])
+
+    def ghost_slots(self):
+        if not self.nghosts:
+            return np.zeros(0, dtype=np.int64)
+        return np.flatnonzero(self.ghost[:self.size])
+
+    def nbytes(self):
+        return sum(getattr(self, name).nbytes for name in self.COLUMNS) + self.genes.nbytes
+
+def _recode(columns, names, labels):
+    # Translate the labelled columns from the code tables `names` (name
+    # lists) into the _Labels in `labels`, adding any missing names.
+    columns = dict(columns)
+    for name in EntityStore.LABELLED:
+        table = np.array([labels[name].code(n) for n in names[name]], dtype=np.int64)
+        columns[name] = table[columns[name]] if len(table) else columns[name]
+    return columns
+
+class LiveEntities:
+    # The living entities of a store as a read-only sequence of pooled
+    # views in slot order. GameEngine.entities is one of these, so deaths
+    # and births never rebuild a list.
+    def __init__(self, store):
+        self.store = store
+
+    def __len__(self):
+        store = self.store
+        return int(np.count_nonzero(store.alive[:store.size]))
+
+    def __iter__(self):
+        view = self.store.view
+        for s in self.store.alive_slots().tolist():
+            yield view(s)
+
+    def __getitem__(self, i):
+        slots = self.store.alive_slots()[i]
+        if isinstance(i, slice):
+            return [self.store.view(s) for s in slots.tolist()]
+        return self.store.view(int(slots))
+
+    def __contains__(self, e):
+        return isinstance(e, Entity) and e.store is self.store and bool(e.alive)
+
+def _store_field(name):
+    def fget(self):
+        return self.store.get(name, self.slot)
+    def fset(self, value):
+        self.store.set(name, self.slot, value)
+    return property(fget, fset)
+
+class StoredKanban(ConsentKanban):
+    def __init__(self, store, slot):
+        self.store = store
+        self.slot = slot
+
+    awareness = _store_field("awareness")
+    vibe_bias = _store_field("vibe_bias")
+    consent_level = _store_field("consent_level")
+    mode = _store_field("mode")
+    sub_state = _store_field("sub_state")
+    local_fungi = _store_field("local_fungi")
+    distant_dms = _store_field("distant_dms")
+
+class GeneView:
+    def __init__(self, store, slot):
+        self.store = store
+        self.slot = slot
+
+    def __getitem__(self, name):
+        return self.store.genes.item(self.slot, GENE_NAMES.index(name))
+
+    def __setitem__(self, name, value):
+        self.store.genes[self.slot, GENE_NAMES.index(name)] = value
+
+    def __iter__(self):
+        return iter(GENE_NAMES)
+
+    def __len__(self):
+        return len(GENE_NAMES)
+
+    def keys(self):
+        return GENE_NAMES
+
+    def items(self):
+        return [(name, self[name]) for name in GENE_NAMES]
+
+    def __repr__(self):
+        return repr(dict(self.items()))
+
 # ==========================================
 # ENTITY
 # ==========================================
 class Entity:
-    def __init__(self, uid, x, y, role=None):
-        self.uid = uid
-        self.x = x
-        self.y = y
-        self.role = role if role else self._assign_role()
-        self.energy = 60.0
-        self.alive = True
-        self.bravery = random.uniform(0.3, 0.7)
-        self.curiosity = random.uniform(0.3, 0.7)
-        self.treasures = 0
-        self.consent_kanban = ConsentKanban()
-        self.stance = STANCE_DORMANT
-        self.memories = deque(maxlen=5)
-        self.long_term_memory = []
-        self.genes = {
-            'aggression': random.random(),
-            'curiosity': self.curiosity,
-            'social': random.random(),
-            'religiosity': random.random()
+    __slots__ = ("store", "slot")
+
+    def __init__(self, uid, x, y, role=None, store=None, rng=None):
+        rng = rng or random
+        self.store = store if store is not None else EntityStore(1)
+        role = role if role else assign_role(rng)
+        bravery = rng.uniform(0.3, 0.7)
+        curiosity = rng.uniform(0.3, 0.7)
+        genes = {
+            'aggression': rng.random(),
+            'curiosity': curiosity,
+            'social': rng.random(),
+            'religiosity': rng.random()
         }
-        # Special traits
-        self.foresight_count = 0
-        self.belief = 0.0
-
-    def _assign_role(self):
-        r = random.random()
-        cum = 0.0
-        for role, chance in ROLE_CHANCES.items():
-            cum += chance
-            if r < cum:
-                return role
-        return "NORMAL"
+        self.slot = self.store.allocate(uid, x, y, role, bravery, curiosity, genes)
+        self.store.views[self.slot] = self
+
+    uid = _store_field("uid")
+    x = _store_field("x")
+    y = _store_field("y")
+    role = _store_field("role")
+    energy = _store_field("energy")
+    alive = _store_field("alive")
+    bravery = _store_field("bravery")
+    curiosity = _store_field("curiosity")
+    treasures = _store_field("treasures")
+    stance = _store_field("stance")
+    # Special traits
+    foresight_count = _store_field("foresight_count")
+    belief = _store_field("belief")
+
+    @property
+    def consent_kanban(self):
+        return StoredKanban(self.store, self.slot)
+
+    @property
+    def genes(self):
+        return GeneView(self.store, self.slot)
+
+    @property
+    def memories(self):
+        return self.store.memories.setdefault(self.slot, deque(maxlen=5))
+
+    @property
+    def long_term_memory(self):
+        return self.store.long_term_memory.setdefault(self.slot, [])
+
+    def __eq__(self, other):
+        return isinstance(other, Entity) and other.store is self.store and other.slot == self.slot
+
+    def __hash__(self):
+        return hash((id(self.store), self.slot))
+
+    def _assign_role(self, rng=random):
+        return assign_role(rng)
 
     def update(self, biome, engine):
         if not self.alive:
@@ -308,9 +1200,7 @@ class Entity:
         elif self.role == "PIRATE":
             self._update_pirate(biome)
         elif self.role == "KID":
-            self._update_kid(biome)
-        elif self.role == "PREDATOR":
-            self._update_predator(biome, engine)
+            self._update_kid(biome, engine.rng)
         elif self.role == "STORYTELLER":
             self._update_storyteller(engine)
         elif self.role == "CHICKEN":
@@ -318,7 +1208,14 @@ class Entity:
         else:
             self._update_normal(biome)
 
-        self._move(biome)
+        # hunting and fleeing replace the stance's random step
+        steered = False
+        if self.role == "PREDATOR":
+            steered = self._update_predator(biome, engine)
+        elif self.role in PREY_ROLES:
+            steered = self._flee(biome, engine)
+        if not steered:
+            self._move(biome, engine.spatial, engine.rng)
 
         if self.energy <= 0:
             self.alive = False
@@ -326,21 +1223,21 @@ class Entity:
 
     # Role-specific update methods
     def _update_mystic(self, biome, engine):
-        if random.random() < 0.2:  # extra crystal sight
+        if engine.rng.random() < 0.2:  # extra crystal sight
             # scan for crystals (simplified)
             pass
-        if random.random() < 0.01:  # foresight
+        if engine.rng.random() < 0.01:  # foresight
             self.foresight_count += 1
             engine.add_log(f"Mystic {self.uid} has a vision.")
 
     def _update_skeptic(self, biome, engine):
-        if random.random() < 0.025:  # 2.5% foresight
+        if engine.rng.random() < 0.025:  # 2.5% foresight
             self.foresight_count += 1
             engine.add_log(f"Skeptic {self.uid} predicts something.")
         # authoritarian influence could be implemented here
 
     def _update_fool(self, biome, engine):
-        if random.random() < 0.33:
+        if engine.rng.random() < 0.33:
             # can access memory
             pass
         else:
@@ -353,17 +1250,48 @@ class Entity:
         else:
             self.energy -= 0.05
 
-    def _update_kid(self, biome):
-        if random.random() < self.curiosity:
+    def _update_kid(self, biome, rng=random):
+        if rng.random() < self.curiosity:
             self.curiosity = min(1.0, self.curiosity + 0.001)
 
     def _update_predator(self, biome, engine):
-        # find nearest kid or normal entity and chase
-        pass  # simplified
+        # find nearest kid or normal entity and chase; returns True if it moved
+        prey = engine.spatial.nearest(self.x, self.y, PREDATOR_SENSE,
+                                      pred=lambda e: e.alive and e.role in PREY_ROLES)
+        if prey is None:
+            return False
+        prey.stance = STANCE_FLEE
+        if abs(prey.x - self.x) + abs(prey.y - self.y) <= 1:
+            prey.energy -= PREDATOR_BITE
+            self.energy += PREDATOR_BITE / 2
+            engine.add_log(f"Predator {self.uid} bites {prey.role} {prey.uid}.")
+            if prey.energy <= 0:
+                # the prey took its turn already (see _scalar_turns)
+                prey.alive = False
+                engine.add_log(f"Entity {prey.uid} expired.")
+            return False
+        dx, dy = _toward(self.x, self.y, prey.x, prey.y)
+        self._step(dx, dy, biome, engine.spatial)
+        return True
+
+    def _flee(self, biome, engine):
+        # run straight away from the nearest predator in range
+        threat = engine.spatial.nearest(self.x, self.y, PREDATOR_SENSE,
+                                        pred=lambda e: e.alive and e.role == "PREDATOR")
+        if threat is None:
+            if self.stance == STANCE_FLEE:
+                self.stance = STANCE_DORMANT
+            return False
+        self.stance = STANCE_FLEE
+        dx, dy = _toward(threat.x, threat.y, self.x, self.y)
+        if dx == dy == 0:
+            return False  # cornered on the same cell: scramble randomly
+        self._step(dx, dy, biome, engine.spatial)
+        return True
 
     def _update_storyteller(self, engine):
-        if random.random() < 0.01:
-            story = random.choice(["Once upon a time...", "The dice rolled...", "In the depths..."])
+        if engine.rng.random() < 0.01:
+            story = engine.rng.choice(STORIES)
             engine.add_log(f"Storyteller {self.uid}: {story}")
 
     def _update_chicken(self, biome):
@@ -372,45 +1300,1004 @@ class Entity:
     def _update_normal(self, biome):
         pass
 
-    def _move(self, biome):
+    def _move(self, biome, spatial=None, rng=random):
         if self.stance == STANCE_DORMANT:
             return
         dx, dy = 0, 0
         if self.stance == STANCE_SEEK:
-            dx, dy = random.choice([(0,1),(0,-1),(1,0),(-1,0)])
+            dx, dy = rng.choice([(0,1),(0,-1),(1,0),(-1,0)])
         elif self.stance == STANCE_FLEE:
-            dx, dy = random.choice([(0,1),(0,-1),(1,0),(-1,0)])
+            dx, dy = rng.choice([(0,1),(0,-1),(1,0),(-1,0)])
         elif self.stance == STANCE_SOCIAL:
-            dx, dy = random.choice([(0,1),(0,-1),(1,0),(-1,0)])
+            dx, dy = rng.choice([(0,1),(0,-1),(1,0),(-1,0)])
         elif self.stance == STANCE_RELIGIOUS:
-            dx, dy = random.choice([(0,1),(0,-1),(1,0),(-1,0)])
+            dx, dy = rng.choice([(0,1),(0,-1),(1,0),(-1,0)])
+        self._step(dx, dy, biome, spatial)
+
+    def _step(self, dx, dy, biome, spatial=None):
         nx, ny = self.x + dx, self.y + dy
         if 0 <= nx < biome.w and 0 <= ny < biome.h:
+            ox, oy = self.x, self.y
             self.x, self.y = nx, ny
             self.energy -= 0.5
+            if spatial is not None:
+                spatial.move(self, ox, oy)
 
     def interact(self, interaction_type, is_local=True):
         return self.consent_kanban.interact(interaction_type, is_local)
 
+def _scalar_turns(entities):
+    # Entity.update order for a tick: predators last, after all the prey
+    # has fled, as in the kernels (see _pursuit).
+    entities = list(entities)
+    return [e for e in entities if e.role != "PREDATOR"] + [e for e in entities if e.role == "PREDATOR"]
+
+def _toward(x0, y0, x1, y1):
+    # One grid step from (x0, y0) towards (x1, y1) along the longer axis;
+    # works elementwise on arrays too.
+    dx, dy = np.subtract(x1, x0), np.subtract(y1, y0)
+    along_x = np.abs(dx) >= np.abs(dy)
+    return np.sign(dx) * along_x, np.sign(dy) * ~along_x
+
+# ==========================================
+# ENTITY KERNELS
+# ==========================================
+# Batched equivalent of calling Entity.update on every living entity: the
+# population is grouped by role and each role's rule runs once over all of
+# its members as array operations on the store. Random draws come from the
+# engine's numpy generator, so a batched world follows a different (but
+# equally distributed) trajectory than the scalar path; messages are the
+# same and are logged in slot order, as the per-entity loop would.
+# Entity.update stays as the reference (see tests/test_kernels.py).
+STORIES = ("Once upon a time...", "The dice rolled...", "In the depths...")
+WALK_STANCES = (STANCE_SEEK, STANCE_FLEE, STANCE_SOCIAL, STANCE_RELIGIOUS)
+STEPS = np.array([(0, 1), (0, -1), (1, 0), (-1, 0)])
+
+def _kernel_mystic(engine, slots, events):
+    store = engine.store
+    hit = slots[engine.np_rng.random(len(slots)) < 0.01]  # foresight
+    store.foresight_count[hit] += 1
+    events.extend((int(s), f"Mystic {store.uid[s]} has a vision.") for s in hit)
+
+def _kernel_skeptic(engine, slots, events):
+    store = engine.store
+    hit = slots[engine.np_rng.random(len(slots)) < 0.025]  # 2.5% foresight
+    store.foresight_count[hit] += 1
+    events.extend((int(s), f"Skeptic {store.uid[s]} predicts something.") for s in hit)
+
+def _kernel_pirate(engine, slots, events):
+    store = engine.store
+    sea = engine.biome.water_at(store.x[slots], store.y[slots]) > 0.6
+    store.energy[slots] += np.where(sea, 0.05, -0.05)  # gain energy at sea
+
+def _kernel_kid(engine, slots, events):
+    store = engine.store
+    c = store.curiosity[slots]
+    grow = engine.np_rng.random(len(slots)) < c
+    store.curiosity[slots[grow]] = np.minimum(1.0, c[grow] + 0.001)
+
+def _kernel_storyteller(engine, slots, events):
+    store = engine.store
+    hit = slots[engine.np_rng.random(len(slots)) < 0.01]
+    stories = engine.np_rng.integers(0, len(STORIES), len(hit))
+    events.extend((int(s), f"Storyteller {store.uid[s]}: {STORIES[k]}") for s, k in zip(hit, stories))
+
+def _kernel_chicken(engine, slots, events):
+    store = engine.store
+    store.curiosity[slots] = np.maximum(0.0, store.curiosity[slots] - 0.001)
+
+# FOOL and NORMAL have no effect yet; roles without a kernel only pay
+# metabolism and movement. PREDATOR is handled by _pursuit, which also
+# moves everyone.
+ROLE_KERNELS = {
+    "MYSTIC": _kernel_mystic,
+    "SKEPTIC": _kernel_skeptic,
+    "PIRATE": _kernel_pirate,
+    "KID": _kernel_kid,
+    "STORYTELLER": _kernel_storyteller,
+    "CHICKEN": _kernel_chicken,
+}
+
+def skip_kernels(engine, slots, ticks):
+    # What `ticks` kernel calls would do to idle entities, in one go:
+    # foresight counts are binomial and chicken curiosity decays linearly;
+    # kid curiosity grows by one geometric wait at a time, since each step
+    # raises the odds of the next. Pirate drain is the caller's (it is part
+    # of their energy rate) and visions and stories are not logged.
+    store = engine.store
+    rng = engine.np_rng
+    codes = store.labels["role"].codes
+    roles = store.role[slots]
+    for role, p in (("MYSTIC", 0.01), ("SKEPTIC", 0.025)):
+        seers = slots[roles == codes.get(role, -1)]
+        store.foresight_count[seers] += rng.binomial(ticks, p, len(seers))
+    for s in slots[roles == codes.get("KID", -1)].tolist():
+        c, left = float(store.curiosity[s]), ticks
+        while 0 < c < 1.0:
+            wait = int(rng.geometric(c))
+            if wait > left:
+                break
+            left -= wait
+            c = min(1.0, c + 0.001)
+        store.curiosity[s] = c
+    chickens = slots[roles == codes.get("CHICKEN", -1)]
+    store.curiosity[chickens] = np.maximum(0.0, store.curiosity[chickens] - 0.001 * ticks)
+
+def _walk_path(rng, x, y, n, w, h):
+    # Positions of a SOCIAL walker after each of n random steps from (x, y),
+    # with (x, y) first; a step off the map stays put, as in _move_entities.
+    xs = np.empty(n + 1, dtype=np.int64)
+    ys = np.empty(n + 1, dtype=np.int64)
+    xs[0], ys[0] = x, y
+    for i, (dx, dy) in enumerate(STEPS[rng.integers(0, 4, n)].tolist(), 1):
+        if 0 <= x + dx < w and 0 <= y + dy < h:
+            x, y = x + dx, y + dy
+        xs[i], ys[i] = x, y
+    return xs, ys
+
+def _meet(ax, ay, a_on, b_on, radius, bx=None, by=None, pairs=False):
+    # Per column (tick), whether any live row of a is within Manhattan
+    # `radius` of any live row of b; with pairs=True b is a itself and a
+    # row does not meet itself. Rows are (entities, ticks) arrays. Blocks
+    # of ticks and rows keep the pair table under MEET_BLOCK cells; only
+    # the first meeting matters, so columns after its block stay False.
+    if bx is None:
+        bx, by = ax, ay
+    n, nb, m = len(ax), len(bx), ax.shape[1]
+    out = np.zeros(m, dtype=bool)
+    if not n or not nb:
+        return out
+    rows = max(1, MEET_BLOCK // nb)
+    cols = max(1, MEET_BLOCK // (min(rows, n) * nb))
+    for c in range(0, m, cols):
+        t = slice(c, c + cols)
+        bxt, byt, bon = bx[None, :, t], by[None, :, t], b_on[None, :, t]
+        for r in range(0, n, rows):
+            s = slice(r, r + rows)
+            d = np.abs(ax[s, None, t] - bxt) + np.abs(ay[s, None, t] - byt)
+            near = (d <= radius) & a_on[s, None, t] & bon
+            if pairs:
+                near &= (np.arange(r, r + len(d))[:, None] != np.arange(nb))[:, :, None]
+            out[t] |= near.any(axis=(0, 1))
+        if out[t].any():
+            break
+    return out
+
+def update_entities(engine, costs=None):
+    # `costs`, when given, collects [seconds, members] per role kernel, with
+    # metabolism, movement and expiry under "(shared)".
+    clock = time.perf_counter
+    store = engine.store
+    slots = store.active_slots()
+    if not len(slots):
+        return
+    start = clock()
+    store.energy[slots] -= 0.1  # metabolism
+    shared = clock() - start
+    events = []
+    roles = store.role[slots]
+    for role, kernel in ROLE_KERNELS.items():
+        code = store.labels["role"].codes.get(role)
+        if code is None:
+            continue
+        t0 = clock()
+        members = slots[roles == code]
+        if not len(members):
+            continue
+        kernel(engine, members, events)
+        if costs is not None:
+            costs[role] = [clock() - t0, len(members)]
+    t0 = clock()
+    hunting = _pursuit(engine, slots, roles, events)
+    if costs is not None and hunting is not None:
+        costs["PREDATOR"] = [hunting, int(np.count_nonzero(roles == store.labels["role"].codes["PREDATOR"]))]
+    moving = clock() - t0 - (hunting or 0.0)
+    t0 = clock()
+    dead = slots[store.energy[slots] <= 0]
+    store.alive[dead] = False
+    events.extend((int(s), f"Entity {store.uid[s]} expired.") for s in dead)
+    # stable sort: a role message precedes the same entity's expiry
+    events.sort(key=lambda ev: ev[0])
+    for _, msg in events:
+        engine.add_log(msg)
+    if costs is not None:
+        costs["(shared)"] = [shared + moving + clock() - t0, len(slots)]
+
+def _pursuit(engine, slots, roles, events):
+    # Prey (KID/NORMAL) in range of a predator switch to FLEE and run
+    # directly away, calming back to DORMANT once none is near; everyone
+    # but the hunters then moves. Only after that do predators chase the
+    # nearest prey in range and bite when adjacent, and move themselves.
+    # The scalar path runs in the same order (predators update last, see
+    # _scalar_turns). Ghosts can be bitten and feared like anyone else but
+    # are never steered. Returns the seconds spent on the hunters, or None
+    # without predators.
+    store = engine.store
+    codes = store.labels["role"].codes
+    if "PREDATOR" not in codes:
+        _move_entities(engine, slots)
+        return None
+    prey_codes = [codes[r] for r in PREY_ROLES if r in codes]
+    is_hunter = roles == codes["PREDATOR"]
+    hunters = slots[is_hunter]
+    prey = slots[np.isin(roles, prey_codes)]
+    seen_hunters = hunters
+    if store.nghosts:
+        ghosts = store.ghost_slots()
+        seen_hunters = np.concatenate([seen_hunters, ghosts[store.role[ghosts] == codes["PREDATOR"]]])
+    _move_entities(engine, slots[~is_hunter], _flee_steps(engine, prey, seen_hunters))
+    t0 = time.perf_counter()
+    seen_prey = slots[np.isin(store.role[slots], prey_codes)]
+    if store.nghosts:
+        seen_prey = np.concatenate([seen_prey, ghosts[np.isin(store.role[ghosts], prey_codes)]])
+    _move_entities(engine, hunters, _hunt(engine, hunters, seen_prey, events))
+    return time.perf_counter() - t0
+
+def _flee_steps(engine, prey, seen_hunters):
+    # (slots, dx, dy) of the prey running from the nearest predator in range
+    store = engine.store
+    xs, ys = store.x, store.y
+    flee = store.labels["stance"].code(STANCE_FLEE)
+    dormant = store.labels["stance"].code(STANCE_DORMANT)
+    if len(seen_hunters) and len(prey):
+        threats = GridIndex(xs[seen_hunters], ys[seen_hunters], seen_hunters, GRID_CELL,
+                            engine.biome.w, engine.biome.h)
+        threat = threats.nearest(xs[prey], ys[prey], PREDATOR_SENSE)[0][:, 0]
+    else:
+        threat = np.full(len(prey), -1)
+    scared = threat >= 0
+    calm = prey[~scared]
+    store.stance[calm[store.stance[calm] == flee]] = dormant
+    runners, threat = prey[scared], threat[scared]
+    store.stance[runners] = flee
+    dx, dy = _toward(xs[threat], ys[threat], xs[runners], ys[runners])
+    away = (dx != 0) | (dy != 0)  # sharing a cell: scramble randomly
+    return runners[away], dx[away], dy[away]
+
+def _hunt(engine, hunters, seen_prey, events):
+    # Bites and (slots, dx, dy) of the chase steps, from where the prey
+    # stands after fleeing. Predators take their bites in slot order, as
+    # Entity.update would: a prey bitten to death is gone for the ones
+    # after, who look again for the next nearest.
+    store = engine.store
+    xs, ys = store.x, store.y
+    flee = store.labels["stance"].code(STANCE_FLEE)
+    steer = [[], [], []]
+    seen_prey = seen_prey[store.energy[seen_prey] > 0]  # starved this tick
+    while len(hunters) and len(seen_prey):
+        preys = GridIndex(xs[seen_prey], ys[seen_prey], seen_prey, GRID_CELL, engine.biome.w, engine.biome.h)
+        target, dist = preys.nearest(xs[hunters], ys[hunters], PREDATOR_SENSE)
+        target, dist = target[:, 0], dist[:, 0]
+        found = target >= 0
+        chased = target[found]
+        if store.nghosts:
+            chased = chased[~store.ghost[chased]]
+        store.stance[chased] = flee
+        chase = found & (dist > 1)
+        chasers, chased = hunters[chase], target[chase]
+        dx, dy = _toward(xs[chasers], ys[chasers], xs[chased], ys[chased])
+        steer[0].append(chasers)
+        steer[1].append(dx)
+        steer[2].append(dy)
+        bite = np.flatnonzero(found & (dist <= 1))
+        # the k-th bite on a prey (by hunter slot) lands while the k-1
+        # before it left the prey some energy
+        bite = bite[np.lexsort((hunters[bite], target[bite]))]
+        bitten = target[bite]
+        first = np.r_[0, np.flatnonzero(np.diff(bitten)) + 1]
+        rank = np.arange(len(bitten)) - np.repeat(first, np.diff(np.r_[first, len(bitten)]))
+        lands = store.energy[bitten] - rank * PREDATOR_BITE > 0
+        biters, bitten = hunters[bite[lands]], bitten[lands]
+        np.subtract.at(store.energy, bitten, PREDATOR_BITE)
+        store.energy[biters] += PREDATOR_BITE / 2
+        events.extend((int(s), f"Predator {store.uid[s]} bites {store.get('role', t)} {store.uid[t]}.")
+                      for s, t in zip(biters.tolist(), bitten.tolist()))
+        hunters = np.sort(hunters[bite[~lands]])
+        seen_prey = seen_prey[store.energy[seen_prey] > 0]
+    if not steer[0]:
+        return None
+    order = np.argsort(np.concatenate(steer[0]))
+    return tuple(np.concatenate(part)[order] for part in steer)
+
+def _move_entities(engine, slots, steered=None):
+    store = engine.store
+    stance = store.labels["stance"]
+    stances = store.stance[slots]
+    moving = stances != stance.codes[STANCE_DORMANT]
+    if steered is not None and len(steered[0]):
+        moving |= np.isin(slots, steered[0])
+    movers = slots[moving]
+    if not len(movers):
+        return
+    step = STEPS[engine.np_rng.integers(0, 4, len(movers))]
+    walk = np.isin(store.stance[movers], [stance.code(s) for s in WALK_STANCES])
+    step[~walk] = 0  # DRILL and other stances stay put but still pay
+    if steered is not None and len(steered[0]):
+        at = np.searchsorted(movers, steered[0])
+        step[at, 0] = steered[1]
+        step[at, 1] = steered[2]
+    ox, oy = store.x[movers], store.y[movers]
+    nx, ny = ox + step[:, 0], oy + step[:, 1]
+    ok = (nx >= 0) & (nx < engine.biome.w) & (ny >= 0) & (ny < engine.biome.h)
+    moved = movers[ok]
+    store.x[moved] = nx[ok]
+    store.y[moved] = ny[ok]
+    store.energy[moved] -= 0.5
+    spatial = engine.spatial
+    if len(moved) > len(slots) // 8:
+        # the kernels never read the index, so re-bucket only when needed
+        spatial.defer(lambda: spatial.rebuild(engine.entities, store.x, store.y))
+        return
+    for s, x, y in zip(moved.tolist(), ox[ok].tolist(), oy[ok].tolist()):
+        spatial.move(store.view(s), x, y)
+
+def social_phase(engine, turns=None):
+    # DORMANT entities turn SOCIAL now and then (more often the higher their
+    # social gene) and SOCIAL ones settle back down. Each SOCIAL entity then
+    # jokes, insults or hugs its SOCIAL_PEERS nearest SOCIAL neighbours in
+    # range, picked by its own aggression and social genes; face to face
+    # (distance <= 1) counts as local, further away as a distant DM. All
+    # of it lands on the kanban columns through interact_batch. Ghosts are
+    # talked to but do not talk; what they hear goes to store.ghost_mail.
+    # `turns`, when given, are this tick's (joiners, leavers), already drawn
+    # by GameEngine._idle_jump. Returns the number of interactions.
+    store = engine.store
+    slots = store.active_slots()
+    if not len(slots):
+        return 0
+    stances = store.labels["stance"]
+    social, dormant = stances.code(STANCE_SOCIAL), stances.code(STANCE_DORMANT)
+    stance = store.stance[slots]
+    if turns is None:
+        u = engine.np_rng.random(len(slots))
+        joiners = slots[(stance == dormant) & (u < SOCIAL_JOIN * store.genes[slots, GENE_NAMES.index("social")])]
+        leavers = slots[(stance == social) & (u < SOCIAL_LEAVE)]
+    else:
+        joiners, leavers = turns
+    store.stance[joiners] = social
+    store.stance[leavers] = dormant
+    members = slots[store.stance[slots] == social]
+    seen = members
+    if store.nghosts:
+        ghosts = store.ghost_slots()
+        seen = np.concatenate([members, ghosts[store.stance[ghosts] == social]])
+    if not len(members) or len(seen) < 2:
+        return 0
+    grid = GridIndex(store.x[seen], store.y[seen], seen, GRID_CELL, engine.biome.w, engine.biome.h)
+    xs, ys = store.x[members], store.y[members]
+    peers, dist = grid.nearest(xs, ys, SOCIAL_RADIUS, k=SOCIAL_PEERS + 1)
+    valid = (peers >= 0) & (peers != members[:, None])
+    valid &= np.cumsum(valid, axis=1) <= SOCIAL_PEERS
+    actors = np.broadcast_to(members[:, None], peers.shape)[valid]
+    targets, dist = peers[valid], dist[valid]
+    if not len(targets):
+        return 0
+    genes = store.genes[actors]
+    r = engine.np_rng.random(len(actors))
+    insult = genes[:, GENE_NAMES.index("aggression")] * 0.3
+    hug = insult + genes[:, GENE_NAMES.index("social")] * 0.3
+    kinds = np.where(r < insult, 1, np.where(r < hug, 2, 0))  # INTERACTIONS codes
+    local = dist <= 1
+    count = len(targets)
+    if store.nghosts:
+        far = store.ghost[targets]
+        store.ghost_mail.append((store.uid[targets[far]], kinds[far], local[far]))
+        targets, kinds, local = targets[~far], kinds[~far], local[~far]
+    full = store.labels["awareness"].code("FULL")
+    touched = np.unique(targets)
+    before = store.awareness[touched]
+    interact_batch(store, targets, kinds, local)
+    for s in touched[(before != full) & (store.awareness[touched] == full)].tolist():
+        engine.add_log(f"Entity {store.uid[s]} reaches FULL awareness.")
+    return count
+
+def birth_phase(engine):
+    # Entities with at least engine.birth_energy may reproduce, with a
+    # chance of engine.birth_chance * (0.5 + social gene). The parent pays
+    # BIRTH_COST, which the child starts with; the child lands in a pooled
+    # slot with mutated genes (EntityStore.spawn). Returns the child slots.
+    store = engine.store
+    slots = store.active_slots()
+    fertile = slots[store.energy[slots] >= engine.birth_energy]
+    if not len(fertile):
+        return fertile
+    chance = engine.birth_chance * (0.5 + store.genes[fertile, GENE_NAMES.index("social")])
+    parents = fertile[engine.np_rng.random(len(fertile)) < chance]
+    if not len(parents):
+        return parents
+    store.energy[parents] -= BIRTH_COST
+    children = store.spawn(parents, engine.np_rng)
+    spatial = engine.spatial
+    if len(children) > len(slots) // 8:
+        spatial.defer(lambda: spatial.rebuild(engine.entities, store.x, store.y))
+    else:
+        for s in children.tolist():
+            spatial.add(store.view(s))
+    order = np.argsort(children)
+    for child, parent in zip(children[order].tolist(), parents[order].tolist()):
+        engine.add_log(f"Entity {store.uid[child]} is born to {store.uid[parent]}.")
+    return children
+
+# ==========================================
+# SPATIAL INDEX
+# ==========================================
+# Cell -> entities hash. Kept up to date incrementally by Entity._move and
+# by GameEngine when entities are spawned, imported or die, so lookups by
+# position never have to scan the whole population.
+class SpatialIndex:
+    def __init__(self, entities=()):
+        self._cells = {}
+        self.count = 0
+        self.pending = None
+        for e in entities:
+            self.add(e)
+
+    def defer(self, rebuild):
+        # Positions changed in bulk: skip incremental updates and re-bucket
+        # with `rebuild` the next time the index is read.
+        self.pending = rebuild
+
+    @property
+    def cells(self):
+        if self.pending is not None:
+            rebuild, self.pending = self.pending, None
+            rebuild()
+        return self._cells
+
+    def __len__(self):
+        self.cells
+        return self.count
+
+    def add(self, e):
+        if self.pending is not None:
+            return
+        self._cells.setdefault((e.x, e.y), []).append(e)
+        self.count += 1
+
+    def remove(self, e, x=None, y=None):
+        if self.pending is not None:
+            return
+        key = (e.x, e.y) if x is None else (x, y)
+        bucket = self._cells.get(key)
+        if bucket is None or e not in bucket:
+            return
+        bucket.remove(e)
+        if not bucket:
+            del self._cells[key]
+        self.count -= 1
+
+    def move(self, e, old_x, old_y):
+        self.remove(e, old_x, old_y)
+        self.add(e)
+
+    def rebuild(self, entities, xs, ys):
+        # Re-bucket everything at once from position arrays indexed by store
+        # slot: sort by cell, then slice one bucket per occupied cell. Much
+        # cheaper than per-entity moves once a large share has moved.
+        entities = list(entities)
+        slots = np.fromiter((e.slot for e in entities), np.int64, len(entities))
+        keys = (xs[slots].astype(np.int64) << 32) | ys[slots].astype(np.int64)
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        ends = np.r_[starts[1:], len(keys)]
+        ordered = [entities[i] for i in order.tolist()]
+        cx = (keys[starts] >> 32).tolist()
+        cy = (keys[starts] & 0xFFFFFFFF).tolist()
+        self._cells = {(x, y): ordered[a:b]
+                       for x, y, a, b in zip(cx, cy, starts.tolist(), ends.tolist())}
+        self.count = len(entities)
+
+    def at(self, x, y):
+        return self.cells.get((x, y), ())
+
+    def within(self, x, y, r):
+        # Entities within Chebyshev distance r of (x, y).
+        if (2*r + 1) ** 2 > len(self.cells):
+            for (cx, cy), bucket in self.cells.items():
+                if abs(cx - x) <= r and abs(cy - y) <= r:
+                    yield from bucket
+            return
+        for cx in range(x - r, x + r + 1):
+            for cy in range(y - r, y + r + 1):
+                yield from self.cells.get((cx, cy), ())
+
+    def nearest(self, x, y, max_r=None, pred=None):
+        # Nearest entity by Manhattan distance, searched ring by ring, ties
+        # broken by store slot as in GridIndex.nearest. Falls back to a
+        # linear pass once the rings would cover more cells than there are
+        # occupied ones.
+        best, best_key = None, None
+        d = 0
+        while max_r is None or d <= max_r:
+            if 2 * d * d > len(self.cells):
+                for (cx, cy), bucket in self.cells.items():
+                    dist = abs(cx - x) + abs(cy - y)
+                    if max_r is not None and dist > max_r:
+                        continue
+                    for e in bucket:
+                        if (best_key is None or (dist, e.slot) < best_key) and (pred is None or pred(e)):
+                            best, best_key = e, (dist, e.slot)
+                return best
+            for cx, cy in self._ring(x, y, d):
+                for e in self.cells.get((cx, cy), ()):
+                    if (best is None or e.slot < best.slot) and (pred is None or pred(e)):
+                        best = e
+            if best is not None:
+                return best
+            d += 1
+        return None
+
+    def _ring(self, x, y, d):
+        if d == 0:
+            yield x, y
+            return
+        for i in range(d):
+            yield x + d - i, y + i
+            yield x - i, y + d - i
+            yield x - d + i, y - i
+            yield x + i, y - d + i
+
+# Static point set for batched neighbour queries: points are sorted into
+# square cells of side `cell` once, built fresh each tick from the store
+# columns instead of being maintained incrementally. A query visits the
+# cells around it in order of their closest possible distance and stops as
+# soon as its k nearest are settled, so crowded areas only look at a few
+# cells and sparse ones scan out to the radius.
+class GridIndex:
+    def __init__(self, xs, ys, ids, cell, w, h):
+        self.cell = max(1, int(cell))
+        self.cw = w // self.cell + 1
+        self.ch = h // self.cell + 1
+        keys = (xs // self.cell) * self.ch + ys // self.cell
+        order = np.argsort(keys, kind="stable")
+        self.xs = np.asarray(xs, dtype=np.int64)[order]
+        self.ys = np.asarray(ys, dtype=np.int64)[order]
+        self.ids = np.asarray(ids)[order]
+        self.starts = np.searchsorted(keys[order], np.arange(self.cw * self.ch + 1))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _rings(self, radius):
+        # Cell offsets that can hold a point within `radius`, grouped by the
+        # smallest Manhattan distance any point in them can have.
+        c = self.cell
+        reach = -(-radius // c)
+        def gap(o):
+            return 0 if o == 0 else (abs(o) - 1) * c + 1
+        groups = {}
+        for ox in range(-reach, reach + 1):
+            for oy in range(-reach, reach + 1):
+                m = gap(ox) + gap(oy)
+                if m <= radius:
+                    groups.setdefault(m, []).append((ox, oy))
+        return sorted(groups.items())
+
+    def _candidates(self, queries, qcx, qcy, ox, oy):
+        # (query, point) index pairs for the points in one neighbouring cell
+        cx, cy = qcx[queries] + ox, qcy[queries] + oy
+        ok = (cx >= 0) & (cx < self.cw) & (cy >= 0) & (cy < self.ch)
+        key = np.where(ok, cx * self.ch + cy, 0)
+        lo = self.starts[key]
+        n = np.where(ok, self.starts[key + 1] - lo, 0)
+        total = int(n.sum())
+        first = np.cumsum(n) - n
+        return np.repeat(queries, n), np.repeat(lo - first, n) + np.arange(total)
+
+    def nearest(self, qx, qy, radius, k=1):
+        # Up to k nearest points (Manhattan) within `radius` of each query,
+        # ties broken by id. Returns (ids, dists) of shape (len(qx), k),
+        # padded with -1 where fewer points are in range.
+        qx = np.asarray(qx, dtype=np.int64)
+        qy = np.asarray(qy, dtype=np.int64)
+        ids = np.full((len(qx), k), -1, dtype=np.int64)
+        dists = np.full((len(qx), k), -1, dtype=np.int64)
+        if not len(qx) or not len(self.ids):
+            return ids, dists
+        if len(qx) * len(self.ids) <= GRID_BRUTE_PAIRS:
+            # small sets: one distance matrix is cheaper than the cell walk
+            d = np.abs(qx[:, None] - self.xs) + np.abs(qy[:, None] - self.ys)
+            q, p = np.nonzero(d <= radius)
+            return self._ranked(ids, dists, radius, k, q, p, d[q, p])
+        qcx, qcy = qx // self.cell, qy // self.cell
+        active = np.arange(len(qx))
+        qs, ps, ds = [], [], []
+        for m, offsets in self._rings(radius):
+            for ox, oy in offsets:
+                q, p = self._candidates(active, qcx, qcy, ox, oy)
+                d = np.abs(self.xs[p] - qx[q]) + np.abs(self.ys[p] - qy[q])
+                keep = d <= radius
+                qs.append(q[keep])
+                ps.append(p[keep])
+                ds.append(d[keep])
+            # every point within distance m has now been seen, so a query
+            # holding k of them is settled
+            q, d = np.concatenate(qs), np.concatenate(ds)
+            seen = np.bincount(q[d <= m], minlength=len(qx))
+            active = active[seen[active] < k]
+            if not len(active):
+                break
+        q, p, d = np.concatenate(qs), np.concatenate(ps), np.concatenate(ds)
+        return self._ranked(ids, dists, radius, k, q, p, d)
+
+    def _ranked(self, ids, dists, radius, k, q, p, d):
+        # fill the k nearest of each query from its (point, distance) pairs
+        if not len(q):
+            return ids, dists
+        # one int64 sort on (query, distance, id) beats a three-key lexsort
+        span = int(self.ids.max()) + 1
+        order = np.argsort((q * (radius + 1) + d) * span + self.ids[p])
+        q, p, d = q[order], p[order], d[order]
+        first = np.flatnonzero(np.r_[True, q[1:] != q[:-1]])
+        rank = np.arange(len(q)) - np.repeat(first, np.diff(np.r_[first, len(q)]))
+        hit = rank < k
+        ids[q[hit], rank[hit]] = self.ids[p[hit]]
+        dists[q[hit], rank[hit]] = d[hit]
+        return ids, dists
+
+# ==========================================
+# SEED BANK
+# ==========================================
+# Binary seed layout (all little-endian):
+#   magic (8 bytes) | version u32 | header length u32 | JSON header
+#   then raw grids and the columnar entity table, each block 64-byte aligned.
+# Block offsets in the header are relative to the data section, which starts
+# at the first aligned byte after the header, so a loader can map the file
+# and view every block in place.
+SEED_MAGIC = b"CRNVSEED"
+SEED_VERSION = 1
+SEED_ALIGN = 64
+SEED_GRIDS = ("altitude",) + BIOME_FIELDS
+
+def _align(n):
+    return -(-n // SEED_ALIGN) * SEED_ALIGN
+
+def snapshot_grids(snap):
+    # The grids of a GameEngine.snapshot(), assembling a ChunkedBiome's from
+    # its chunks on first use.
+    if snap["grids"] is None:
+        state = snap.pop("chunks")
+        fields = _caught_up(state)
+        snap["grids"] = {name: state["altitude"] if name == "altitude" else fields[name] for name in SEED_GRIDS}
+    return snap["grids"]
+
+def write_binary_seed(snapshot, filename, fsync=False):
+    blocks = [("grids", name, grid) for name, grid in snapshot_grids(snapshot).items()]
+    blocks += [("columns", name, col) for name, col in snapshot["columns"].items()]
+    blocks.append(("columns", "genes", snapshot["genes"]))
+    header = {key: snapshot[key] for key in ("strain", "resonance", "tick", "w", "h", "labels")}
+    header["count"] = len(snapshot["genes"])
+    header["grids"] = {}
+    header["columns"] = {}
+    pos = 0
+    for i, (section, name, arr) in enumerate(blocks):
+        arr = np.asarray(arr)
+        arr = np.ascontiguousarray(arr, dtype=arr.dtype.newbyteorder("<"))
+        blocks[i] = (pos, arr)
+        header[section][name] = {"offset": pos, "dtype": arr.dtype.str, "shape": list(arr.shape)}
+        pos = _align(pos + arr.nbytes)
+    raw = json.dumps(header).encode()
+    prefix = len(SEED_MAGIC) + 8 + len(raw)
+    with open(filename, "wb") as f:
+        f.write(SEED_MAGIC)
+        f.write(struct.pack("<II", SEED_VERSION, len(raw)))
+        f.write(raw)
+        data_start = _align(prefix)
+        for pos, arr in blocks:
+            f.write(b"\0" * (data_start + pos - f.tell()))
+            f.write(arr.tobytes())
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+
+def read_binary_seed(filename, use_mmap=True):
+    with open(filename, "rb") as f:
+        if f.read(len(SEED_MAGIC)) != SEED_MAGIC:
+            raise ValueError(f"{filename} is not a binary seed")
+        head = f.read(8)
+        if len(head) < 8:
+            raise ValueError(f"{filename} is truncated")
+        version, header_len = struct.unpack("<II", head)
+        if version > SEED_VERSION:
+            raise ValueError(f"seed version {version} is newer than {SEED_VERSION}")
+        raw = f.read(header_len)
+        if len(raw) < header_len:
+            raise ValueError(f"{filename} is truncated")
+        header = json.loads(raw)
+        if use_mmap:
+            # Private copy-on-write mapping: loading touches no data, and the
+            # first tick that writes a page copies just that page.
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        else:
+            f.seek(0)
+            buf = bytearray(f.read())
+    data_start = _align(len(SEED_MAGIC) + 8 + header_len)
+
+    def block(entry):
+        dtype = np.dtype(entry["dtype"])
+        count = int(np.prod(entry["shape"], dtype=np.int64))
+        if data_start + entry["offset"] + count * dtype.itemsize > len(buf):
+            raise ValueError(f"{filename} is truncated")
+        arr = np.frombuffer(buf, dtype=dtype, count=count, offset=data_start + entry["offset"])
+        return arr.reshape(entry["shape"])
+
+    columns = {name: block(entry) for name, entry in header["columns"].items()}
+    snap = {key: header[key] for key in ("strain", "resonance", "tick", "w", "h", "labels")}
+    snap["grids"] = {name: block(entry) for name, entry in header["grids"].items()}
+    snap["genes"] = columns.pop("genes")
+    snap["columns"] = columns
+    return snap
+
+def is_binary_seed(filename):
+    with open(filename, "rb") as f:
+        return f.read(len(SEED_MAGIC)) == SEED_MAGIC
+
+# ==========================================
+# TERMINAL RENDERER
+# ==========================================
+# Keeps the last frame it drew and, on the next one, only rewrites the runs
+# of characters that changed, positioned with ANSI cursor moves. Redraws are
+# capped at `fps` (see due()); the first frame, a resize or invalidate()
+# falls back to one clear-and-paint.
+class TerminalRenderer:
+    GAP = 4  # unchanged chars cheaper to resend than a cursor move
+
+    def __init__(self, out=None, fps=RENDER_FPS, keep_cursor=False):
+        self.out = out or sys.stdout
+        self.fps = fps
+        # keep_cursor: leave the cursor (and whatever is being typed on the
+        # prompt line) alone between full repaints, for live input.
+        self.keep_cursor = keep_cursor
+        self.prev = None
+        self.size = None
+        self.last_draw = 0.0
+        self.bytes_written = 0
+        self.frames = 0
+        if os.name == 'nt':
+            os.system('')  # switches the Windows console into VT mode
+
+    def due(self):
+        return not self.fps or time.perf_counter() - self.last_draw >= 1.0 / self.fps
+
+    def invalidate(self):
+        self.prev = None
+
+    def _terminal_size(self):
+        try:
+            return os.get_terminal_size(self.out.fileno())
+        except (AttributeError, OSError, ValueError):
+            return None
+
+    def draw(self, lines):
+        size = self._terminal_size()
+        if size != self.size:
+            self.size = size
+            self.prev = None
+        if self.prev is None:
+            chunks = ["\x1b[H\x1b[2J", "\n".join(lines)]
+        elif self.keep_cursor:
+            chunks = ["\x1b7"]
+            prev = self.prev
+            for row, line in enumerate(lines[:-1]):
+                old = prev[row] if row < len(prev) - 1 else ""
+                if line != old:
+                    self._diff_line(chunks, row, old, line)
+            chunks.append("\x1b8")
+            if len(lines) != len(prev):
+                self.prev = None
+                return self.draw(lines)
+        else:
+            chunks = []
+            prev = self.prev
+            for row, line in enumerate(lines):
+                old = prev[row] if row < len(prev) else ""
+                if line == old:
+                    continue
+                self._diff_line(chunks, row, old, line)
+            if len(lines) < len(prev):
+                chunks.append(f"\x1b[{len(lines) + 1};1H\x1b[J")
+            # leave the cursor at the end of the prompt line, clearing any
+            # input echoed below the frame
+            chunks.append(f"\x1b[{len(lines)};{len(lines[-1]) + 1}H\x1b[K\x1b[J" if lines else "")
+        data = "".join(chunks)
+        self.out.write(data)
+        self.out.flush()
+        self.bytes_written += len(data)
+        self.frames += 1
+        self.prev = list(lines)
+        self.last_draw = time.perf_counter()
+        return len(data)
+
+    def _diff_line(self, chunks, row, old, new):
+        n = max(len(old), len(new))
+        col = 0
+        while col < n:
+            if col < len(old) and col < len(new) and old[col] == new[col]:
+                col += 1
+                continue
+            start = col
+            end = col + 1
+            same = 0
+            while end < len(new) and same < self.GAP:
+                if end < len(old) and old[end] == new[end]:
+                    same += 1
+                else:
+                    same = 0
+                end += 1
+            end -= same
+            chunks.append(f"\x1b[{row + 1};{start + 1}H{new[start:end]}")
+            if end >= len(new) and len(old) > len(new):
+                chunks.append("\x1b[K")
+                return
+            col = end
+
+# The pre-diff behaviour: clear the whole screen (optionally by shelling out
+# to clear/cls, as GameEngine.render used to) and print every line again.
+class FullRenderer(TerminalRenderer):
+    def __init__(self, out=None, fps=RENDER_FPS, shell_clear=False):
+        super().__init__(out, fps)
+        self.shell_clear = shell_clear
+
+    def draw(self, lines):
+        if self.shell_clear:
+            os.system(('cls' if os.name == 'nt' else 'clear') + " >" + os.devnull + " 2>&1")
+        data = "\x1b[H\x1b[2J" + "\n".join(lines)
+        self.out.write(data)
+        self.out.flush()
+        self.bytes_written += len(data)
+        self.frames += 1
+        self.last_draw = time.perf_counter()
+        return len(data)
+
+# ==========================================
+# TICK PROFILER
+# ==========================================
+# Opt-in: GameEngine.tick hands over to TickProfiler.tick when one is
+# attached, so a plain run pays a single attribute check. Each tick leaves
+# one record in a ring buffer: wall time per phase, entity update time and
+# count per role (per kernel when batched), and the net change in allocated
+# memory blocks.
+PROFILE_PHASES = ("biome", "entities", "social", "events", "compact", "births", "hooks")
+
+class TickProfiler:
+    def __init__(self, size=512):
+        self.records = deque(maxlen=size)
+        self.ticks = 0
+
+    def tick(self, engine):
+        clock = time.perf_counter
+        blocks = sys.getallocatedblocks()
+        start = clock()
+        engine.tick_count += 1
+        engine._tick_biome()
+        t_biome = clock()
+        roles = {}
+        if engine.batched:
+            engine._tick_entities(roles)
+        else:
+            for e in _scalar_turns(engine.entities):
+                t0 = clock()
+                e.update(engine.biome, engine)
+                spent = clock() - t0
+                cost = roles.get(e.role)
+                if cost is None:
+                    roles[e.role] = [spent, 1]
+                else:
+                    cost[0] += spent
+                    cost[1] += 1
+        t_entities = clock()
+        social_phase(engine)
+        t_social = clock()
+        engine._tick_events()
+        t_events = clock()
+        engine._compact()
+        t_compact = clock()
+        birth_phase(engine)
+        t_births = clock()
+        engine._tick_hooks()
+        end = clock()
+        self.ticks += 1
+        self.records.append({
+            "tick": engine.tick_count,
+            "total": end - start,
+            "phases": {"biome": t_biome - start, "entities": t_entities - t_biome,
+                       "social": t_social - t_entities, "events": t_events - t_social,
+                       "compact": t_compact - t_events, "births": t_births - t_compact,
+                       "hooks": end - t_births},
+            "roles": roles,
+            "blocks": sys.getallocatedblocks() - blocks,
+        })
+
+    def stats(self):
+        records = list(self.records)
+        if not records:
+            return {"ticks": self.ticks, "window": 0}
+        def describe(values):
+            a = np.asarray(values, dtype=float) * 1000
+            return {"mean_ms": float(a.mean()), "p95_ms": float(np.percentile(a, 95)),
+                    "max_ms": float(a.max())}
+        roles = {}
+        for r in records:
+            for role, (spent, count) in r["roles"].items():
+                agg = roles.setdefault(role, [0.0, 0])
+                agg[0] += spent
+                agg[1] += count
+        blocks = np.array([r["blocks"] for r in records])
+        return {
+            "ticks": self.ticks,
+            "window": len(records),
+            "tick": describe([r["total"] for r in records]),
+            "phases": {p: describe([r["phases"][p] for r in records]) for p in PROFILE_PHASES},
+            "roles": {role: {"ms_per_tick": 1000 * spent / len(records),
+                             "updates_per_tick": count / len(records),
+                             "us_per_update": 1e6 * spent / count}
+                      for role, (spent, count) in sorted(roles.items())},
+            "alloc_blocks": {"mean": float(blocks.mean()), "max": int(blocks.max()),
+                             "min": int(blocks.min())},
+        }
+
+    def lines(self):
+        s = self.stats()
+        if not s["window"]:
+            return [":: PROFILER :: waiting for ticks..."]
+        out = [f":: PROFILER :: last {s['window']} of {s['ticks']} ticks :: "
+               f"{s['tick']['mean_ms']:.2f} ms/tick (p95 {s['tick']['p95_ms']:.2f}, max {s['tick']['max_ms']:.2f})",
+               f"{'phase':12s} {'mean ms':>9s} {'p95 ms':>9s} {'max ms':>9s}"]
+        for phase, d in s["phases"].items():
+            out.append(f"{phase:12s} {d['mean_ms']:9.3f} {d['p95_ms']:9.3f} {d['max_ms']:9.3f}")
+        out.append(f"{'role':12s} {'ms/tick':>9s} {'n/tick':>9s} {'us/upd':>9s}")
+        for role, d in s["roles"].items():
+            out.append(f"{role:12s} {d['ms_per_tick']:9.3f} {d['updates_per_tick']:9.1f} {d['us_per_update']:9.2f}")
+        a = s["alloc_blocks"]
+        out.append(f"alloc blocks/tick: mean {a['mean']:+.1f} min {a['min']:+d} max {a['max']:+d}")
+        return out
+
+    def dump(self, filename):
+        with open(filename, "w") as f:
+            json.dump({"stats": self.stats(), "records": list(self.records)}, f, indent=1)
+
 # ==========================================
 # GAME ENGINE
 # ==========================================
 class GameEngine:
-    def __init__(self):
-        self.biome = Biome(MAP_W, MAP_H)
-        self.entities = []
+    def __init__(self, w=MAP_W, h=MAP_H, population=20, strain=None, headless=False,
+                 seed=None, role_chances=None, chunked=None, terrain_cache=None):
+        # Every world draws from its own stream; without a seed it is taken
+        # from the global generator so random.seed() still pins a run.
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        self.rng = random.Random(self.seed)
+        self.role_chances = role_chances or ROLE_CHANCES
+        # The terrain follows from the strain alone (see load_terrain). It
+        # is kept on disk only when asked for, by terrain_cache (True or a
+        # directory) or $CARNIVAL_TERRAIN_CACHE, and never for a random strain.
+        self.seed_strain = strain or f"NEVILLE-{self.rng.randint(1000,9999)}"
+        if chunked is None:
+            chunked = w * h >= CHUNKED_AUTO_CELLS
+        if terrain_cache is None and strain is None:
+            terrain_cache = False
+        altitude = load_terrain(w, h, self.seed_strain, terrain_cache)
+        self.biome = (ChunkedBiome if chunked else Biome)(w, h, self.rng, altitude=altitude)
+        self.store = EntityStore(population)
         self.log = deque(maxlen=MAX_LOG)
         self.view = VIEW_2D
         self.global_resonance = 0.0
-        self.seed_strain = f"NEVILLE-{random.randint(1000,9999)}"
         self.companion = None
         self.tick_count = 0
+        self.headless = headless
+        self.autosaver = None
+        self.journal = None
+        self.renderer = None
+        self.fps = RENDER_FPS
+        self._proj_cache = None
+        self.profiler = None
+        self.recorder = None
         # Ensure at least one mystic and two skeptics
         mystic_count = 0
         skeptic_count = 0
-        for i in range(20):
-            x = random.randint(0, MAP_W-1)
-            y = random.randint(0, MAP_H-1)
+        for i in range(population):
+            x = self.rng.randint(0, w-1)
+            y = self.rng.randint(0, h-1)
             if mystic_count < 1:
                 role = "MYSTIC"
                 mystic_count += 1
@@ -418,52 +2305,452 @@ class GameEngine:
                 role = "SKEPTIC"
                 skeptic_count += 1
             else:
-                role = None
-            self.entities.append(Entity(i, x, y, role))
+                role = assign_role(self.rng, self.role_chances)
+            Entity(i, x, y, role, self.store, self.rng)
+        self.spatial = SpatialIndex(self.entities)
+        # Entity updates run as per-role kernels (update_entities) drawing
+        # from their own generator; batched=False walks Entity.update instead.
+        self.batched = True
+        self.np_rng = np.random.default_rng(self.rng.getrandbits(64))
+        self.birth_energy = BIRTH_ENERGY
+        self.birth_chance = BIRTH_CHANCE
+
+    @property
+    def entities(self):
+        return self.store.living
 
     def add_log(self, msg):
         self.log.append(msg)
 
     def tick(self):
+        if self.profiler is not None:
+            return self.profiler.tick(self)
         self.tick_count += 1
-        self.biome.tick()
-        for e in self.entities:
-            e.update(self.biome, self)
-        if random.random() < 0.05:
-            self.trigger_world_event()
-        self.entities = [e for e in self.entities if e.alive]
+        self._tick_biome()
+        self._tick_entities()
+        social_phase(self)
+        self._tick_events()
+        self._compact()
+        birth_phase(self)
+        self._tick_hooks()
+
+    def _tick_biome(self):
+        alive = self.store.alive_slots()
+        self.biome.tick((self.store.x[alive], self.store.y[alive]))
+
+    def _tick_entities(self, costs=None):
+        if self.batched:
+            update_entities(self, costs)
+        else:
+            for e in _scalar_turns(self.entities):
+                e.update(self.biome, self)
 
-    def trigger_world_event(self):
-        roll = roll_spiral_die(8, self.global_resonance)
+    def _tick_events(self):
+        if self.rng.random() < 0.05:
+            self.trigger_world_event()
+        self.trigger_regional_events()
+
+    def _compact(self):
+        # Hand this tick's dead back to the store's free list. The entity
+        # list is a view of the living slots, so there is nothing to rebuild.
+        store = self.store
+        dead = store.newly_dead()
+        if not len(dead):
+            return
+        for s in dead.tolist():
+            self.spatial.remove(store.view(s))
+        if self.companion is not None and not self.companion.alive:
+            self.add_log(f"Your companion {self.companion.uid} is gone.")
+            self.companion = None
+        store.release(dead)
+
+    def _tick_hooks(self):
+        if self.autosaver is not None:
+            self.autosaver.maybe_save(self)
+        if self.journal is not None:
+            self.journal.maybe_checkpoint(self)
+
+    def trigger_world_event(self, outcome=None, gem=True):
+        # A ParallelWorld rolls the event once and passes the outcome to
+        # every strip, with gem=True for the one strip that finds it.
+        if outcome is None:
+            outcome = roll_spiral_die(8, self.global_resonance, self.rng)['outcome']
         desc = f"The {self.seed_strain} strain shimmers..."
-        if roll['outcome'] == "HAZARD":
+        slots = self.store.active_slots()
+        if outcome == "HAZARD":
             desc += " A STORM hits! Energy drains."
-            for e in self.entities:
-                e.energy -= 5
-        elif roll['outcome'] == "TREASURE":
+            self.store.energy[slots] -= 5
+        elif outcome == "TREASURE":
             desc += " A GEMSTONE found!"
-            target = random.choice(self.entities)
-            target.treasures += 1
-            target.energy += 10
-        elif roll['outcome'] == "DISCOVERY":
+            if gem and len(slots):
+                target = self.store.view(int(slots[self.rng.randrange(len(slots))]))
+                target.treasures += 1
+                target.energy += 10
+        elif outcome == "DISCOVERY":
             desc += " New lands discovered."
         else:
             desc += " Winds are calm."
         self.add_log(desc)
 
-    def auto_run(self, n):
-        for _ in range(n):
-            self.tick()
-        self.render()
+    def trigger_regional_events(self, chance=REGION_EVENT_CHANCE, rolled=None, nominees=None):
+        # Each REGION_SIZE square rolls for its own event: HAZARD is a storm
+        # draining everyone inside it, TREASURE a gemstone for one random
+        # entity there. All of a tick's events land in one pass over the
+        # store, so many events cost about as much as one.
+        # A ParallelWorld rolls once for all strips and passes the events in
+        # as `rolled`; each strip then only nominates its pick for every
+        # gemstone into `nominees` and the world settles who gets it.
+        size = REGION_SIZE
+        rh = -(-self.biome.h // size)
+        regions = -(-self.biome.w // size) * rh
+        if rolled is None:
+            rolled = roll_regions(self.biome.w, self.biome.h, chance, self.global_resonance, self.np_rng)
+        fired, outcome = rolled
+        if not len(fired):
+            return 0
+        storms = fired[outcome == SPIRAL_OUTCOMES.index("HAZARD")]
+        gems = fired[outcome == SPIRAL_OUTCOMES.index("TREASURE")]
+        if not len(storms) and not len(gems):
+            return len(fired)
+        store = self.store
+        slots = store.active_slots()
+        region = (store.x[slots] // size) * rh + store.y[slots] // size
+        if len(storms):
+            struck = np.zeros(regions, dtype=bool)
+            struck[storms] = True
+            store.energy[slots[struck[region]]] -= 5
+        found = 0
+        if len(gems):
+            lucky = np.zeros(regions, dtype=bool)
+            lucky[gems] = True
+            pick = self.np_rng.permutation(np.flatnonzero(lucky[region]))
+            where, first, counts = np.unique(region[pick], return_index=True, return_counts=True)
+            winners = slots[pick[first]]
+            if nominees is not None:
+                nominees.append((where, store.uid[winners], counts))
+                return len(fired)
+            store.treasures[winners] += 1
+            store.energy[winners] += 10
+            found = len(winners)
+        if nominees is None and (len(storms) or found):
+            self.add_log(f"Local weather: {len(storms)} storm(s), {found} gemstone(s) found.")
+        return len(fired)
+
+    def auto_run(self, n, fast=None):
+        # Runs past AUTO_RUN_FAST ticks (or fast=True) go through
+        # fast_forward and only draw the last frame.
+        if fast is None:
+            fast = n > AUTO_RUN_FAST
+        if fast:
+            self.fast_forward(n)
+        else:
+            for _ in range(n):
+                self.tick()
+                if not self.headless:
+                    self.render(force=False)
+        if not self.headless:
+            self.render()
         self.add_log(f"Auto-ran {n} ticks.")
 
-    def export_seed(self, filename=None):
+    def fast_forward(self, n):
+        # Advances n ticks with the same outcome distribution as n tick()
+        # calls: idle stretches are jumped (_idle_jump), the rest is ticked.
+        # After a busy tick the idle check backs off, doubling up to
+        # FAST_FORWARD_BACKOFF ticks. Returns how many ticks were jumped.
+        done = jumped = wait = 0
+        backoff = 1
+        while done < n:
+            if wait:
+                wait -= 1
+            else:
+                k = self._idle_jump(n - done)
+                if k is None:
+                    wait = backoff
+                    backoff = min(2 * backoff, FAST_FORWARD_BACKOFF)
+                else:
+                    backoff = 1
+                    done += k
+                    jumped += k
+            if done < n:
+                self.tick()
+                done += 1
+        return jumped
+
+    def _idle_jump(self, limit):
+        # Jumps up to `limit` ticks while nothing can meet anything: all are
+        # DORMANT or SOCIAL, no predator has prey in reach, no two SOCIAL
+        # entities are in reach of each other, nobody is fertile and the
+        # biome is quiet. The world is then a few straight lines between
+        # events: energy drains at a fixed rate, SOCIAL walkers follow paths
+        # drawn when they join, and only world and regional events, joins
+        # and leaves (all drawn as geometric waits), deaths and walkers
+        # coming into reach change anything. The jump ends on the first tick
+        # where someone meets someone, finishing that tick with what was
+        # drawn for it. Returns the ticks jumped, or None if the world is
+        # busy.
+        store = self.store
+        if not self.batched or store.nghosts:
+            return None
+        for hook in (self.autosaver, self.journal):
+            if hook is not None and hook.every:
+                limit = min(limit, hook.every - self.tick_count % hook.every)
+        slots = store.active_slots()
+        stances = store.labels["stance"]
+        social, dormant = stances.code(STANCE_SOCIAL), stances.code(STANCE_DORMANT)
+        stance = store.stance[slots]
+        if not np.all((stance == dormant) | (stance == social)):
+            return None
+        if np.any(store.energy[slots] >= self.birth_energy) or not self.biome.quiet():
+            return None
+        w, h = self.biome.w, self.biome.h
+        codes = store.labels["role"].codes
+        roles = store.role[slots]
+        hunter = roles == codes.get("PREDATOR", -1)
+        prey = np.isin(roles, [codes[r] for r in PREY_ROLES if r in codes])
+        x, y = store.x[slots].astype(np.int64), store.y[slots].astype(np.int64)
+        if hunter.any() and prey.any():
+            grid = GridIndex(x[prey], y[prey], np.flatnonzero(prey), GRID_CELL, w, h)
+            if (grid.nearest(x[hunter], y[hunter], PREDATOR_SENSE)[0] >= 0).any():
+                return None
+        rng = self.np_rng
+        never = np.iinfo(np.int64).max // 2
+        n = len(slots)
+        energy = store.energy[slots].copy()
+        rate = 0.1 + 0.05 * (roles == codes.get("PIRATE", -1))
+        alive = np.ones(n, dtype=bool)
+        walking = stance == social
+        join_p = np.clip(SOCIAL_JOIN * store.genes[slots, GENE_NAMES.index("social")], 0.0, 1.0)
+
+        def join_wait(i):
+            p = join_p[i]
+            return np.where(p > 0, rng.geometric(np.where(p > 0, p, 1.0)), never)
+
+        join_at = np.where(walking, never, join_wait(np.arange(n)))
+        leave_at = np.full(n, never)
+        paths = {}
+
+        def walk(i, t):
+            span = int(rng.geometric(SOCIAL_LEAVE))
+            paths[i] = (t, *_walk_path(rng, int(x[i]), int(y[i]), span, w, h))
+            leave_at[i] = t + span
+
+        for i in np.flatnonzero(walking).tolist():
+            walk(i, 0)
+        # Regional events only matter where someone is or will walk, so a
+        # region draws its next event when it comes into view and forgets
+        # it when it drops out (the draws are memoryless).
+        rh = -(-h // REGION_SIZE)
+        region_at = np.full(-(-w // REGION_SIZE) * rh, never)
+        world_at = int(rng.geometric(0.05))
+        now = 0
+        while True:
+            live = np.flatnonzero(alive)
+            if not len(live):
+                # nobody left for events to touch
+                now = limit
+                break
+            seen = [x[live], y[live]]
+            for i in live[walking[live]].tolist():
+                t0, xs, ys = paths[i]
+                seen += [xs[now - t0:], ys[now - t0:]]
+            view = np.zeros(len(region_at), dtype=bool)
+            view[(np.concatenate(seen[::2]) // REGION_SIZE) * rh + np.concatenate(seen[1::2]) // REGION_SIZE] = True
+            region_at[~view] = never
+            fresh = np.flatnonzero(view & (region_at == never))
+            region_at[fresh] = now + rng.geometric(REGION_EVENT_CHANCE, len(fresh))
+            tau = min(limit, world_at, int(region_at.min()),
+                      int(join_at[live].min(initial=never)), int(leave_at[live].min(initial=never)))
+            m = tau - now
+            e0, r = energy[live], rate[live]
+            # tick of the span (1..m, > m: survives it) each live entity dies in
+            died = np.ceil(e0 / r - 1e-9).astype(np.int64).clip(1)
+            wl = walking[live]
+            joining = ~wl & (join_at[live] == tau)
+            leaving = wl & (leave_at[live] == tau)
+            social_bad = np.zeros(m + 1, dtype=bool)
+            hunt_bad = np.zeros(m + 1, dtype=bool)
+            if wl.any():
+                walkers = live[wl]
+                cols = [paths[i] for i in walkers.tolist()]
+                wx = np.array([xs[now + 1 - t0:tau + 1 - t0] for t0, xs, _ in cols])
+                wy = np.array([ys[now + 1 - t0:tau + 1 - t0] for t0, _, ys in cols])
+                moved = (wx != np.c_[x[walkers], wx[:, :-1]]) | (wy != np.c_[y[walkers], wy[:, :-1]])
+                steps = np.arange(1, m + 1)
+                ew = e0[wl, None] - r[wl, None] * steps - 0.5 * np.cumsum(moved, axis=1)
+                dead = ew <= 0
+                died[wl] = np.where(dead.any(axis=1), dead.argmax(axis=1) + 1, never)
+                px = np.repeat(x[live, None], m, axis=1)
+                py = np.repeat(y[live, None], m, axis=1)
+                px[wl], py[wl] = wx, wy
+                up = died[:, None] > steps
+                # SOCIAL members after each tick's turns
+                members = up & wl[:, None]
+                members[:, -1] &= ~leaving
+                members[:, -1] |= joining & (died > m)
+                on = members.any(axis=1)
+                social_bad[1:] = _meet(px[on], py[on], members[on], members[on], SOCIAL_RADIUS, pairs=True)
+                # predator / prey in reach after each tick (read by the next)
+                wh, wp = hunter[live] & wl, prey[live] & wl
+                if wh.any() or wp.any():
+                    hit = _meet(px[wh], py[wh], up[wh], up[prey[live]], PREDATOR_SENSE,
+                                px[prey[live]], py[prey[live]])
+                    hit |= _meet(px[wp], py[wp], up[wp], up[hunter[live]], PREDATOR_SENSE,
+                                 px[hunter[live]], py[hunter[live]])
+                    hunt_bad[1:] = hit
+            elif joining.sum() > 1:
+                on = live[joining & (died > m)]
+                members = np.ones((len(on), 1), dtype=bool)
+                social_bad[m] = _meet(x[on, None], y[on, None], members, members, SOCIAL_RADIUS, pairs=True)[0]
+            stop = m
+            if social_bad.any():
+                stop = int(social_bad.argmax())
+            if hunt_bad.any():
+                stop = min(stop, int(hunt_bad.argmax()))
+            busy = social_bad[stop] or hunt_bad[stop]
+            gone = died <= stop
+            for i in live[gone][np.lexsort((slots[live[gone]], died[gone]))].tolist():
+                alive[i] = False
+                store.alive[slots[i]] = False
+                self.add_log(f"Entity {store.uid[slots[i]]} expired.")
+            keep = ~gone
+            energy[live[keep]] = e0[keep] - r[keep] * stop
+            if wl.any():
+                moving = keep[wl]
+                energy[walkers[moving]] = ew[moving, stop - 1]
+                x[walkers], y[walkers] = wx[:, stop - 1], wy[:, stop - 1]
+            now += stop
+            # the rest of tick `now`: SOCIAL turns, events, compaction
+            live = np.flatnonzero(alive)
+            store.energy[slots[live]] = energy[live]
+            store.x[slots[live]], store.y[slots[live]] = x[live], y[live]
+            leavers = live[leave_at[live] == now]
+            joiners = live[join_at[live] == now]
+            if social_bad[stop]:
+                social_phase(self, (slots[joiners], slots[leavers]))
+            else:
+                for i in leavers.tolist():
+                    walking[i] = False
+                    leave_at[i] = never
+                    join_at[i] = now + join_wait(i)
+                    store.stance[slots[i]] = dormant
+                for i in joiners.tolist():
+                    walking[i] = True
+                    join_at[i] = never
+                    walk(i, now)
+                    store.stance[slots[i]] = social
+            if world_at == now:
+                self.trigger_world_event()
+                world_at += int(rng.geometric(0.05))
+            fired = np.flatnonzero(region_at == now)
+            if len(fired):
+                _, outcome = roll_spiral_dice(len(fired), 8, self.global_resonance, rng)
+                self.trigger_regional_events(rolled=(fired, outcome))
+                region_at[fired] += rng.geometric(REGION_EVENT_CHANCE, len(fired))
+            energy[live] = store.energy[slots[live]]
+            if gone.any():
+                self._compact()
+            if busy or now == limit or np.any(energy[live] >= self.birth_energy):
+                break
+        skip_kernels(self, slots[live], now)
+        birth_phase(self)
+        self.tick_count += now
+        self.biome.fast_forward(now, (x[live], y[live]))
+        self.spatial.defer(lambda: self.spatial.rebuild(self.entities, store.x, store.y))
+        self._tick_hooks()
+        return now
+
+    def summary(self):
+        roles = {}
+        for e in self.entities:
+            roles[e.role] = roles.get(e.role, 0) + 1
+        alive = self.store.alive_slots()
+        return {
+            "strain": self.seed_strain,
+            "tick": self.tick_count,
+            "map": [self.biome.w, self.biome.h],
+            "entities": len(self.entities),
+            "roles": roles,
+            "mean_energy": float(self.store.energy[alive].mean()) if len(alive) else 0.0,
+            "treasures": int(self.store.treasures[alive].sum()),
+            "resonance": self.global_resonance,
+        }
+
+    def snapshot(self, copy=False):
+        # A ChunkedBiome only hands over its allocated chunks here; catching
+        # them up into grids is left to snapshot_grids, which the autosave
+        # and journal writers run on their own thread.
+        alive = self.store.alive_slots()
+        snap = {
+            "strain": self.seed_strain,
+            "resonance": self.global_resonance,
+            "tick": self.tick_count,
+            "w": self.biome.w,
+            "h": self.biome.h,
+            "labels": {name: list(lab.names) for name, lab in self.store.labels.items()},
+            "grids": None,
+            "columns": self.store.columns(alive),
+            "genes": self.store.genes[alive],
+        }
+        if isinstance(self.biome, ChunkedBiome):
+            snap["chunks"] = self.biome.state()
+        else:
+            grids = {name: getattr(self.biome, name) for name in SEED_GRIDS}
+            snap["grids"] = {name: np.array(g) if copy else np.asarray(g) for name, g in grids.items()}
+        return snap
+
+    def restore(self, snap):
+        w, h = snap["w"], snap["h"]
+        grids = snapshot_grids(snap)
+        biome_cls = type(self.biome)
+        self.biome = biome_cls(w, h, self.rng, altitude=grids["altitude"])
+        for name in BIOME_FIELDS:
+            setattr(self.biome, name, grids[name])
+        self.seed_strain = snap["strain"]
+        self.global_resonance = snap["resonance"]
+        self.tick_count = snap["tick"]
+        self.store = EntityStore.from_columns(snap["columns"], snap["genes"], snap["labels"])
+        self.companion = None
+        self.spatial = SpatialIndex(self.entities)
+
+    def export_seed(self, filename=None, fmt=None):
+        # Binary by default; *.seed / *.json (or fmt="json") keep the
+        # nested-list JSON format for interchange.
         if not filename:
-            filename = f"{self.seed_strain}.seed"
+            filename = f"{self.seed_strain}.seedb"
+        if fmt is None:
+            fmt = "json" if filename.endswith((".seed", ".json")) else "binary"
+        if fmt == "json":
+            self._export_json(filename)
+            return
+        try:
+            write_binary_seed(self.snapshot(), filename)
+            self.add_log(f"Seed exported: {filename}")
+        except Exception as e:
+            self.add_log(f"Export failed: {e}")
+
+    def import_seed(self, filename, mutate=True):
+        try:
+            binary = is_binary_seed(filename)
+        except Exception as e:
+            self.add_log(f"Import failed: {e}")
+            return
+        if not binary:
+            self._import_json(filename, mutate)
+            return
+        try:
+            snap = read_binary_seed(filename)
+            self.restore(snap)
+            if mutate:
+                self.seed_strain = snap["strain"] + "-F2"
+            self.add_log(f"Imported strain: {snap['strain']}. World mutated.")
+        except Exception as e:
+            self.add_log(f"Import failed: {e}")
+
+    def _export_json(self, filename):
         data = {
             "strain": self.seed_strain,
-            "terrain": self.biome.altitude,
-            "water": self.biome.water,
+            "terrain": self.biome.altitude.tolist(),
+            "water": self.biome.water.tolist(),
             "resonance": self.global_resonance,
             "entities": []
         }
@@ -493,17 +2780,20 @@ class GameEngine:
         except Exception as e:
             self.add_log(f"Export failed: {e}")
 
-    def import_seed(self, filename):
+    def _import_json(self, filename, mutate=True):
         try:
             with open(filename, 'r') as f:
                 data = json.load(f)
-            self.seed_strain = data["strain"] + "-F2"
-            self.biome.altitude = data["terrain"]
-            self.biome.water = data["water"]
-            self.global_resonance = data["resonance"]
-            self.entities = []
+            altitude = np.array(data["terrain"], dtype=float)
+            w, h = altitude.shape
+            # The JSON format carries terrain and water only; the soil
+            # starts from the defaults on a biome of the file's size.
+            grids = {name: np.full((w, h), BIOME_DEFAULTS[name]) for name in BIOME_FIELDS}
+            grids["altitude"] = altitude
+            grids["water"] = np.array(data["water"], dtype=float).reshape(w, h)
+            store = EntityStore(len(data["entities"]))
             for e_data in data["entities"]:
-                e = Entity(e_data["uid"], e_data["x"], e_data["y"], e_data["role"])
+                e = Entity(e_data["uid"], e_data["x"], e_data["y"], e_data["role"], store, self.rng)
                 e.energy = e_data["energy"]
                 e.bravery = e_data["bravery"]
                 e.curiosity = e_data["curiosity"]
@@ -516,35 +2806,28 @@ class GameEngine:
                 ck.sub_state = ck_data["sub_state"]
                 ck.local_fungi = ck_data["local_fungi"]
                 ck.distant_dms = ck_data["distant_dms"]
-                self.entities.append(e)
+            alive = store.alive_slots()
+            self.restore({"strain": data["strain"] + ("-F2" if mutate else ""), "resonance": data["resonance"],
+                          "tick": self.tick_count, "w": w, "h": h, "grids": grids,
+                          "labels": {name: list(lab.names) for name, lab in store.labels.items()},
+                          "columns": store.columns(alive), "genes": store.genes[alive]})
             self.add_log(f"Imported strain: {data['strain']}. World mutated.")
         except Exception as e:
             self.add_log(f"Import failed: {e}")
 
+    def frame_2d(self):
+        grid = self.biome.terrain_chars()
+        for (x, y), bucket in self.spatial.cells.items():
+            if 0 <= x < self.biome.w and 0 <= y < self.biome.h:
+                grid[x, y] = bucket[0].role[0]
+        if self.companion and self.companion.alive:
+            grid[self.companion.x, self.companion.y] = "@"
+        return ["".join(grid[:, y]) for y in range(self.biome.h)]
+
     def render_2d(self):
-        buffer = []
-        for y in range(self.biome.h):
-            row = ""
-            for x in range(self.biome.w):
-                char = " "
-                for e in self.entities:
-                    if e.x == x and e.y == y and e.alive:
-                        char = e.role[0]
-                        if self.companion and e.uid == self.companion.uid:
-                            char = "@"
-                        break
-                if char == " ":
-                    if self.biome.is_mountain(x, y):
-                        char = "^"
-                    elif self.biome.is_sea(x, y):
-                        char = "~"
-                    else:
-                        char = "."
-                row += char
-            buffer.append(row)
-        print("\n".join(buffer))
+        print("\n".join(self.frame_2d()))
 
-    def render_3d(self):
+    def frame_3d(self):
         try:
             cols, rows = os.get_terminal_size()
         except:
@@ -554,103 +2837,150 @@ class GameEngine:
         if screen_h <= 0 or screen_w <= 0:
             screen_h, screen_w = 20, 80
 
+        proj = self._terrain_projection(screen_w, screen_h)
+        buffer = np.full(screen_w * screen_h, ord(' '), dtype=np.uint8)
+
+        # Terrain: the winning sample per pixel is cached, only the glyph
+        # (which follows the water level) is looked up each frame.
+        src, pix = proj["src"], proj["pix"]
+        xs, ys = proj["x"][src], proj["y"][src]
+        sea = self.biome.water_at(xs, ys, catch_up=False) > 0.6
+        mountain = self.biome.altitude[xs, ys] > 0.7
+        buffer[pix] = np.where(mountain, ord("^"), np.where(sea, ord("~"), ord(".")))
+        pixel_dist = np.full(screen_w * screen_h, np.inf)
+        pixel_dist[pix] = proj["dist"][src]
+
+        # Entities: projected in one batch, then merged into the cached depth
+        # order -- an entity wins its pixel if it is no farther than the
+        # terrain drawn there (ties went to entities in the old sort too).
+        alive = self.store.alive_slots()
+        if len(alive):
+            ex = self.store.x[alive].astype(float)
+            ey = self.store.y[alive].astype(float)
+            ez = self.biome.altitude[self.store.x[alive], self.store.y[alive]] * 10 + 0.5
+            glyphs = np.array([ord(n[0]) for n in self.store.labels["role"].names], dtype=np.uint8)
+            chars = glyphs[self.store.role[alive]]
+            if self.companion and self.companion.alive and self.companion.store is self.store:
+                chars[alive == self.companion.slot] = ord("@")
+            edist = np.sqrt((ex - proj["cam"][0])**2 + (ey - proj["cam"][1])**2 + (ez - proj["cam"][2])**2)
+            gx = ((ex - ey) * proj["iso_x"] + proj["offset_x"]) * proj["scale"]
+            gy = ((ex + ey) * proj["iso_y"] - ez + proj["offset_y"]) * proj["scale"]
+            gx, gy = gx.astype(int), gy.astype(int)
+            ok = (gx >= 0) & (gx < screen_w) & (gy >= 0) & (gy < screen_h)
+            epix = (gy * screen_w + gx)[ok]
+            edist, chars = edist[ok], chars[ok]
+            # nearest entity per pixel; among equals the later one, as the
+            # painter would have drawn it last
+            epix, edist, chars = epix[::-1], edist[::-1], chars[::-1]
+            order = np.lexsort((edist, epix))
+            epix, edist, chars = epix[order], edist[order], chars[order]
+            first = np.ones(len(epix), dtype=bool)
+            first[1:] = epix[1:] != epix[:-1]
+            epix, edist, chars = epix[first], edist[first], chars[first]
+            wins = edist <= pixel_dist[epix]
+            buffer[epix[wins]] = chars[wins]
+
+        text = buffer.tobytes().decode("ascii")
+        return [text[i:i + screen_w] for i in range(0, screen_w * screen_h, screen_w)]
+
+    def _terrain_projection(self, screen_w, screen_h):
+        # Altitude never changes after generation, so the sampled terrain's
+        # isometric projection, depth order, screen bounds and per-pixel
+        # winner are computed once per (terminal size, altitude grid).
+        cache = self._proj_cache
+        if (cache is not None and cache["size"] == (screen_w, screen_h)
+                and cache["altitude"] is self.biome.altitude):
+            return cache
+        altitude = self.biome.altitude
+        w, h = altitude.shape
+
         # Camera position
-        cam_x = MAP_W / 2
-        cam_y = MAP_H / 2
+        cam_x = w / 2
+        cam_y = h / 2
         cam_z = 20
 
-        # Collect points with distance from camera
-        points = []
-        step = 2  # sample every 2nd tile to reduce clutter
-        for x in range(0, self.biome.w, step):
-            for y in range(0, self.biome.h, step):
-                z = self.biome.altitude[x][y] * 10
-                char = "^" if self.biome.is_mountain(x, y) else ("~" if self.biome.is_sea(x, y) else ".")
-                dist = math.sqrt((x-cam_x)**2 + (y-cam_y)**2 + (z-cam_z)**2)
-                points.append((dist, x, y, z, char, "terrain"))
-        for e in self.entities:
-            if e.alive:
-                z = self.biome.altitude[e.x][e.y] * 10 + 0.5
-                char = e.role[0]
-                if self.companion and e.uid == self.companion.uid:
-                    char = "@"
-                dist = math.sqrt((e.x-cam_x)**2 + (e.y-cam_y)**2 + (z-cam_z)**2)
-                points.append((dist, e.x, e.y, z, char, "entity"))
-
-        # Sort by distance descending (far to near)
-        points.sort(key=lambda p: p[0], reverse=True)
-
         # Isometric projection
         scale = 2.0
         iso_x = math.cos(math.radians(30)) * scale
         iso_y = math.sin(math.radians(30)) * scale
 
-        # Project all points to get bounds
-        proj = []
-        for _, x, y, z, char, _ in points:
-            sx = (x - y) * iso_x
-            sy = (x + y) * iso_y - z
-            proj.append((sx, sy, char))
-
-        if proj:
-            min_sx = min(p[0] for p in proj)
-            max_sx = max(p[0] for p in proj)
-            min_sy = min(p[1] for p in proj)
-            max_sy = max(p[1] for p in proj)
-        else:
-            min_sx = max_sx = min_sy = max_sy = 0
-
+        # Bounds over every cell (entities sit up to 0.5 above the ground),
+        # so they stay fixed no matter where entities wander.
+        gx, gy = np.meshgrid(np.arange(w), np.arange(h), indexing="ij")
+        sx = (gx - gy) * iso_x
+        sy = (gx + gy) * iso_y - altitude * 10
+        min_sx, max_sx = float(sx.min()), float(sx.max())
+        min_sy, max_sy = float((sy - 0.5).min()), float(sy.max())
         range_x = max_sx - min_sx + 1
         range_y = max_sy - min_sy + 1
-        if range_x == 0: range_x = 1
-        if range_y == 0: range_y = 1
-        scale_x = (screen_w - 1) / range_x
-        scale_y = (screen_h - 1) / range_y
-        scale = min(scale_x, scale_y)
-
+        scale = min((screen_w - 1) / range_x, (screen_h - 1) / range_y)
         offset_x = -min_sx
         offset_y = -min_sy
 
-        # Create buffer
-        buffer = [[' ' for _ in range(screen_w)] for _ in range(screen_h)]
-
-        # Place characters
-        for sx, sy, char in proj:
-            grid_x = int((sx + offset_x) * scale)
-            grid_y = int((sy + offset_y) * scale)
-            if 0 <= grid_x < screen_w and 0 <= grid_y < screen_h:
-                buffer[grid_y][grid_x] = char
+        step = 2  # sample every 2nd tile to reduce clutter
+        x = gx[::step, ::step].ravel()
+        y = gy[::step, ::step].ravel()
+        z = altitude[x, y] * 10
+        dist = np.sqrt((x - cam_x)**2 + (y - cam_y)**2 + (z - cam_z)**2)
+        px = (((x - y) * iso_x + offset_x) * scale).astype(int)
+        py = (((x + y) * iso_y - z + offset_y) * scale).astype(int)
+        ok = np.flatnonzero((px >= 0) & (px < screen_w) & (py >= 0) & (py < screen_h))
+        pix = py[ok] * screen_w + px[ok]
+        # far-to-near painting: the nearest sample per pixel is the one seen
+        order = np.lexsort((dist[ok], pix))
+        first = np.ones(len(order), dtype=bool)
+        first[1:] = pix[order][1:] != pix[order][:-1]
+        winners = order[first]
+        self._proj_cache = {
+            "size": (screen_w, screen_h),
+            "altitude": altitude,
+            "cam": (cam_x, cam_y, cam_z),
+            "iso_x": iso_x, "iso_y": iso_y,
+            "offset_x": offset_x, "offset_y": offset_y, "scale": scale,
+            "x": x, "y": y, "dist": dist,
+            "src": ok[winners], "pix": pix[winners],
+        }
+        return self._proj_cache
 
-        # Print buffer
-        for row in buffer:
-            print(''.join(row))
+    def render_3d(self):
+        print("\n".join(self.frame_3d()))
 
-    def render(self):
-        os.system('cls' if os.name == 'nt' else 'clear')
-        print(f":: DARK CARNIVAL RNG :: STRAIN: {self.seed_strain}")
-        print(f":: TICK: {self.tick_count} :: RESONANCE: {self.global_resonance:.2f} :: ENTITIES: {len(self.entities)}")
-        print(f":: VIEW: {'2D' if self.view == VIEW_2D else ('3D' if self.view == VIEW_3D else 'FEED')}")
-        print("-" * 60)
+    def frame(self):
+        lines = [
+            f":: DARK CARNIVAL RNG :: STRAIN: {self.seed_strain}",
+            f":: TICK: {self.tick_count} :: RESONANCE: {self.global_resonance:.2f} :: ENTITIES: {len(self.entities)}",
+            f":: VIEW: {VIEW_NAMES[self.view]}",
+            "-" * 60,
+        ]
 
         if self.view == VIEW_2D:
-            self.render_2d()
+            lines += self.frame_2d()
         elif self.view == VIEW_3D:
-            self.render_3d()
+            lines += self.frame_3d()
         elif self.view == VIEW_FEED:
-            for line in self.log:
-                print(line)
+            lines += list(self.log)
+        elif self.view == VIEW_STATS:
+            lines += self.profiler.lines() if self.profiler else [":: PROFILER :: off ([f] to start)"]
 
         if self.companion:
             e = self.companion
             k = e.consent_kanban
-            print(f"\n:: COMPANION :: {e.role} ID:{e.uid}")
-            print(f"  Energy: {e.energy:.1f} | Bravery: {e.bravery:.2f} | Curiosity: {e.curiosity:.2f}")
-            print(f"  Consent: {k.consent_level*100:.0f}% | Vibe: {k.vibe_bias:.2f} ({k.mode})")
-
-        print("-" * 60)
-        print("[Space] Tick | [v] View (2D/3D/Feed) | [a] Auto-run (ticks) | [m] Menu")
-        print("[c] Connect Entity | [t] Talk | [h] Hug | [x] Export | [i] Import | [q] Quit")
-        print(">> ", end='')
+            lines.append("")
+            lines.append(f":: COMPANION :: {e.role} ID:{e.uid}")
+            lines.append(f"  Energy: {e.energy:.1f} | Bravery: {e.bravery:.2f} | Curiosity: {e.curiosity:.2f}")
+            lines.append(f"  Consent: {k.consent_level*100:.0f}% | Vibe: {k.vibe_bias:.2f} ({k.mode})")
+
+        lines.append("-" * 60)
+        lines.append("[Space] Tick | [v] View (2D/3D/Feed) | [a] Auto-run (ticks) | [m] Menu")
+        lines.append("[c] Connect Entity | [t] Talk | [h] Hug | [f] Profiler | [x] Export | [i] Import | [q] Quit")
+        lines.append(">> ")
+        return lines
+
+    def render(self, force=True):
+        if self.renderer is None:
+            self.renderer = TerminalRenderer(fps=self.fps)
+        if force or self.renderer.due():
+            self.renderer.draw(self.frame())
 
     def menu(self):
         while True:
@@ -664,71 +2994,659 @@ class GameEngine:
                 return True
             elif choice == '2':
                 filename = input("Save filename: ")
-                self.export_seed(filename)
+                self.command('x', filename)
             elif choice == '3':
                 filename = input("Load filename: ")
-                self.import_seed(filename)
+                self.command('i', filename)
             elif choice == '4':
                 return False
             else:
                 print("Invalid choice.")
 
+    def execute(self, cmd, arg=None):
+        # Applies one command from the [Space]/v/a/c/t/h/x/i set; `arg` carries
+        # the tick count or filename the interactive loop prompts for.
+        # Returns False when the session should end.
+        if cmd == 'q':
+            return False
+        elif cmd == ' ':
+            self.tick()
+        elif cmd == 'v':
+            if self.view == VIEW_2D:
+                self.view = VIEW_3D
+            elif self.view == VIEW_3D:
+                self.view = VIEW_FEED
+            else:
+                self.view = VIEW_2D
+        elif cmd == 'a':
+            try:
+                n = int(arg)
+                self.auto_run(n)
+            except (TypeError, ValueError):
+                self.add_log("Invalid number.")
+        elif cmd == 'c':
+            cx, cy = self.biome.w//2, self.biome.h//2
+            nearest = self.spatial.nearest(cx, cy, pred=lambda e: e.alive)
+            if nearest:
+                self.companion = nearest
+                self.add_log(f"Connected to {nearest.role} {nearest.uid}.")
+            else:
+                self.add_log("No entities alive.")
+        elif cmd == 't':
+            if self.companion:
+                res = self.companion.interact("joke", is_local=True)
+                self.add_log(f"You TALK to {self.companion.uid}. {res}")
+            else:
+                self.add_log("No companion connected.")
+        elif cmd == 'h':
+            if self.companion:
+                res = self.companion.interact("hug", is_local=True)
+                self.add_log(f"You HUG {self.companion.uid}. {res}")
+            else:
+                self.add_log("No companion connected.")
+        elif cmd == 'f':
+            # f toggles the profiler (and its stats view); f FILE dumps it
+            if arg:
+                if self.profiler:
+                    self.profiler.dump(arg)
+                    self.add_log(f"Profile written to {arg}.")
+                else:
+                    self.add_log("Profiler is off.")
+            elif self.profiler is None:
+                self.profiler = TickProfiler()
+                self.view = VIEW_STATS
+                self.add_log("Profiler on.")
+            else:
+                self.profiler = None
+                if self.view == VIEW_STATS:
+                    self.view = VIEW_2D
+                self.add_log("Profiler off.")
+        elif cmd == 'x':
+            self.export_seed(arg or None)
+        elif cmd == 'i':
+            if arg:
+                self.import_seed(arg)
+            else:
+                self.add_log("Import failed: no filename.")
+        else:
+            self.add_log("Unknown command.")
+        return True
+
+    def command(self, cmd, arg=None):
+        # execute() for commands typed at the prompt, which the recorder
+        # (if any) writes down with their tick.
+        if self.recorder is None:
+            return self.execute(cmd, arg)
+        self.recorder.command(cmd, arg)
+        running = self.execute(cmd, arg)
+        self.recorder.after()
+        return running
+
     def run(self):
         print("Welcome to the Dark Carnival RNG Ecology.")
         while True:
             self.render()
-            cmd = input().strip().lower()
-            if cmd == 'q':
-                break
-            elif cmd == ' ':
-                self.tick()
-            elif cmd == 'v':
-                if self.view == VIEW_2D:
-                    self.view = VIEW_3D
-                elif self.view == VIEW_3D:
-                    self.view = VIEW_FEED
-                else:
-                    self.view = VIEW_2D
-            elif cmd == 'a':
-                try:
-                    n = int(input("How many ticks to auto-run? "))
-                    self.auto_run(n)
-                except ValueError:
-                    self.add_log("Invalid number.")
-            elif cmd == 'm':
+            # input() strips nothing but the newline; a bare Enter (or the
+            # space the footer advertises) ticks once.
+            cmd = input().strip().lower() or ' '
+            arg = None
+            if cmd == 'm':
                 if not self.menu():
                     break
-            elif cmd == 'c':
-                cx, cy = MAP_W//2, MAP_H//2
-                alive = [e for e in self.entities if e.alive]
-                if alive:
-                    nearest = min(alive, key=lambda e: abs(e.x-cx)+abs(e.y-cy))
-                    self.companion = nearest
-                    self.add_log(f"Connected to {nearest.role} {nearest.uid}.")
-                else:
-                    self.add_log("No entities alive.")
-            elif cmd == 't':
-                if self.companion:
-                    res = self.companion.interact("joke", is_local=True)
-                    self.add_log(f"You TALK to {self.companion.uid}. {res}")
-                else:
-                    self.add_log("No companion connected.")
-            elif cmd == 'h':
-                if self.companion:
-                    res = self.companion.interact("hug", is_local=True)
-                    self.add_log(f"You HUG {self.companion.uid}. {res}")
-                else:
-                    self.add_log("No companion connected.")
-            elif cmd == 'x':
-                filename = input("Filename: ")
-                self.export_seed(filename)
-            elif cmd == 'i':
-                filename = input("Filename: ")
-                self.import_seed(filename)
-            else:
-                self.add_log("Unknown command.")
+                if self.renderer is not None:
+                    self.renderer.invalidate()
+                continue
+            elif cmd == 'a':
+                arg = input("How many ticks to auto-run? ")
+            elif cmd in ('x', 'i'):
+                arg = input("Filename: ")
+            if not self.command(cmd, arg):
+                break
+
+# ==========================================
+# ASYNC DRIVER
+# ==========================================
+# Runs the simulation at a fixed ticks/sec, reads commands without blocking
+# and redraws at its own frame rate, all on one asyncio loop. Commands are
+# whole lines: the usual keys plus an argument ("a 500", "x world.seedb"),
+# and p (pause/resume), + / - (speed), s (stop an auto-run). Auto-runs are
+# background tasks that yield to the loop between batches, so input and
+# rendering keep going and the run can be cancelled. With render=False and
+# interactive=False it only paces ticks, for soak tests.
+class AsyncDriver:
+    AUTO_SLICE = 0.01  # seconds of ticking between yields during an auto-run
+    AUTO_FAST_STEP = 100  # ticks per fast_forward call in long auto-runs
+
+    def __init__(self, engine, tps=10.0, fps=RENDER_FPS, render=True, interactive=True):
+        self.engine = engine
+        self.tps = tps
+        self.fps = fps
+        self.render = render
+        self.interactive = interactive
+        self.paused = False
+        self.auto_task = None
+        self.auto_progress = (0, 0)
+        self.ticks = 0
+        self.late_ticks = 0
+        self.stop = None
+
+    def run(self, ticks=None):
+        return asyncio.run(self.main(ticks))
+
+    async def main(self, ticks=None):
+        self.stop = asyncio.Event()
+        start = time.perf_counter()
+        tasks = [asyncio.create_task(self._sim(ticks))]
+        if self.render:
+            if self.engine.renderer is None:
+                self.engine.renderer = TerminalRenderer(fps=self.fps, keep_cursor=self.interactive)
+            tasks.append(asyncio.create_task(self._render()))
+        reader = self._start_input() if self.interactive else None
+        try:
+            await self.stop.wait()
+        finally:
+            if reader is not None:
+                reader()
+            for task in tasks + ([self.auto_task] if self.auto_task else []):
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        elapsed = time.perf_counter() - start
+        if self.render:
+            self.engine.renderer.draw(self._frame())
+            print()
+        return {"ticks": self.ticks, "elapsed": elapsed,
+                "ticks_per_sec": self.ticks / elapsed if elapsed > 0 else 0.0,
+                "target_tps": self.tps, "late_ticks": self.late_ticks}
+
+    async def _sim(self, limit):
+        loop = asyncio.get_running_loop()
+        next_t = loop.time()
+        while limit is None or self.ticks < limit:
+            if self.paused or not self.tps or (self.auto_task and not self.auto_task.done()):
+                await asyncio.sleep(0.05)
+                next_t = loop.time()
+                continue
+            self.engine.tick()
+            self.ticks += 1
+            next_t += 1.0 / self.tps
+            delay = next_t - loop.time()
+            if delay < 0:
+                self.late_ticks += 1
+                if delay < -1.0:
+                    next_t = loop.time()  # too far behind: drop the backlog
+            await asyncio.sleep(max(0.0, delay))
+        self.stop.set()
+
+    async def _render(self):
+        while True:
+            self.engine.renderer.draw(self._frame())
+            await asyncio.sleep(1.0 / self.fps if self.fps else 0.05)
+
+    def _frame(self):
+        lines = self.engine.frame()
+        status = f":: ASYNC :: {'PAUSED' if self.paused else f'{self.tps:g} tps'}"
+        if self.auto_task and not self.auto_task.done():
+            done, total = self.auto_progress
+            status += f" :: AUTO-RUN {done}/{total} (s to stop)"
+        lines.insert(-1, status + " :: p pause | +/- speed | a N | x/i FILE")
+        return lines
+
+    def _start_input(self):
+        # Line-buffered stdin without blocking the loop: a reader callback
+        # where the platform supports one, otherwise a daemon thread.
+        loop = asyncio.get_running_loop()
+        def on_line(line):
+            if line == "":
+                self.stop.set()
+                return
+            if not self.handle(line):
+                self.stop.set()
+        try:
+            loop.add_reader(sys.stdin, lambda: on_line(sys.stdin.readline()))
+            return lambda: loop.remove_reader(sys.stdin)
+        except (NotImplementedError, ValueError, OSError, AttributeError):
+            def pump():
+                while True:
+                    line = sys.stdin.readline()
+                    loop.call_soon_threadsafe(on_line, line)
+                    if line == "":
+                        return
+            threading.Thread(target=pump, daemon=True).start()
+            return None
+
+    def handle(self, line):
+        cmd, _, arg = line.strip().partition(" ")
+        cmd = cmd.lower() or ' '
+        arg = arg.strip() or None
+        if self.engine.renderer is not None:
+            self.engine.renderer.invalidate()
+        if cmd == 'p':
+            self.paused = not self.paused
+        elif cmd == '+':
+            self.tps = (self.tps or 1.0) * 2
+        elif cmd == '-':
+            self.tps = max(0.5, self.tps / 2)
+        elif cmd == 's':
+            if self.auto_task and not self.auto_task.done():
+                self.auto_task.cancel()
+        elif cmd == 'a':
+            try:
+                self.start_auto_run(int(arg))
+            except (TypeError, ValueError):
+                self.engine.add_log("Invalid number.")
+        elif cmd == 'm':
+            self.engine.add_log("No menu in async mode: use x FILE / i FILE / q.")
+        else:
+            return self.engine.execute(cmd, arg)
+        return True
+
+    def start_auto_run(self, n):
+        if self.auto_task and not self.auto_task.done():
+            self.auto_task.cancel()
+        self.auto_task = asyncio.get_running_loop().create_task(self._auto_run(n))
+        return self.auto_task
+
+    async def _auto_run(self, n):
+        done = 0
+        self.auto_progress = (0, n)
+        try:
+            while done < n:
+                deadline = time.perf_counter() + self.AUTO_SLICE
+                while done < n and time.perf_counter() < deadline:
+                    if n > AUTO_RUN_FAST:
+                        step = min(n - done, self.AUTO_FAST_STEP)
+                        self.engine.fast_forward(step)
+                    else:
+                        step = 1
+                        self.engine.tick()
+                    done += step
+                self.auto_progress = (done, n)
+                await asyncio.sleep(0)
+            self.engine.add_log(f"Auto-ran {n} ticks.")
+        except asyncio.CancelledError:
+            self.engine.add_log(f"Auto-run stopped at {done}/{n} ticks.")
+            raise
+
+# ==========================================
+# HEADLESS
+# ==========================================
+def run_headless(ticks, w=MAP_W, h=MAP_H, population=20, strain=None, snapshot=None, seed=None,
+                 autosaver=None, journal=None, tps=None, profiler=None, fast=False,
+                 terrain_cache=None):
+    # Batch simulation with no rendering and no input; returns the final
+    # summary plus throughput. Safe to call from other code.
+    game = GameEngine(w, h, population, strain, headless=True, seed=seed, terrain_cache=terrain_cache)
+    game.autosaver = autosaver
+    game.journal = journal
+    game.profiler = profiler
+    start = time.perf_counter()
+    if tps:
+        # paced soak run: hold the tick rate at `tps` instead of flat out
+        paced = AsyncDriver(game, tps, render=False, interactive=False).run(ticks)
+    elif fast:
+        jumped = game.fast_forward(ticks)
+    else:
+        for _ in range(ticks):
+            game.tick()
+    elapsed = time.perf_counter() - start
+    if autosaver is not None:
+        autosaver.close()
+    if journal is not None:
+        journal.close()
+    result = game.summary()
+    result["elapsed"] = elapsed
+    result["ticks_per_sec"] = ticks / elapsed if elapsed > 0 else float("inf")
+    if tps:
+        result["target_tps"] = tps
+        result["late_ticks"] = paced["late_ticks"]
+    elif fast:
+        result["jumped"] = jumped
+    if autosaver is not None:
+        result["autosave"] = autosaver.report()
+    if journal is not None:
+        result["journal"] = journal.report()
+    if profiler is not None:
+        result["profile"] = profiler.stats()
+    if snapshot:
+        game.export_seed(snapshot)
+        result["snapshot"] = snapshot
+    return result
+
+# ==========================================
+# COMMAND LINE
+# ==========================================
+def convert_seed(source, dest, fmt=None):
+    # Re-encode a seed file between the binary and JSON formats.
+    game = GameEngine(population=0, headless=True)
+    game.import_seed(source, mutate=False)
+    if game.log[-1].startswith("Import failed"):
+        return False, game.log[-1]
+    game.export_seed(dest, fmt)
+    return not game.log[-1].startswith("Export failed"), game.log[-1]
+
+def _parse_size(text):
+    w, _, h = text.lower().partition("x")
+    return int(w), int(h)
+
+def _add_autosave_args(p):
+    p.add_argument("--autosave-dir", default=None, help="autosave into this directory")
+    p.add_argument("--autosave-every", type=int, default=500, help="ticks between autosaves")
+    p.add_argument("--autosave-keep", type=int, default=3, help="number of autosaves to keep")
+
+def _add_journal_args(p):
+    p.add_argument("--journal-dir", default=None, help="write delta checkpoints into this directory")
+    p.add_argument("--journal-every", type=int, default=100, help="ticks between checkpoints")
+    p.add_argument("--journal-base-every", type=int, default=20, help="checkpoints between full bases")
+
+def _journal(args):
+    from persistence import CheckpointJournal
+    if not getattr(args, "journal_dir", None):
+        return None
+    return CheckpointJournal(args.journal_dir, args.journal_every, args.journal_base_every)
+
+def _add_profile_args(p):
+    p.add_argument("--profile", default=None, metavar="FILE",
+                   help="record per-phase tick timings and dump them as JSON to FILE")
+    p.add_argument("--profile-window", type=int, default=512, help="ticks kept in the profiler ring")
+
+def _profiler(args):
+    if not getattr(args, "profile", None):
+        return None
+    return TickProfiler(args.profile_window)
+
+def _autosaver(args):
+    from persistence import Autosaver
+    if not getattr(args, "autosave_dir", None):
+        return None
+    return Autosaver(args.autosave_dir, args.autosave_every, args.autosave_keep)
+
+def main(argv=None):
+    from bench import (_bench_key, benchmark_parallel, benchmark_renderers, benchmark_suite,
+                       compare_benchmarks, fast_forward_envelope, parallel_envelope)
+    from parallel import run_parallel, sweep_role_chances
+    from persistence import TRACE_CHECK_EVERY, SessionRecorder, journal_ticks, load_checkpoint, replay
+    from server import load_test, serve
+    parser = argparse.ArgumentParser(description="Dark Carnival RNG Ecology")
+    sub = parser.add_subparsers(dest="command")
+    p = sub.add_parser("play", help="interactive game (default)")
+    p.add_argument("--fps", type=float, default=RENDER_FPS, help="redraw cap (0 = unlimited)")
+    p.add_argument("--async", dest="use_async", action="store_true",
+                   help="keep ticking in real time while reading commands")
+    p.add_argument("--tps", type=float, default=10.0, help="ticks per second in --async mode")
+    p.add_argument("--seed", type=int, default=None, help="engine seed (default: random)")
+    p.add_argument("--record", default=None, metavar="TRACE",
+                   help="write the seed and every command to this trace (see replay)")
+    p.add_argument("--record-every", type=int, default=TRACE_CHECK_EVERY,
+                   help="ticks between state hashes in the trace")
+    _add_autosave_args(p)
+    _add_journal_args(p)
+    _add_profile_args(p)
+    p = sub.add_parser("headless", help="run a batch simulation without rendering")
+    p.add_argument("--ticks", type=int, default=1000)
+    p.add_argument("--size", type=_parse_size, default=(MAP_W, MAP_H), help="WxH, e.g. 200x100")
+    p.add_argument("--population", type=int, default=20)
+    p.add_argument("--strain", default=None, help="seed strain name")
+    p.add_argument("--terrain-cache", default=None, metavar="DIR",
+                   help=f"keep big maps' terrain in DIR (default: ${TERRAIN_CACHE_ENV}, else off)")
+    p.add_argument("--snapshot", default=None, help="export the final world to this seed file")
+    p.add_argument("--seed", type=int, default=None)
+    p.add_argument("--tps", type=float, default=None, help="pace the run at this many ticks/sec")
+    p.add_argument("--fast", action="store_true", help="jump over idle stretches (fast_forward)")
+    p.add_argument("--fast-check", type=int, default=None, metavar="WORLDS",
+                   help="compare --fast against plain ticking over WORLDS seeded worlds")
+    p.add_argument("--json", action="store_true", help="print the summary as JSON")
+    _add_autosave_args(p)
+    _add_journal_args(p)
+    _add_profile_args(p)
+    p = sub.add_parser("ensemble", help="run many seeded worlds across a process pool")
+    p.add_argument("--worlds", type=int, default=8)
+    p.add_argument("--ticks", type=int, default=500)
+    p.add_argument("--size", type=_parse_size, default=(MAP_W, MAP_H), help="WxH, e.g. 200x100")
+    p.add_argument("--population", type=int, default=20)
+    p.add_argument("--seed", type=int, default=None, help="master seed for the whole ensemble")
+    p.add_argument("--workers", type=int, default=None, help="pool size (default: all cores)")
+    p.add_argument("--sample-every", type=int, default=10)
+    p.add_argument("--role-chances", action="append", type=json.loads, default=None,
+                   help="JSON role -> chance map; repeat to sweep several configurations")
+    p.add_argument("--runs", action="store_true", help="include per-world results in the output")
+    p = sub.add_parser("parallel", help="run one world split into strips across worker processes")
+    p.add_argument("--ticks", type=int, default=1000)
+    p.add_argument("--size", type=_parse_size, default=(400, 200), help="WxH, e.g. 400x200")
+    p.add_argument("--population", type=int, default=50000)
+    p.add_argument("--seed", type=int, default=None)
+    p.add_argument("--workers", type=int, default=None, help="strips / processes (default: all cores)")
+    p.add_argument("--scaling", action="store_true",
+                   help="time ticks with 1..workers strips against one process instead")
+    p.add_argument("--envelope", type=int, default=None, metavar="WORLDS",
+                   help="check WORLDS seeded worlds against single-process runs instead")
+    p.add_argument("--json", action="store_true", help="print the result as JSON")
+    p = sub.add_parser("convert", help="convert a seed file between binary and JSON")
+    p.add_argument("source")
+    p.add_argument("dest", help="*.seed / *.json is written as JSON, anything else as binary")
+    p = sub.add_parser("bench-render", help="compare full-repaint and differential rendering")
+    p.add_argument("--frames", type=int, default=200)
+    p.add_argument("--size", type=_parse_size, default=(MAP_W, MAP_H), help="WxH, e.g. 200x100")
+    p.add_argument("--population", type=int, default=200)
+    p.add_argument("--shell-clear", action="store_true", help="include the old clear/cls fork in 'full'")
+    p = sub.add_parser("bench", help="time the hot paths over map sizes and entity counts")
+    p.add_argument("--sizes", default="40x20,200x100", help="comma-separated WxH list")
+    p.add_argument("--entities", default="20,1000", help="comma-separated entity counts")
+    p.add_argument("--startup-sizes", default="1024x1024", help="comma-separated WxH list for engine.startup")
+    p.add_argument("--traces", default="", help="comma-separated recorded traces to replay as workloads")
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--only", default=None, help="comma-separated case prefixes, e.g. engine.tick,render")
+    p.add_argument("--out", default=None, help="write the results as JSON to this file")
+    p.add_argument("--baseline", default=None, help="results JSON to compare against")
+    p.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before flagging")
+    p = sub.add_parser("serve", help="host many headless worlds over a local socket")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=7777)
+    p.add_argument("--unix", default=None, metavar="PATH", help="listen on a Unix socket instead")
+    p.add_argument("--dir", default=None, help="directory for export / import (default: cwd)")
+    p.add_argument("--size", type=_parse_size, default=(MAP_W, MAP_H), help="default WxH of new worlds")
+    p.add_argument("--population", type=int, default=20, help="default population of new worlds")
+    p = sub.add_parser("load-test", help="measure how many worlds one server core sustains")
+    p.add_argument("--worlds", default="1,4,16,64", help="comma-separated world counts to sweep")
+    p.add_argument("--duration", type=float, default=5.0, help="seconds per world count")
+    p.add_argument("--tps", type=float, default=None,
+                   help="tick every world in real time at this rate (default: tick back to back)")
+    p.add_argument("--size", type=_parse_size, default=(MAP_W, MAP_H), help="WxH, e.g. 200x100")
+    p.add_argument("--population", type=int, default=20)
+    p.add_argument("--connect", default=None, metavar="HOST:PORT|PATH",
+                   help="test a running server instead of starting one")
+    p.add_argument("--json", action="store_true", help="print the results as JSON")
+    p = sub.add_parser("replay", help="re-run recorded sessions headless and check their state hashes")
+    p.add_argument("traces", nargs="+")
+    p.add_argument("--no-check", action="store_true", help="skip the state hashes")
+    p.add_argument("--scalar", action="store_true",
+                   help="walk Entity.update instead of the kernels (diverges; compare the summaries)")
+    p.add_argument("--json", action="store_true", help="print the results as JSON")
+    p = sub.add_parser("checkout", help="rebuild the world at a journaled tick")
+    p.add_argument("journal_dir")
+    p.add_argument("tick", type=int, nargs="?", help="checkpointed tick (omit to list them)")
+    p.add_argument("dest", nargs="?", help="seed file to write (default: <strain>-<tick>.seedb)")
+    args = parser.parse_args(argv)
+    if getattr(args, "record", None) and args.use_async:
+        # real-time ticks are not commands, so the trace would miss them
+        parser.error("--record needs the turn-based loop (drop --async)")
+
+    if args.command == "headless":
+        w, h = args.size
+        if args.fast_check:
+            result = fast_forward_envelope(args.fast_check, args.ticks, w, h, args.population, args.seed or 0)
+            lines = [f":: JUMPED: {result['jumped']:.1%} of ticks :: SPEEDUP: {result['speedup']:.1f}x"]
+            lines += [f"{name:12s} {r['ticked']:12.4f} {r['fast']:12.4f}  +-{r['stderr']:.4f}"
+                      f"{'' if r['ok'] else '  OUTSIDE'}" for name, r in result["stats"].items()]
+            print(json.dumps(result) if args.json else "\n".join(lines))
+            return 0 if result["ok"] else 1
+        profiler = _profiler(args)
+        result = run_headless(args.ticks, w, h, args.population, args.strain, args.snapshot, args.seed,
+                              _autosaver(args), _journal(args), args.tps, profiler, args.fast,
+                              args.terrain_cache)
+        if profiler is not None:
+            profiler.dump(args.profile)
+        if args.json:
+            print(json.dumps(result))
+        else:
+            print(f":: STRAIN: {result['strain']} :: MAP: {w}x{h} :: TICKS: {result['tick']}")
+            print(f":: {result['ticks_per_sec']:.1f} ticks/sec ({result['elapsed']:.2f}s)")
+            if "jumped" in result:
+                print(f":: JUMPED: {result['jumped']} idle ticks")
+            print(f":: ENTITIES: {result['entities']} :: MEAN ENERGY: {result['mean_energy']:.1f}"
+                  f" :: TREASURES: {result['treasures']} :: RESONANCE: {result['resonance']:.2f}")
+            for role, count in sorted(result["roles"].items()):
+                print(f"  {role}: {count}")
+            if args.snapshot:
+                print(f":: SNAPSHOT: {args.snapshot}")
+            if "journal" in result:
+                report = result["journal"]
+                print(f":: CHECKPOINTS: {report['checkpoints']} ({report['bases']} base) :: "
+                      f"{report['bytes_written'] / 2**20:.1f} MB written")
+            if "autosave" in result:
+                report = result["autosave"]
+                print(f":: AUTOSAVES: {report['saves']} (skipped {report['skipped']}) :: "
+                      f"MAX PAUSE: {report['max_pause_ms']:.1f} ms :: MEAN WRITE: {report['mean_write_ms']:.0f} ms")
+            if profiler is not None:
+                print("\n".join(profiler.lines()))
+                print(f":: PROFILE: {args.profile}")
+        return 0
+
+    if args.command == "ensemble":
+        w, h = args.size
+        results = sweep_role_chances(args.role_chances or [None], args.worlds, args.ticks,
+                                     w=w, h=h, population=args.population, seed=args.seed,
+                                     workers=args.workers, sample_every=args.sample_every)
+        if not args.runs:
+            for result in results:
+                del result["runs"]
+        print(json.dumps(results if len(results) > 1 else results[0], indent=2))
+        return 0
+
+    if args.command == "parallel":
+        w, h = args.size
+        if args.scaling:
+            result = benchmark_parallel(args.ticks, w, h, args.population, args.workers, args.seed or 0)
+            lines = [f"{'single' if r['strips'] == 0 else r['strips']:>6} {r['ms_per_tick']:10.2f} ms/tick"
+                     f" {r['speedup']:6.2f}x" for r in result["results"]]
+        elif args.envelope:
+            result = parallel_envelope(args.envelope, args.ticks, w, h, args.population,
+                                       args.workers or os.cpu_count() or 1, args.seed or 0)
+            lines = [f"{name:12s} {r['single']:12.4f} {r['parallel']:12.4f}  +-{r['stderr']:.4f}"
+                     f"{'' if r['ok'] else '  OUTSIDE'}" for name, r in result["stats"].items()]
+        else:
+            result = run_parallel(args.ticks, w, h, args.population, args.workers, args.seed)
+            lines = [f":: STRAIN: {result['strain']} :: MAP: {w}x{h} :: STRIPS: {result['strips']}"
+                     f" :: TICKS: {result['tick']}",
+                     f":: {result['ticks_per_sec']:.1f} ticks/sec ({result['elapsed']:.2f}s)",
+                     f":: ENTITIES: {result['entities']} :: MEAN ENERGY: {result['mean_energy']:.1f}"
+                     f" :: TREASURES: {result['treasures']}"]
+        print(json.dumps(result) if args.json else "\n".join(lines))
+        return 0 if result.get("ok", True) else 1
+
+    if args.command == "convert":
+        ok, msg = convert_seed(args.source, args.dest)
+        print(msg)
+        return 0 if ok else 1
+
+    if args.command == "bench-render":
+        w, h = args.size
+        results = benchmark_renderers(args.frames, w, h, args.population, shell_clear=args.shell_clear)
+        for name, r in results.items():
+            print(f"{name:10s} {r['bytes_per_frame']:10.0f} bytes/frame {r['ms_per_frame']:8.3f} ms/frame")
+        return 0
+
+    if args.command == "bench":
+        results = benchmark_suite(
+            sizes=[_parse_size(s) for s in args.sizes.split(",")],
+            counts=[int(n) for n in args.entities.split(",")],
+            startup_sizes=[_parse_size(s) for s in args.startup_sizes.split(",") if s],
+            traces=[t for t in args.traces.split(",") if t],
+            repeat=args.repeat,
+            only=args.only.split(",") if args.only else None,
+        )
+        if args.out:
+            with open(args.out, "w") as f:
+                json.dump(results, f, indent=1)
+        if not args.baseline:
+            for r in results["results"]:
+                flag = "  DIVERGED" if not r.get("ok", True) else ""
+                print(f"{_bench_key(r):60s} {r['best'] * 1000:10.3f} ms{flag}")
+            return 1 if any(not r.get("ok", True) for r in results["results"]) else 0
+        with open(args.baseline) as f:
+            rows = compare_benchmarks(results, json.load(f), args.tolerance)
+        for row in rows:
+            ratio = f"{row['ratio']:6.2f}x" if row["ratio"] is not None else "   new "
+            flag = "  DIVERGED" if row["diverged"] else "  REGRESSION" if row["regression"] else ""
+            print(f"{row['key']:60s} {row['best'] * 1000:10.3f} ms {ratio}{flag}")
+        return 1 if any(row["regression"] or row["diverged"] for row in rows) else 0
+
+    if args.command == "serve":
+        w, h = args.size
+        serve(args.host, args.port, args.unix, w, h, args.population, args.dir,
+              ready=lambda address: print(f":: SERVING ON {address}", flush=True))
+        return 0
+
+    if args.command == "load-test":
+        w, h = args.size
+        address = args.connect
+        if address and ":" in address:
+            host, _, port = address.rpartition(":")
+            address = (host, int(port))
+        results = [load_test(int(n), args.duration, args.tps, w, h, args.population, address)
+                   for n in args.worlds.split(",")]
+        if args.json:
+            print(json.dumps(results, indent=2))
+            return 0
+        for r in results:
+            kept = f" :: KEEPING UP: {r['keeping_up']}/{r['worlds']}" if "keeping_up" in r else ""
+            print(f"{r['worlds']:5d} worlds {r['ticks_per_sec']:10.1f} ticks/sec"
+                  f" (min {r['world_ticks_per_sec']['min']:.1f}/world)"
+                  f" :: LATENCY p50 {r['latency_ms']['p50']:.2f} p95 {r['latency_ms']['p95']:.2f}"
+                  f" max {r['latency_ms']['max']:.2f} ms{kept}")
+        return 0
+
+    if args.command == "replay":
+        results = [replay(path, not args.no_check, False if args.scalar else None) for path in args.traces]
+        if args.json:
+            print(json.dumps(results if len(results) > 1 else results[0], indent=2))
+        else:
+            for r in results:
+                state = ("unchecked" if not r["checks"] else "ok" if r["ok"] else f"DIVERGED by tick {r['diverged']}")
+                print(f":: {r['trace']} :: {r['ticks']} ticks, {r['commands']} commands"
+                      f" :: {r['ticks_per_sec']:.1f} ticks/sec ({r['elapsed']:.2f}s) :: {state}")
+        return 0 if all(r["ok"] for r in results) else 1
+
+    if args.command == "checkout":
+        if args.tick is None:
+            print(" ".join(str(t) for t in journal_ticks(args.journal_dir)))
+            return 0
+        snap = load_checkpoint(args.journal_dir, args.tick)
+        dest = args.dest or f"{snap['strain']}-{snap['tick']:08d}.seedb"
+        game = GameEngine(population=0, headless=True)
+        game.restore(snap)
+        game.export_seed(dest)
+        print(game.log[-1])
+        return 0
+
+    game = GameEngine(seed=getattr(args, "seed", None))
+    game.fps = getattr(args, "fps", RENDER_FPS)
+    game.autosaver = _autosaver(args)
+    game.journal = _journal(args)
+    game.profiler = _profiler(args)
+    if getattr(args, "record", None):
+        game.recorder = SessionRecorder(args.record, game, args.record_every)
+    if getattr(args, "use_async", False):
+        AsyncDriver(game, args.tps, game.fps).run()
+    else:
+        game.run()
+    if game.profiler is not None and getattr(args, "profile", None):
+        game.profiler.dump(args.profile)
+    for writer in (game.autosaver, game.journal, game.recorder):
+        if writer is not None:
+            writer.close()
+    return 0
 
 if __name__ == "__main__":
-    game = GameEngine()
-    game.run()
-```
+    # Run through the importable module, so the other modules share its classes.
+    import V3_carnival
+    sys.exit(V3_carnival.main())
@@ -0,0 +1,350 @@
+# DARK CARNIVAL RNG ECOLOGY - benchmarks
+# The benchmark suite, the one-off timings and the statistical envelopes
+# that check the fast paths against the plain ones.
+
+import random
+import math
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import deque
+
+import numpy as np
+
+from V3_carnival import (BIOME_FIELDS, BIRTH_CHANCE, BIRTH_ENERGY, MAP_H, MAP_W, REGION_SIZE, ROLE_CHANCES,
+                         STANCE_DORMANT, STANCE_SEEK, STANCE_SOCIAL, VIEW_2D, VIEW_3D, VIEW_FEED, Biome,
+                         ConsentKanban, Entity, EntityStore, FullRenderer, GameEngine, TerminalRenderer,
+                         social_phase)
+from parallel import ParallelWorld
+from persistence import replay
+
+# ==========================================
+# BENCHMARKS
+# ==========================================
+# Hot-path timings over map sizes and entity counts. Each case is run
+# enough times per repeat to take ~BENCH_MIN_TIME, and the best repeat is
+# kept. Results are plain dicts (JSON-ready); compare_benchmarks() flags
+# cases that got slower than a stored baseline by more than a tolerance.
+BENCH_MIN_TIME = 0.05
+
+def _bench_key(result):
+    params = ",".join(f"{k}={v}" for k, v in sorted(result["params"].items()))
+    return f"{result['case']}[{params}]"
+
+class _Bench:
+    def __init__(self, repeat, only):
+        self.repeat = repeat
+        self.only = only
+        self.results = []
+
+    def wanted(self, case):
+        return not self.only or any(case.startswith(prefix) for prefix in self.only)
+
+    def record(self, case, params, fn, setup=None):
+        if not self.wanted(case):
+            return
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        once = time.perf_counter() - start
+        number = max(1, min(1000, int(BENCH_MIN_TIME / once) if once > 0 else 1000))
+        times = []
+        for _ in range(self.repeat):
+            if setup:
+                setup()
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            times.append((time.perf_counter() - start) / number)
+        self.results.append({"case": case, "params": params, "best": min(times),
+                             "mean": sum(times) / len(times), "number": number,
+                             "repeat": self.repeat})
+
+def benchmark_suite(sizes=((40, 20), (200, 100)), counts=(20, 1000), repeat=3, only=None, seed=0,
+                    startup_sizes=((1024, 1024),), traces=()):
+    bench = _Bench(repeat, only)
+    tmp = tempfile.mkdtemp(prefix="carnival-bench-")
+    try:
+        for path in traces:
+            # Recorded sessions: timed without the hashes, after one checked
+            # replay; a trace that no longer replays exactly is marked.
+            if bench.wanted("replay"):
+                checked = replay(path)
+                bench.record("replay", {"trace": os.path.basename(path)}, lambda: replay(path, check=False))
+                bench.results[-1]["ok"] = checked["ok"]
+        for w, h in startup_sizes:
+            # Engine start-up on a big map: terrain generated from scratch,
+            # and mapped from the terrain cache (warmed by the first run).
+            for label, cache in (("generate", False), ("cached", tmp)):
+                bench.record("engine.startup", {"size": f"{w}x{h}", "terrain": label},
+                             lambda: GameEngine(w, h, 20, "BENCH", headless=True, seed=seed,
+                                                terrain_cache=cache))
+        for w, h in sizes:
+            size = f"{w}x{h}"
+            bench.record("biome.init", {"size": size}, lambda: Biome(w, h, random.Random(seed)))
+            biome = Biome(w, h, random.Random(seed))
+            bench.record("biome.tick", {"size": size}, biome.tick)
+            for n in counts:
+                params = {"size": size, "entities": n}
+                game = GameEngine(w, h, n, headless=True, seed=seed, terrain_cache=False)
+                snap = game.snapshot(copy=True)
+                reset = lambda: game.restore(snap)
+                bench.record("engine.tick", params, game.tick, reset)
+                # steady churn: ~2% of the population dies and ~2% is born each tick
+                def churn():
+                    slots = game.store.alive_slots()
+                    game.store.energy[slots[game.np_rng.random(len(slots)) < 0.02]] = 0
+                    game.tick()
+                game.birth_energy, game.birth_chance = 0, 0.02
+                bench.record("engine.churn", params, churn, reset)
+                game.birth_energy, game.birth_chance = BIRTH_ENERGY, BIRTH_CHANCE
+                for batched in (False, True):
+                    def entities(batched=batched):
+                        game.batched = batched
+                        game._tick_entities()
+                    bench.record("entities.batched" if batched else "entities.scalar", params, entities, reset)
+                game.batched = True
+                regions = -(-w // REGION_SIZE) * -(-h // REGION_SIZE)
+                for label, chance in (("one", 1.0 / regions), ("all", 1.0)):
+                    bench.record("events.regional", dict(params, fired=label),
+                                 lambda: game.trigger_regional_events(chance), reset)
+                bench.record("render.2d", params, game.frame_2d, reset)
+                bench.record("render.3d", params, game.frame_3d, reset)
+                for fmt, ext in (("binary", ".seedb"), ("json", ".seed")):
+                    path = os.path.join(tmp, f"bench-{w}x{h}-{n}{ext}")
+                    bench.record(f"seed.export.{fmt}", params, lambda: game.export_seed(path), reset)
+                    bench.record(f"seed.import.{fmt}", params, lambda: game.import_seed(path))
+                for role in ROLE_CHANCES:
+                    def assign(role=role):
+                        game.restore(snap)
+                        for e in game.entities:
+                            e.role = role
+                    def update():
+                        for e in game.entities:
+                            e.update(game.biome, game)
+                    bench.record("entity.update", dict(params, role=role), update, assign)
+        for n in counts:
+            # Pursuit at a fixed density of one entity per 8 cells, half of
+            # them predators: near-linear means time per entity stays flat.
+            h = max(8, int(math.sqrt(4 * n)))
+            w = 2 * h
+            game = GameEngine(w, h, n, headless=True, seed=seed, terrain_cache=False)
+            for i, e in enumerate(game.entities):
+                e.role = "PREDATOR" if i % 2 else "NORMAL"
+            snap = game.snapshot(copy=True)
+            bench.record("entities.pursuit", {"size": f"{w}x{h}", "entities": n},
+                         game._tick_entities, lambda: game.restore(snap))
+            # the social phase with everyone SOCIAL (~SOCIAL_PEERS interactions each)
+            for e in game.entities:
+                e.stance = STANCE_SOCIAL
+            snap = game.snapshot(copy=True)
+            bench.record("entities.social", {"size": f"{w}x{h}", "entities": n},
+                         lambda: social_phase(game), lambda: game.restore(snap))
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return {"python": sys.version.split()[0], "numpy": np.__version__,
+            "platform": sys.platform, "results": bench.results}
+
+def compare_benchmarks(current, baseline, tolerance=0.2):
+    base = {_bench_key(r): r for r in baseline["results"]}
+    rows = []
+    for r in current["results"]:
+        key = _bench_key(r)
+        old = base.get(key)
+        ratio = r["best"] / old["best"] if old and old["best"] > 0 else None
+        rows.append({"key": key, "best": r["best"], "baseline": old["best"] if old else None,
+                     "ratio": ratio, "regression": ratio is not None and ratio > 1 + tolerance,
+                     "diverged": not r.get("ok", True)})
+    return rows
+
+# Stand-in for the pre-store Entity layout, used by entity_memory_report.
+class _LegacyEntity:
+    pass
+
+def entity_memory_report(n=10000):
+    # Bytes per entity as measured by tracemalloc: the old one-object-per-
+    # entity layout, the store with a view per entity, and the bare columns.
+    def legacy(uid):
+        e = _LegacyEntity()
+        e.uid, e.x, e.y, e.role = uid, 0, 0, "NORMAL"
+        e.energy, e.alive = 60.0, True
+        e.bravery, e.curiosity = random.uniform(0.3, 0.7), random.uniform(0.3, 0.7)
+        e.treasures = 0
+        e.consent_kanban = ConsentKanban()
+        e.stance = STANCE_DORMANT
+        e.memories = deque(maxlen=5)
+        e.long_term_memory = []
+        e.genes = {'aggression': random.random(), 'curiosity': e.curiosity,
+                   'social': random.random(), 'religiosity': random.random()}
+        e.foresight_count = 0
+        e.belief = 0.0
+        return e
+
+    def measure(build):
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        keep = build()
+        used = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        del keep
+        return used / n
+
+    def store_only():
+        store = EntityStore(n)
+        for i in range(n):
+            Entity(i, 0, 0, "NORMAL", store)
+        return store
+
+    def store_views():
+        store = store_only()
+        return store, [store.view(i) for i in range(n)]
+
+    return {
+        "entities": n,
+        "legacy_objects": measure(lambda: [legacy(i) for i in range(n)]),
+        "store_with_views": measure(store_views),
+        "store_columns": measure(store_only),
+    }
+
+class _CountingSink:
+    def __init__(self):
+        self.n = 0
+
+    def write(self, data):
+        self.n += len(data)
+
+    def flush(self):
+        pass
+
+def benchmark_renderers(frames=200, w=MAP_W, h=MAP_H, population=200, seed=0, shell_clear=False):
+    # Bytes written and wall time per frame for the full-repaint renderer
+    # versus the differential one, ticking the world once per frame.
+    results = {}
+    for view, name in ((VIEW_2D, "2D"), (VIEW_3D, "3D"), (VIEW_FEED, "FEED")):
+        for kind in ("full", "diff"):
+            game = GameEngine(w, h, population, headless=True, seed=seed, terrain_cache=False)
+            game.view = view
+            for e in game.entities[::2]:
+                e.stance = STANCE_SEEK
+            sink = _CountingSink()
+            renderer = (FullRenderer(sink, 0, shell_clear) if kind == "full" else TerminalRenderer(sink, 0))
+            spent = 0.0
+            for _ in range(frames):
+                game.tick()
+                lines = game.frame()
+                start = time.perf_counter()
+                renderer.draw(lines)
+                spent += time.perf_counter() - start
+            results[f"{name}/{kind}"] = {
+                "bytes_per_frame": renderer.bytes_written / frames,
+                "ms_per_frame": 1000 * spent / frames,
+            }
+    return results
+
+def benchmark_parallel(ticks=50, w=400, h=200, population=50000, workers=None, seed=0):
+    # ms/tick of one GameEngine and of a ParallelWorld over 1..workers
+    # strips (default: every core), same starting world each time.
+    rows = []
+    game = GameEngine(w, h, population, headless=True, seed=seed, terrain_cache=False)
+    snap = game.snapshot(copy=True)
+    start = time.perf_counter()
+    for _ in range(ticks):
+        game.tick()
+    single = (time.perf_counter() - start) / ticks
+    rows.append({"strips": 0, "ms_per_tick": single * 1000, "speedup": 1.0})
+    for n in range(1, (workers or os.cpu_count() or 1) + 1):
+        game = GameEngine(1, 1, 0, headless=True, seed=seed)
+        game.restore(snap)
+        with ParallelWorld(game, n) as world:
+            world.tick()  # warm up: first handoff of the whole population
+            start = time.perf_counter()
+            for _ in range(ticks):
+                world.tick()
+            per = (time.perf_counter() - start) / ticks
+        rows.append({"strips": n, "ms_per_tick": per * 1000, "speedup": single / per})
+    return {"map": [w, h], "population": population, "ticks": ticks, "cores": os.cpu_count(), "results": rows}
+
+# ==========================================
+# ENVELOPES
+# ==========================================
+# Seeded worlds run both on a fast path and on the plain tick loop, then
+# compared statistic by statistic over the worlds.
+FAST_ENVELOPE_STATS = ("entities", "mean_energy", "treasures", "foresight", "curiosity", "social")
+
+def fast_forward_envelope(worlds=40, ticks=5000, w=MAP_W, h=MAP_H, population=20, seed=0):
+    # Runs `worlds` seeded worlds both tick by tick and through
+    # fast_forward and compares the final summaries, a few entity traits and
+    # the biome means (see _envelope). Also reports how much was jumped.
+    seeds = [int(s.generate_state(1, np.uint64)[0]) for s in np.random.SeedSequence(seed).spawn(worlds)]
+    samples = {"ticked": [], "fast": []}
+    elapsed = {"ticked": 0.0, "fast": 0.0}
+    jumped = 0
+    for s in seeds:
+        for mode in samples:
+            game = GameEngine(w, h, population, headless=True, seed=s, terrain_cache=False)
+            start = time.perf_counter()
+            if mode == "ticked":
+                for _ in range(ticks):
+                    game.tick()
+            else:
+                jumped += game.fast_forward(ticks)
+            elapsed[mode] += time.perf_counter() - start
+            store = game.store
+            alive = store.alive_slots()
+            stances = store.labels["stance"]
+            stats = game.summary()
+            stats["foresight"] = int(store.foresight_count[alive].sum())
+            stats["curiosity"] = float(store.curiosity[alive].sum())
+            stats["social"] = int(np.count_nonzero(store.stance[alive] == stances.code(STANCE_SOCIAL)))
+            for name in BIOME_FIELDS:
+                stats[name] = float(getattr(game.biome, name).mean())
+            samples[mode].append(stats)
+    report = {"worlds": worlds, "ticks": ticks, "jumped": jumped / (worlds * ticks),
+              "speedup": elapsed["ticked"] / elapsed["fast"] if elapsed["fast"] else float("inf")}
+    report.update(_envelope(samples, FAST_ENVELOPE_STATS + BIOME_FIELDS))
+    return report
+
+ENVELOPE_STATS = ("entities", "mean_energy", "treasures")
+
+def parallel_envelope(worlds=6, ticks=200, w=200, h=100, population=2000, workers=4, seed=0):
+    # Runs `worlds` seeded worlds both as one GameEngine and as a
+    # ParallelWorld and compares the final summaries and biome means; a
+    # statistic passes if the two means are within 4 standard errors.
+    seeds = [int(s.generate_state(1, np.uint64)[0]) for s in np.random.SeedSequence(seed).spawn(worlds)]
+    samples = {"single": [], "parallel": []}
+    for s in seeds:
+        for mode in samples:
+            game = GameEngine(w, h, population, headless=True, seed=s, terrain_cache=False)
+            if mode == "single":
+                for _ in range(ticks):
+                    game.tick()
+            else:
+                with ParallelWorld(game, workers) as world:
+                    for _ in range(ticks):
+                        world.tick()
+                    game = world.gather()
+            stats = game.summary()
+            for name in BIOME_FIELDS:
+                stats[name] = float(getattr(game.biome, name).mean())
+            samples[mode].append(stats)
+    report = {"worlds": worlds, "ticks": ticks, "workers": workers}
+    report.update(_envelope(samples, ENVELOPE_STATS + BIOME_FIELDS))
+    return report
+
+def _envelope(samples, names):
+    # Compares the per-world stats of two modes ({mode: [stats, ...]}); a
+    # statistic passes if the two means are within 4 standard errors.
+    (ma, ra), (mb, rb) = samples.items()
+    report = {"stats": {}, "ok": True}
+    for name in names:
+        a = np.array([r[name] for r in ra], dtype=float)
+        b = np.array([r[name] for r in rb], dtype=float)
+        err = math.sqrt((a.var(ddof=1) + b.var(ddof=1)) / len(a)) if len(a) > 1 else 0.0
+        ok = bool(abs(a.mean() - b.mean()) <= 4 * err + 1e-9 * abs(a.mean()))
+        report["stats"][name] = {ma: float(a.mean()), mb: float(b.mean()), "stderr": err, "ok": ok}
+        report["ok"] &= ok
+    return report
@@ -0,0 +1,379 @@
+# DARK CARNIVAL RNG ECOLOGY - parallel runs
+# Ensembles of independent worlds across a process pool,
+# and one world split across worker processes.
+
+import random
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from V3_carnival import (BIOME_FIELDS, MAP_H, MAP_W, MAX_LOG, PREDATOR_SENSE, REGION_EVENT_CHANCE,
+                         ROLE_CHANCES, SEED_GRIDS, SOCIAL_RADIUS, SPIRAL_OUTCOMES, UID_SLOT_BITS, Biome,
+                         EntityStore, GameEngine, _Labels, _biome_step, _recode, birth_phase, interact_batch,
+                         roll_regions, roll_spiral_die, social_phase)
+
+# ==========================================
+# ENSEMBLE
+# ==========================================
+# Many independent worlds across a process pool. Each world gets its own
+# seed spawned from one master SeedSequence, so the ensemble is
+# reproducible and no two worlds share a stream.
+def _ensemble_world(job):
+    seed, ticks, w, h, population, role_chances, sample_every = job
+    game = GameEngine(w, h, population, headless=True, seed=seed, role_chances=role_chances)
+    survival = [len(game.entities)]
+    for t in range(1, ticks + 1):
+        game.tick()
+        if t % sample_every == 0:
+            survival.append(len(game.entities))
+    return {
+        "seed": seed,
+        "strain": game.seed_strain,
+        "survival": survival,
+        "treasures": int(game.store.treasures[:game.store.size].sum()),
+        "resonance": game.global_resonance,
+    }
+
+def _describe(values):
+    a = np.asarray(values, dtype=float)
+    return {"mean": float(a.mean()), "std": float(a.std()), "min": float(a.min()), "max": float(a.max())}
+
+def run_ensemble(worlds, ticks, w=MAP_W, h=MAP_H, population=20, role_chances=None,
+                 seed=None, workers=None, sample_every=10):
+    seeds = [int(s.generate_state(1, np.uint64)[0])
+             for s in np.random.SeedSequence(seed).spawn(worlds)]
+    jobs = [(s, ticks, w, h, population, role_chances, sample_every) for s in seeds]
+    if workers == 1:
+        results = [_ensemble_world(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_ensemble_world, jobs))
+    curves = np.array([r["survival"] for r in results], dtype=float)
+    return {
+        "worlds": worlds,
+        "ticks": ticks,
+        "role_chances": role_chances or ROLE_CHANCES,
+        "sample_ticks": [i * sample_every for i in range(curves.shape[1])],
+        "survival_mean": curves.mean(axis=0).tolist(),
+        "survival_std": curves.std(axis=0).tolist(),
+        "survivors": _describe(curves[:, -1]),
+        "treasures": _describe([r["treasures"] for r in results]),
+        "resonance": _describe([r["resonance"] for r in results]),
+        "runs": results,
+    }
+
+def sweep_role_chances(configs, worlds, ticks, **kwargs):
+    return [run_ensemble(worlds, ticks, role_chances=chances, **kwargs) for chances in configs]
+
+# ==========================================
+# PARALLEL WORLD
+# ==========================================
+# One world split across worker processes in vertical strips of columns.
+# The biome grids (altitude plus BIOME_FIELDS) live in one shared-memory
+# block: each worker steps only its own columns and reads the rest in
+# place, and since the rules are cell-local and entities only read the cell
+# they stand on, strips never wait on each other mid-tick. Each worker runs
+# a GameEngine over the entities in its strip. Before a tick it is handed
+# copies (ghosts) of every other strip's entities within PARALLEL_HALO
+# columns, so hunts and chats see across the seam; bites and interactions
+# that land on a ghost are mailed to its owner and applied at the start of
+# the next tick. After the tick, entities that walked out of a strip are
+# handed to the strip they walked into.
+#
+# A parallel world follows a different trajectory than one GameEngine but
+# should sit inside the same statistical envelope (parallel_envelope).
+PARALLEL_HALO = max(PREDATOR_SENSE, SOCIAL_RADIUS) + 1  # +1: social reads after a step
+STRIP_UID_BITS = UID_SLOT_BITS - 8  # uid_base of strip k is k << STRIP_UID_BITS
+
+def strip_bounds(w, n):
+    # Column ranges [x0, x1) of n strips of (nearly) equal width.
+    n = max(1, min(n, w))
+    cuts = [w * k // n for k in range(n + 1)]
+    return list(zip(cuts[:-1], cuts[1:]))
+
+class StripBiome(Biome):
+    # Biome over shared grids that only ticks the columns [x0, x1).
+    def __init__(self, grids, x0, x1, rng):
+        self.w, self.h = grids.shape[1:]
+        for name, grid in zip(SEED_GRIDS, grids):
+            setattr(self, name, grid)
+        self.x0 = x0
+        self.x1 = x1
+        self.rng = rng
+
+    def tick(self, occupied=None):
+        _biome_step(self.rng, *(getattr(self, name)[self.x0:self.x1] for name in BIOME_FIELDS))
+
+def _rows(columns, genes, pick):
+    return {name: col[pick] for name, col in columns.items()}, genes[pick]
+
+def _no_mail():
+    # Mail between strips, as parallel arrays: energy changes (uid, delta),
+    # interactions heard (uid, kind, local) and gemstones won (uid).
+    return (np.zeros(0, np.int64), np.zeros(0), np.zeros(0, np.int64),
+            np.zeros(0, np.int64), np.zeros(0, bool), np.zeros(0, np.int64))
+
+class _Strip:
+    # Worker side of a ParallelWorld: one GameEngine over one strip.
+    def __init__(self, spec, grids):
+        self.index = spec["index"]
+        self.x0, self.x1 = spec["bounds"]
+        game = GameEngine(1, 1, 0, headless=True, seed=spec["seed"])
+        game.biome = StripBiome(grids, self.x0, self.x1, np.random.default_rng(game.rng.getrandbits(64)))
+        game.seed_strain = spec["strain"]
+        game.global_resonance = spec["resonance"]
+        game.tick_count = spec["tick"]
+        game.log = deque()
+        game.store.labels = {name: _Labels(names) for name, names in spec["labels"].items()}
+        game.store.uid_base = self.index << STRIP_UID_BITS
+        self.game = game
+
+    def labels(self):
+        return {name: list(lab.names) for name, lab in self.game.store.labels.items()}
+
+    def _deliver(self, mail):
+        # Apply bites and interactions other strips made on our entities
+        # while they were ghosts there, and gemstones settled by the world;
+        # uids we no longer own are dropped.
+        store = self.game.store
+        own = store.active_slots()
+        order = np.argsort(store.uid[own])
+        uids = store.uid[own][order]
+        def find(wanted):
+            at = np.searchsorted(uids, wanted).clip(max=max(len(uids) - 1, 0))
+            hit = uids[at] == wanted if len(uids) else np.zeros(len(wanted), dtype=bool)
+            return own[order[at[hit]]], hit
+        bitten, delta, heard, kinds, local, gifted = mail
+        slots, hit = find(bitten)
+        np.add.at(store.energy, slots, delta[hit])
+        # killed across the seam last tick: gone before they can act again
+        dead = np.unique(slots[store.energy[slots] <= 0])
+        store.alive[dead] = False
+        for s in dead.tolist():
+            self.game.add_log(f"Entity {store.uid[s]} expired.")
+        slots, hit = find(heard)
+        interact_batch(store, slots, kinds[hit], local[hit])
+        slots, _ = find(gifted)
+        store.treasures[slots] += 1
+        store.energy[slots] += 10
+
+    def tick(self, immigrants, ghosts, mail, event, regional):
+        game = self.game
+        store = game.store
+        game.log.clear()
+        store.adopt(*immigrants)
+        self._deliver(mail)
+        shadows = store.adopt(*ghosts, ghost=True)
+        before = store.energy[shadows].copy()
+        game.tick_count += 1
+        game._tick_biome()
+        game._tick_entities()
+        social_phase(game)
+        if event is not None:
+            outcome, lucky = event
+            game.trigger_world_event(outcome, gem=lucky == self.index)
+            if self.index:
+                game.log.pop()  # strip 0 reports the world event
+        nominees = []
+        game.trigger_regional_events(rolled=regional, nominees=nominees)
+        game._compact()
+        birth_phase(game)
+        # mail what happened to the ghosts, then let them go
+        delta = store.energy[shadows] - before
+        hit = delta != 0
+        heard = store.ghost_mail or [_no_mail()[2:5]]
+        mail = (store.uid[shadows[hit]], delta[hit]) + tuple(np.concatenate(part) for part in zip(*heard))
+        store.ghost_mail = []
+        store.drop_ghosts()
+        # border entities go out as next tick's ghosts, leavers for good
+        own = store.active_slots()
+        x = store.x[own]
+        leaving = (x < self.x0) | (x >= self.x1)
+        border = leaving | (x < self.x0 + PARALLEL_HALO) | (x >= self.x1 - PARALLEL_HALO)
+        rows = own[border]
+        out = (store.columns(rows), store.genes[rows], leaving[border])
+        store.release(own[leaving])
+        game.spatial.defer(lambda: game.spatial.rebuild(game.entities, store.x, store.y))
+        return {"rows": out, "labels": self.labels(), "mail": mail, "log": list(game.log),
+                "nominees": nominees[0] if nominees else None,
+                "population": len(own) - int(np.count_nonzero(leaving))}
+
+    def gather(self):
+        store = self.game.store
+        own = store.active_slots()
+        return {"columns": store.columns(own), "genes": store.genes[own], "labels": self.labels()}
+
+def _strip_worker(conn, spec, shm):
+    grids = np.ndarray((len(SEED_GRIDS), spec["w"], spec["h"]), dtype=np.float64, buffer=shm.buf)
+    strip = _Strip(spec, grids)
+    try:
+        while True:
+            msg = conn.recv()
+            if msg[0] == "stop":
+                break
+            conn.send(getattr(strip, msg[0])(*msg[1:]))
+    finally:
+        strip = grids = None
+        shm.close()
+
+class ParallelWorld:
+    def __init__(self, game, workers=None):
+        # Split `game` (left untouched) into strips over `workers` processes.
+        w, h = game.biome.w, game.biome.h
+        self.w, self.h = w, h
+        self.bounds = strip_bounds(w, workers or os.cpu_count() or 1)
+        self.starts = np.array([x0 for x0, _ in self.bounds])
+        self.rng = random.Random(game.rng.getrandbits(64))
+        self.np_rng = np.random.default_rng(self.rng.getrandbits(64))
+        self.seed_strain = game.seed_strain
+        self.global_resonance = game.global_resonance
+        self.tick_count = game.tick_count
+        self.log = deque(maxlen=MAX_LOG)
+        self.labels = {name: _Labels(lab.names) for name, lab in game.store.labels.items()}
+        self.shm = shared_memory.SharedMemory(create=True, size=len(SEED_GRIDS) * w * h * 8)
+        self.grids = np.ndarray((len(SEED_GRIDS), w, h), dtype=np.float64, buffer=self.shm.buf)
+        for i, name in enumerate(SEED_GRIDS):
+            self.grids[i] = getattr(game.biome, name)
+        seeds = np.random.SeedSequence(self.rng.getrandbits(64)).spawn(len(self.bounds))
+        self.conns, self.procs = [], []
+        for k, bounds in enumerate(self.bounds):
+            spec = {"index": k, "bounds": bounds, "w": w, "h": h, "strain": self.seed_strain,
+                    "resonance": self.global_resonance, "tick": self.tick_count,
+                    "seed": int(seeds[k].generate_state(1, np.uint64)[0]),
+                    "labels": {name: list(lab.names) for name, lab in self.labels.items()}}
+            conn, child = multiprocessing.Pipe()
+            proc = multiprocessing.Process(target=_strip_worker, args=(child, spec, self.shm), daemon=True)
+            proc.start()
+            self.conns.append(conn)
+            self.procs.append(proc)
+        self.population = [0] * len(self.bounds)
+        self.mail = _no_mail()
+        # the starting population goes out as everyone's first immigrants
+        alive = game.store.alive_slots()
+        self._route(game.store.columns(alive), game.store.genes[alive], np.ones(len(alive), dtype=bool))
+
+    def __len__(self):
+        return sum(self.population)
+
+    def _route(self, columns, genes, leaving):
+        # Hand leavers to the strip they stand in; everyone within
+        # PARALLEL_HALO columns of another strip becomes a ghost there,
+        # except those the mail is about to kill.
+        x = columns["x"]
+        owner = np.searchsorted(self.starts, x, side="right") - 1
+        bitten, delta = self.mail[:2]
+        uids = np.concatenate([columns["uid"], bitten])
+        _, at = np.unique(uids, return_inverse=True)
+        energy = np.bincount(at, np.concatenate([columns["energy"], delta]))[at[:len(x)]]
+        doomed = energy <= 0
+        self.inbound, self.ghosts = [], []
+        for k, (x0, x1) in enumerate(self.bounds):
+            self.inbound.append(_rows(columns, genes, leaving & (owner == k)))
+            near = (x >= x0 - PARALLEL_HALO) & (x < x1 + PARALLEL_HALO) & (owner != k) & ~doomed
+            self.ghosts.append(_rows(columns, genes, near))
+        for k in range(len(self.bounds)):
+            self.population[k] += int(np.count_nonzero(leaving & (owner == k)))
+
+    def _names(self):
+        return {name: list(lab.names) for name, lab in self.labels.items()}
+
+    def tick(self):
+        self.tick_count += 1
+        event = None
+        if self.rng.random() < 0.05:
+            outcome = roll_spiral_die(8, self.global_resonance, self.rng)['outcome']
+            lucky = self.rng.choices(range(len(self.bounds)), self.population)[0] if len(self) else -1
+            event = (outcome, lucky)
+        regional = roll_regions(self.w, self.h, REGION_EVENT_CHANCE, self.global_resonance, self.np_rng)
+        names = self._names()
+        for k, conn in enumerate(self.conns):
+            conn.send(("tick", self.inbound[k] + (names,), self.ghosts[k] + (names,), self.mail,
+                       event, regional))
+        replies = [conn.recv() for conn in self.conns]
+        parts = [(_recode(r["rows"][0], r["labels"], self.labels),) + r["rows"][1:] for r in replies]
+        columns = {name: np.concatenate([p[0][name] for p in parts]) for name in EntityStore.COLUMNS}
+        genes = np.concatenate([p[1] for p in parts])
+        leaving = np.concatenate([p[2] for p in parts])
+        self.population = [r["population"] for r in replies]
+        gifted = self._settle([r["nominees"] for r in replies if r["nominees"] is not None])
+        self.mail = tuple(np.concatenate(part) for part in zip(*(r["mail"] for r in replies))) + (gifted,)
+        self._route(columns, genes, leaving)
+        for r in replies:
+            self.log.extend(r["log"])
+        storms = np.count_nonzero(regional[1] == SPIRAL_OUTCOMES.index("HAZARD"))
+        if storms or len(gifted):
+            self.log.append(f"Local weather: {storms} storm(s), {len(gifted)} gemstone(s) found.")
+
+    def _settle(self, nominees):
+        # Each strip nominated a uniform pick among its own entities in a
+        # gemstone's region; keeping one with odds proportional to how many
+        # entities each strip had there makes it a uniform pick over all.
+        where, uids, counts = (np.concatenate(part) for part in zip(*nominees)) if nominees else ((),) * 3
+        if not len(where):
+            return np.zeros(0, np.int64)
+        order = np.argsort(where, kind="stable")
+        where, uids, counts = where[order], uids[order], counts[order]
+        starts = np.flatnonzero(np.r_[True, where[1:] != where[:-1]])
+        winners = []
+        for lo, hi in zip(starts.tolist(), np.r_[starts[1:], len(where)].tolist()):
+            c = counts[lo:hi]
+            winners.append(uids[lo + int(np.searchsorted(np.cumsum(c), self.np_rng.random() * c.sum(), side="right"))])
+        return np.array(winners, dtype=np.int64)
+
+    def gather(self):
+        # The whole world as one GameEngine (e.g. to summarise, render or
+        # export it). In-flight handoffs are counted where they are headed.
+        names = self._names()
+        for conn in self.conns:
+            conn.send(("gather",))
+        parts = [conn.recv() for conn in self.conns]
+        parts = [(_recode(p["columns"], p["labels"], self.labels), p["genes"]) for p in parts]
+        parts += [(_recode(cols, names, self.labels), genes) for cols, genes in self.inbound]
+        snap = {
+            "strain": self.seed_strain,
+            "resonance": self.global_resonance,
+            "tick": self.tick_count,
+            "w": self.w,
+            "h": self.h,
+            "labels": self._names(),
+            "grids": {name: self.grids[i].copy() for i, name in enumerate(SEED_GRIDS)},
+            "columns": {name: np.concatenate([p[0][name] for p in parts]) for name in EntityStore.COLUMNS},
+            "genes": np.concatenate([p[1] for p in parts]),
+        }
+        game = GameEngine(1, 1, 0, headless=True)
+        game.restore(snap)
+        return game
+
+    def close(self):
+        for conn in self.conns:
+            conn.send(("stop",))
+        for proc in self.procs:
+            proc.join()
+        self.grids = None
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def run_parallel(ticks, w=MAP_W, h=MAP_H, population=20, workers=None, seed=None, strain=None):
+    # run_headless over a ParallelWorld; same summary plus the strip count.
+    game = GameEngine(w, h, population, strain, headless=True, seed=seed)
+    with ParallelWorld(game, workers) as world:
+        start = time.perf_counter()
+        for _ in range(ticks):
+            world.tick()
+        elapsed = time.perf_counter() - start
+        result = world.gather().summary()
+        result["strips"] = len(world.bounds)
+    result["elapsed"] = elapsed
+    result["ticks_per_sec"] = ticks / elapsed if elapsed > 0 else float("inf")
+    return result
@@ -0,0 +1,409 @@
+# DARK CARNIVAL RNG ECOLOGY - persistence
+# Background autosaves, the incremental tick journal,
+# and recorded sessions and their replay.
+
+import base64
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+import json
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from V3_carnival import (BIOME_FIELDS, SEED_GRIDS, ChunkedBiome, EntityStore, GameEngine, read_binary_seed,
+                         snapshot_grids, write_binary_seed)
+
+# ==========================================
+# AUTOSAVE
+# ==========================================
+# Periodic saves that never stall the tick loop: the main thread only copies
+# the world's arrays (a memcpy per grid/column, or per allocated chunk of a
+# ChunkedBiome), and catching chunks up, encoding and writing happen on a
+# single background thread. Files are written to a temp name and renamed
+# into place, and only the newest `keep` saves are kept. The writer's log
+# messages wait in a queue for the next save check on the tick thread.
+class Autosaver:
+    def __init__(self, directory, every=500, keep=3):
+        self.directory = directory
+        self.every = every
+        self.keep = keep
+        self.saved = deque()
+        self.pauses = deque(maxlen=256)
+        self.writes = deque(maxlen=256)
+        self.skipped = 0
+        self.errors = []
+        self.pending = None
+        self.notes = deque()  # log lines from the writer thread, see drain
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="autosave")
+        os.makedirs(directory, exist_ok=True)
+
+    def maybe_save(self, engine):
+        self.drain(engine)
+        if self.every and engine.tick_count % self.every == 0:
+            self.save(engine)
+
+    def save(self, engine):
+        if self.pending is not None and not self.pending.done():
+            # Still writing the previous save; skipping beats blocking.
+            self.skipped += 1
+            return False
+        start = time.perf_counter()
+        snap = engine.snapshot(copy=True)
+        paused = time.perf_counter() - start
+        self.pauses.append(paused)
+        name = f"{snap['strain']}-{snap['tick']:08d}.seedb"
+        self.pending = self.executor.submit(self._write, snap, name, paused)
+        return True
+
+    def drain(self, engine):
+        # The engine log belongs to the tick thread, so the writer queues
+        # its messages and they are logged from here.
+        while self.notes:
+            engine.add_log(self.notes.popleft())
+
+    def _write(self, snap, name, paused):
+        path = os.path.join(self.directory, name)
+        tmp = path + ".tmp"
+        start = time.perf_counter()
+        try:
+            write_binary_seed(snap, tmp, fsync=True)
+            os.replace(tmp, path)
+        except Exception as e:
+            self.errors.append(str(e))
+            self.notes.append(f"Autosave failed: {e}")
+            return
+        wrote = time.perf_counter() - start
+        self.writes.append(wrote)
+        self.saved.append(path)
+        while len(self.saved) > self.keep:
+            old = self.saved.popleft()
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+        self.notes.append(f"Autosaved {name} (paused {paused*1000:.1f} ms, wrote {wrote*1000:.0f} ms)")
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+    def report(self):
+        pauses = [p * 1000 for p in self.pauses]
+        return {
+            "saves": len(pauses),
+            "skipped": self.skipped,
+            "errors": len(self.errors),
+            "kept": list(self.saved),
+            "pause_ms": pauses,
+            "max_pause_ms": max(pauses) if pauses else 0.0,
+            "mean_write_ms": 1000 * sum(self.writes) / len(self.writes) if self.writes else 0.0,
+        }
+
+# ==========================================
+# TICK JOURNAL
+# ==========================================
+# Incremental checkpoints: a full binary seed as the base, then one
+# compressed .npz per checkpoint holding only what changed since the last
+# one -- changed grid cells (or the whole grid when most cells moved),
+# entities born and dead, and per-column changes (position, energy, kanban,
+# ...) keyed by uid. A fresh base is written every `base_every` checkpoints
+# so rewinding never replays a long chain. Snapshots are taken on the tick
+# thread; assembling chunked grids, diffing and writing happen on a
+# background thread, whose log messages are queued as for Autosaver.
+SNAPSHOT_META = ("strain", "resonance", "tick", "w", "h", "labels")
+
+def _diff_snapshots(old, new):
+    delta = {"meta": np.array(json.dumps({k: new[k] for k in SNAPSHOT_META}))}
+    for name in SEED_GRIDS:
+        a, b = old["grids"][name], new["grids"][name]
+        if a.shape != b.shape:
+            delta[f"grid/{name}/full"] = b
+            continue
+        idx = np.flatnonzero(a.reshape(-1) != b.reshape(-1))
+        if 2 * len(idx) > b.size:
+            delta[f"grid/{name}/full"] = b
+        elif len(idx):
+            delta[f"grid/{name}/idx"] = idx
+            delta[f"grid/{name}/val"] = b.reshape(-1)[idx]
+    ocols, ncols = old["columns"], new["columns"]
+    common, oi, ni = np.intersect1d(ocols["uid"], ncols["uid"], assume_unique=True, return_indices=True)
+    born = np.setdiff1d(np.arange(len(ncols["uid"])), ni)
+    delta["order"] = ncols["uid"]
+    delta["dead"] = np.setdiff1d(ocols["uid"], ncols["uid"])
+    for name, col in ncols.items():
+        delta[f"born/{name}"] = col[born]
+        if name == "uid":
+            continue
+        changed = ocols[name][oi] != col[ni]
+        if changed.any():
+            delta[f"chg/{name}/uid"] = common[changed]
+            delta[f"chg/{name}/val"] = col[ni][changed]
+    delta["born/genes"] = new["genes"][born]
+    changed = (old["genes"][oi] != new["genes"][ni]).any(axis=1)
+    if changed.any():
+        delta["chg/genes/uid"] = common[changed]
+        delta["chg/genes/val"] = new["genes"][ni][changed]
+    return delta
+
+def _apply_delta(snap, delta):
+    meta = json.loads(str(delta["meta"]))
+    out = dict(snap, **meta)
+    grids = {}
+    for name, grid in snap["grids"].items():
+        if f"grid/{name}/full" in delta:
+            grid = np.array(delta[f"grid/{name}/full"])
+        elif f"grid/{name}/idx" in delta:
+            grid = np.array(grid)
+            grid.reshape(-1)[delta[f"grid/{name}/idx"]] = delta[f"grid/{name}/val"]
+        grids[name] = grid
+    out["grids"] = grids
+    keep = ~np.isin(snap["columns"]["uid"], delta["dead"])
+    cols = {name: np.concatenate([col[keep], delta[f"born/{name}"]])
+            for name, col in snap["columns"].items()}
+    genes = np.concatenate([snap["genes"][keep], delta["born/genes"]])
+    sorter = np.argsort(cols["uid"], kind="stable")
+    sorted_uid = cols["uid"][sorter]
+    def rows(uids):
+        return sorter[np.searchsorted(sorted_uid, uids)]
+    for name in cols:
+        if f"chg/{name}/uid" in delta:
+            cols[name][rows(delta[f"chg/{name}/uid"])] = delta[f"chg/{name}/val"]
+    if "chg/genes/uid" in delta:
+        genes[rows(delta["chg/genes/uid"])] = delta["chg/genes/val"]
+    order = rows(delta["order"])
+    out["columns"] = {name: col[order] for name, col in cols.items()}
+    out["genes"] = genes[order]
+    return out
+
+class CheckpointJournal:
+    def __init__(self, directory, every=100, base_every=20):
+        self.directory = directory
+        self.every = every
+        self.base_every = base_every
+        self.last = None
+        self.since_base = 0
+        self.entries = []
+        self.bytes_written = 0
+        self.errors = []
+        self.notes = deque()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="journal")
+        os.makedirs(directory, exist_ok=True)
+        index = os.path.join(directory, "journal.json")
+        if os.path.exists(index):
+            with open(index) as f:
+                self.entries = json.load(f)["checkpoints"]
+
+    def maybe_checkpoint(self, engine):
+        self.drain(engine)
+        if self.every and engine.tick_count % self.every == 0:
+            self.checkpoint(engine)
+
+    def checkpoint(self, engine):
+        self.executor.submit(self._write, engine.snapshot(copy=True))
+
+    def drain(self, engine):
+        while self.notes:
+            engine.add_log(self.notes.popleft())
+
+    def _write(self, snap):
+        try:
+            snapshot_grids(snap)
+            if self.last is None or self.since_base >= self.base_every:
+                name = f"base-{snap['tick']:08d}.seedb"
+                write_binary_seed(snap, os.path.join(self.directory, name))
+                kind = "base"
+                self.since_base = 0
+            else:
+                name = f"delta-{snap['tick']:08d}.npz"
+                np.savez_compressed(os.path.join(self.directory, name), **_diff_snapshots(self.last, snap))
+                kind = "delta"
+                self.since_base += 1
+            self.last = snap
+            self.bytes_written += os.path.getsize(os.path.join(self.directory, name))
+            self.entries = [e for e in self.entries if e["tick"] < snap["tick"]]
+            self.entries.append({"tick": snap["tick"], "kind": kind, "file": name})
+            index = os.path.join(self.directory, "journal.json")
+            with open(index + ".tmp", "w") as f:
+                json.dump({"checkpoints": self.entries}, f)
+            os.replace(index + ".tmp", index)
+        except Exception as e:
+            self.errors.append(str(e))
+            self.notes.append(f"Checkpoint failed: {e}")
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+    def report(self):
+        kinds = [e["kind"] for e in self.entries]
+        return {"checkpoints": len(kinds), "bases": kinds.count("base"),
+                "deltas": kinds.count("delta"), "bytes_written": self.bytes_written,
+                "errors": len(self.errors)}
+
+def journal_ticks(directory):
+    with open(os.path.join(directory, "journal.json")) as f:
+        return [e["tick"] for e in json.load(f)["checkpoints"]]
+
+def load_checkpoint(directory, tick=None):
+    # Rebuilds the snapshot at a checkpointed tick (latest when tick is None)
+    # from the nearest base at or before it plus the deltas in between.
+    with open(os.path.join(directory, "journal.json")) as f:
+        entries = json.load(f)["checkpoints"]
+    if tick is None:
+        tick = entries[-1]["tick"]
+    ticks = [e["tick"] for e in entries]
+    if tick not in ticks:
+        raise KeyError(f"tick {tick} was not checkpointed")
+    end = ticks.index(tick)
+    start = max(i for i in range(end + 1) if entries[i]["kind"] == "base")
+    snap = read_binary_seed(os.path.join(directory, entries[start]["file"]), use_mmap=False)
+    snap["grids"] = {name: np.array(g) for name, g in snap["grids"].items()}
+    snap["columns"] = {name: np.array(c) for name, c in snap["columns"].items()}
+    snap["genes"] = np.array(snap["genes"])
+    for entry in entries[start + 1:end + 1]:
+        with np.load(os.path.join(directory, entry["file"])) as delta:
+            snap = _apply_delta(snap, delta)
+    return snap
+
+# ==========================================
+# SESSION RECORDING
+# ==========================================
+# A trace is a JSON-lines file: a header with everything GameEngine was
+# built from (the engine seed pins every random draw after that), then
+# each command with the tick it was given at, and a state hash at least
+# every `every` ticks and at the end. Imported seed files are embedded so
+# the trace stands alone. replay() rebuilds the world headless, runs the
+# commands without rendering and compares the hashes, so a recorded
+# session is also a benchmark workload that checks its own result. Only
+# bit-exact changes keep the hashes; a change that draws differently
+# (e.g. replay(batched=False)) diverges, and the final summary is what
+# to compare then.
+TRACE_VERSION = 1
+TRACE_CHECK_EVERY = 100
+
+def state_hash(engine):
+    # Everything the next tick depends on: the biome, the store columns,
+    # the companion and all three random streams. A ChunkedBiome is hashed
+    # as it stands (its allocated chunks, their ticks, the assigned fields
+    # backing the rest and its generator), so hashing never catches chunks
+    # up or costs a tick's worth of work.
+    store, biome = engine.store, engine.biome
+    alive = store.alive_slots()
+    digest = hashlib.sha256()
+    companion = engine.companion.uid if engine.companion and engine.companion.alive else None
+    digest.update(json.dumps([engine.seed_strain, repr(engine.global_resonance), engine.tick_count,
+                              biome.w, biome.h, {name: list(lab.names) for name, lab in store.labels.items()},
+                              companion]).encode())
+    if isinstance(biome, ChunkedBiome):
+        used = list(biome.slots.values())
+        digest.update(json.dumps([biome.tick_count, list(biome.slots), biome.base_tick, sorted(biome.base)]).encode())
+        blocks = [biome.altitude, biome.chunk_tick[used]] + [biome.pool[name][used] for name in BIOME_FIELDS]
+        blocks += [biome.base[name] for name in sorted(biome.base)]
+    else:
+        blocks = [getattr(biome, name) for name in SEED_GRIDS]
+    columns = store.columns(alive)
+    blocks += [columns[name] for name in EntityStore.COLUMNS] + [store.genes[alive]]
+    for block in blocks:
+        digest.update(np.ascontiguousarray(block).tobytes())
+    digest.update(repr(engine.rng.getstate()).encode())
+    digest.update(repr(engine.np_rng.bit_generator.state).encode())
+    digest.update(repr(biome.rng.bit_generator.state).encode())
+    return digest.hexdigest()
+
+class SessionRecorder:
+    def __init__(self, path, engine, every=TRACE_CHECK_EVERY):
+        if engine.tick_count:
+            raise ValueError("record from a freshly built engine")
+        self.engine = engine
+        self.every = every
+        self.next_check = every
+        self.file = open(path, "w")
+        self._write({"trace": TRACE_VERSION, "seed": engine.seed, "w": engine.biome.w, "h": engine.biome.h,
+                     "population": len(engine.entities), "strain": engine.seed_strain,
+                     "role_chances": engine.role_chances, "chunked": isinstance(engine.biome, ChunkedBiome),
+                     "batched": engine.batched, "birth": [engine.birth_energy, engine.birth_chance],
+                     "hash": state_hash(engine)})
+
+    def _write(self, entry):
+        # one line at a time, so a crashed session still replays up to it
+        self.file.write(json.dumps(entry) + "\n")
+        self.file.flush()
+
+    def command(self, cmd, arg=None):
+        engine = self.engine
+        entry = {"tick": engine.tick_count, "cmd": cmd}
+        if arg is not None:
+            entry["arg"] = arg
+        if cmd == 'i' and arg:
+            try:
+                with open(arg, "rb") as f:
+                    entry["data"] = base64.b64encode(f.read()).decode()
+            except OSError:
+                pass  # the import fails on replay as it did here
+        self._write(entry)
+
+    def after(self):
+        tick = self.engine.tick_count
+        if tick >= self.next_check:
+            self._write({"tick": tick, "hash": state_hash(self.engine)})
+            self.next_check = (tick // self.every + 1) * self.every
+
+    def close(self):
+        if not self.file.closed:
+            self._write({"end": self.engine.tick_count, "hash": state_hash(self.engine)})
+            self.file.close()
+
+def read_trace(path):
+    with open(path) as f:
+        entries = [json.loads(line) for line in f if line.strip()]
+    if not entries or entries[0].get("trace") != TRACE_VERSION:
+        raise ValueError(f"{path}: not a version {TRACE_VERSION} trace")
+    return entries[0], entries[1:]
+
+def replay(path, check=True, batched=None):
+    # Re-runs a trace headless. Exports and profile dumps are skipped;
+    # hashing time is kept out of `elapsed`.
+    header, entries = read_trace(path)
+    build = lambda strain: GameEngine(header["w"], header["h"], header["population"], strain, headless=True,
+                                      seed=header["seed"], role_chances=header["role_chances"],
+                                      chunked=header["chunked"], terrain_cache=False)
+    # A strain drawn from the seed costs one draw that a given one does not.
+    game = build(None)
+    if game.seed_strain != header["strain"]:
+        game = build(header["strain"])
+    game.batched = header["batched"] if batched is None else batched
+    game.birth_energy, game.birth_chance = header["birth"]
+    tmp = tempfile.mkdtemp(prefix="carnival-replay-")
+    mismatches = []
+    commands = skipped = checks = 0
+    hashing = 0.0
+    start = time.perf_counter()
+    try:
+        for entry in [header] + entries:
+            if "cmd" in entry:
+                cmd, arg = entry["cmd"], entry.get("arg")
+                if cmd == 'x' or cmd == 'f' and arg:
+                    skipped += 1
+                    continue
+                if cmd == 'i' and "data" in entry:
+                    arg = os.path.join(tmp, os.path.basename(arg))
+                    with open(arg, "wb") as f:
+                        f.write(base64.b64decode(entry["data"]))
+                game.execute(cmd, arg)
+                commands += 1
+            elif "hash" in entry and check:
+                t0 = time.perf_counter()
+                if state_hash(game) != entry["hash"]:
+                    mismatches.append(entry.get("tick", entry.get("end", 0)))
+                checks += 1
+                hashing += time.perf_counter() - t0
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    elapsed = time.perf_counter() - start - hashing
+    return {"trace": path, "ticks": game.tick_count, "commands": commands, "skipped": skipped,
+            "checks": checks, "elapsed": elapsed,
+            "ticks_per_sec": game.tick_count / elapsed if elapsed > 0 else 0.0,
+            "diverged": mismatches[0] if mismatches else None, "ok": not mismatches,
+            "summary": game.summary()}
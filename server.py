@@ -0,0 +1,416 @@
+# DARK CARNIVAL RNG ECOLOGY - session server
+# Many headless worlds in one process, driven over a local socket, and its load test.
+
+import asyncio
+import multiprocessing
+import os
+import time
+import json
+from collections import deque
+
+import numpy as np
+
+from V3_carnival import AUTO_RUN_FAST, MAP_H, MAP_W, MAX_LOG, AsyncDriver, GameEngine, _parse_size
+
+# ==========================================
+# SESSION SERVER
+# ==========================================
+# Many headless worlds in one process, driven over a local TCP or Unix
+# socket. One request per line, either JSON ({"cmd": "a", "arg": 500,
+# "session": 3, "id": 7}) or plain text ("a 500"); one JSON reply per
+# line, in order, echoing "id". The game commands are the usual keys
+# (space / v / a / c / t / h / x / i, or tick / view / auto / connect /
+# talk / hug / export / import); on top of those:
+#   new [WxH] [POPULATION] [SEED]  create a world and use it
+#   use ID | close [ID] | list     switch, drop or list worlds
+#   tps N                          tick the world in real time (0: on command)
+#   frame                          the 2D frame
+#   stats [ID]                     per-world (or server) metrics
+#   quit                           end the connection
+# Every world queues its commands; one scheduler task walks the worlds
+# with work round-robin and gives each at most SERVER_SLICE seconds per
+# round before yielding to the loop, so a long auto-run, or a world
+# ticking at a high rate, cannot starve the others. Export and import
+# names are kept inside the server's directory.
+SERVER_SLICE = 0.005          # Seconds of work one world gets per scheduling round
+SERVER_MAX_SESSIONS = 1024
+SERVER_LATENCY_WINDOW = 512   # Recent command latencies kept per world
+SERVER_WORDS = {"tick": " ", "view": "v", "auto": "a", "connect": "c", "talk": "t",
+                "hug": "h", "export": "x", "import": "i"}
+
+class Session:
+    def __init__(self, sid, engine, tps=0.0):
+        self.id = sid
+        self.engine = engine
+        self.tps = tps
+        self.next_tick = time.perf_counter()
+        self.queue = deque()  # [cmd, arg, future, queued_at]
+        self.auto = None  # [left, total, future, queued_at, kept log] of a running auto-run
+        self.running = None  # future of the command being executed
+        self.created = time.perf_counter()
+        self.ticks = 0
+        self.commands = 0
+        self.late_ticks = 0
+        self.busy = 0.0
+        self.latency = deque(maxlen=SERVER_LATENCY_WINDOW)
+
+    def ready(self, now):
+        return bool(self.queue) or self.auto is not None or bool(self.tps) and now >= self.next_tick
+
+    def step(self, now):
+        # One unit of work: a slice of the running auto-run, the next
+        # command, or a due real-time tick.
+        start = time.perf_counter()
+        game = self.engine
+        if self.auto is not None:
+            left, total, future, queued, kept = self.auto
+            step = min(left, AsyncDriver.AUTO_FAST_STEP) if total > AUTO_RUN_FAST else 1
+            before = game.tick_count
+            if total > AUTO_RUN_FAST:
+                game.fast_forward(step)
+            else:
+                game.tick()
+            self.ticks += game.tick_count - before
+            self.auto[0] -= step
+            if not self.auto[0]:
+                game.add_log(f"Auto-ran {total} ticks.")
+                self.auto = None
+                self._reply(future, queued, kept)
+        elif self.queue:
+            cmd, arg, future, queued = self.queue.popleft()
+            self.running = future
+            kept, game.log = game.log, deque(maxlen=MAX_LOG)
+            if cmd == 'a':
+                try:
+                    n = int(arg)
+                except (TypeError, ValueError):
+                    game.add_log("Invalid number.")
+                else:
+                    if n > 0:
+                        self.auto = [n, n, future, queued, kept]
+                        self.running = None
+                        self.next_tick = now
+                        self.busy += time.perf_counter() - start
+                        return
+            else:
+                before = game.tick_count
+                game.execute(cmd, arg)
+                self.ticks += game.tick_count - before
+            self._reply(future, queued, kept)
+        else:
+            game.tick()
+            self.ticks += 1
+            self.next_tick += 1.0 / self.tps
+            if now - self.next_tick > 1.0:
+                self.late_ticks += 1
+                self.next_tick = now  # too far behind: drop the backlog
+        self.busy += time.perf_counter() - start
+
+    def abort(self, error):
+        # Answers everything still waiting on this world with `error`.
+        pending = [future for _, _, future, _ in self.queue]
+        pending += [f for f in (self.running, self.auto and self.auto[2]) if f is not None]
+        self.queue.clear()
+        self.auto = self.running = None
+        self.tps = 0.0
+        for future in pending:
+            if not future.done():
+                future.set_result({"ok": False, "session": self.id, "error": error})
+
+    def _reply(self, future, queued, kept):
+        self.running = None
+        game = self.engine
+        lines = list(game.log)
+        kept.extend(lines)
+        game.log = kept
+        self.commands += 1
+        self.latency.append(time.perf_counter() - queued)
+        if not future.done():
+            future.set_result({"ok": True, "session": self.id, "tick": game.tick_count,
+                               "entities": len(game.entities), "log": lines})
+
+    def stats(self):
+        elapsed = time.perf_counter() - self.created
+        lat = np.array(self.latency) * 1000 if self.latency else np.zeros(1)
+        return {"session": self.id, "strain": self.engine.seed_strain, "tick": self.engine.tick_count,
+                "entities": len(self.engine.entities), "tps": self.tps, "ticks": self.ticks,
+                "ticks_per_sec": self.ticks / elapsed if elapsed > 0 else 0.0,
+                "commands": self.commands, "late_ticks": self.late_ticks,
+                "busy": self.busy / elapsed if elapsed > 0 else 0.0,
+                "latency_ms": {"p50": float(np.percentile(lat, 50)), "p95": float(np.percentile(lat, 95)),
+                               "max": float(lat.max())}}
+
+class SessionServer:
+    def __init__(self, w=MAP_W, h=MAP_H, population=20, directory=None, max_sessions=SERVER_MAX_SESSIONS):
+        self.w, self.h, self.population = w, h, population
+        self.directory = directory or os.getcwd()
+        self.max_sessions = max_sessions
+        self.sessions = {}
+        self.next_id = 1
+        self.connections = 0
+        self.rounds = 0
+        self.started = time.perf_counter()
+        self.wake = None
+        self.server = None
+        self.scheduler = None
+
+    def create(self, w=None, h=None, population=None, seed=None, strain=None, tps=0.0):
+        if len(self.sessions) >= self.max_sessions:
+            raise ValueError(f"at most {self.max_sessions} worlds")
+        engine = GameEngine(w or self.w, h or self.h, self.population if population is None else population,
+                            strain, headless=True, seed=seed)
+        session = Session(self.next_id, engine, tps)
+        self.sessions[session.id] = session
+        self.next_id += 1
+        if tps and self.wake is not None:
+            self.wake.set()
+        return session
+
+    def submit(self, session, cmd, arg=None):
+        # Queues a game command; the future resolves to its reply.
+        future = asyncio.get_running_loop().create_future()
+        if cmd in ('x', 'i') and arg:
+            arg = os.path.join(self.directory, os.path.basename(str(arg)))
+        session.queue.append([cmd, arg, future, time.perf_counter()])
+        self.wake.set()
+        return future
+
+    async def start(self, host="127.0.0.1", port=0, path=None):
+        self.wake = asyncio.Event()
+        self.scheduler = asyncio.create_task(self._schedule())
+        if path:
+            self.server = await asyncio.start_unix_server(self._client, path)
+        else:
+            self.server = await asyncio.start_server(self._client, host, port)
+        return self.server
+
+    def address(self):
+        name = self.server.sockets[0].getsockname()
+        return name if isinstance(name, str) else name[:2]
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.scheduler is not None:
+            self.scheduler.cancel()
+            await asyncio.gather(self.scheduler, return_exceptions=True)
+
+    async def _schedule(self):
+        turn = 0
+        while True:
+            now = time.perf_counter()
+            ids = list(self.sessions)
+            ready = [self.sessions[i] for i in ids[turn % len(ids):] + ids[:turn % len(ids)]
+                     if self.sessions[i].ready(now)] if ids else []
+            if not ready:
+                self.wake.clear()
+                waits = [s.next_tick - now for s in self.sessions.values() if s.tps]
+                try:
+                    await asyncio.wait_for(self.wake.wait(), max(0.0, min(waits)) if waits else None)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            turn += 1
+            self.rounds += 1
+            for session in ready:
+                if session.id not in self.sessions:
+                    continue
+                deadline = time.perf_counter() + SERVER_SLICE
+                while True:
+                    try:
+                        session.step(time.perf_counter())
+                    except Exception as e:
+                        # a world that raises is closed; its clients hear why
+                        del self.sessions[session.id]
+                        session.abort(f"world {session.id} failed and was closed: {type(e).__name__}: {e}")
+                        break
+                    now = time.perf_counter()
+                    if now >= deadline or not session.ready(now):
+                        break
+                await asyncio.sleep(0)
+
+    async def _client(self, reader, writer):
+        self.connections += 1
+        current = None
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    req = _server_request(line.decode(errors="replace"))
+                except ValueError as e:
+                    req = {"cmd": None, "error": f"bad request: {e}"}
+                if req["cmd"] in ("quit", "q"):
+                    break
+                try:
+                    if req["cmd"] is None:
+                        raise ValueError(req["error"])
+                    reply, current = await self._handle(req, current)
+                except (ValueError, TypeError) as e:
+                    reply = {"ok": False, "error": str(e)}
+                if "id" in req:
+                    reply["id"] = req["id"]
+                writer.write((json.dumps(reply) + "\n").encode())
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def _handle(self, req, current):
+        cmd, arg = req["cmd"], req.get("arg")
+        sid = req.get("session", current)
+        if cmd == "new":
+            w, h = _parse_size(req["size"]) if req.get("size") else (None, None)
+            session = self.create(w, h, req.get("population"), req.get("seed"), req.get("strain"),
+                                  float(req.get("tps") or 0.0))
+            return {"ok": True, "session": session.id, "strain": session.engine.seed_strain}, session.id
+        if cmd == "list":
+            return {"ok": True, "sessions": [s.stats() for s in self.sessions.values()]}, current
+        if cmd == "stats" and arg is None and sid is None:
+            return {"ok": True, "server": self.stats()}, current
+        if cmd in ("use", "close", "stats") and arg is not None:
+            sid = int(arg)
+        session = self.sessions.get(sid)
+        if session is None:
+            raise ValueError(f"no world {sid}" if sid is not None else "no world: send 'new' first")
+        if cmd == "use":
+            return {"ok": True, "session": sid}, sid
+        if cmd == "close":
+            del self.sessions[sid]
+            session.abort(f"world {sid} was closed")
+            return {"ok": True, "session": sid}, None if sid == current else current
+        if cmd == "stats":
+            return {"ok": True, **session.stats()}, current
+        if cmd == "tps":
+            session.tps = max(0.0, float(arg))
+            session.next_tick = time.perf_counter()
+            self.wake.set()
+            return {"ok": True, "session": sid, "tps": session.tps}, current
+        if cmd == "frame":
+            return {"ok": True, "session": sid, "tick": session.engine.tick_count,
+                    "frame": session.engine.frame_2d()}, current
+        cmd = SERVER_WORDS.get(cmd, cmd)
+        if cmd not in (' ', 'v', 'a', 'c', 't', 'h', 'x', 'i'):
+            raise ValueError(f"unknown command {req['cmd']!r}")
+        future = self.submit(session, cmd, arg)
+        try:
+            return await asyncio.shield(future), current
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise  # this connection is going away
+            return {"ok": False, "session": sid, "error": f"world {sid} dropped the command"}, current
+
+    def stats(self):
+        busy = sum(s.busy for s in self.sessions.values())
+        elapsed = time.perf_counter() - self.started
+        return {"sessions": len(self.sessions), "connections": self.connections, "rounds": self.rounds,
+                "ticks": sum(s.ticks for s in self.sessions.values()),
+                "busy": busy / elapsed if elapsed > 0 else 0.0}
+
+def _server_request(line):
+    # A request line as a dict with at least "cmd".
+    line = line.strip("\r\n")
+    if line.lstrip().startswith("{"):
+        req = json.loads(line)
+        req["cmd"] = str(req.get("cmd", " ")).lower() or " "
+        return req
+    if not line.strip():
+        return {"cmd": " "}  # Enter ticks, as in the game
+    cmd, _, arg = line.strip().partition(" ")
+    cmd, arg = cmd.lower(), arg.strip() or None
+    req = {"cmd": cmd, "arg": arg}
+    if cmd == "new" and arg:
+        words = arg.split()
+        req.pop("arg")
+        if "x" in words[0].lower():
+            req["size"] = words.pop(0)
+        for key, word in zip(("population", "seed"), words):
+            req[key] = int(word)
+    return req
+
+def serve(host="127.0.0.1", port=7777, path=None, w=MAP_W, h=MAP_H, population=20, directory=None, ready=None):
+    # Runs a SessionServer until interrupted; `ready`, if given, is called
+    # with the bound address once it accepts connections.
+    async def main():
+        server = SessionServer(w, h, population, directory)
+        await server.start(host, port, path)
+        if ready is not None:
+            ready(server.address())
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await server.close()
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+
+def _serve_child(conn, w, h, population, directory):
+    serve(port=0, w=w, h=h, population=population, directory=directory, ready=conn.send)
+
+# Load test: `worlds` clients, each on its own connection and world. With
+# tps=None they tick back to back (closed loop), giving the server's raw
+# throughput; with a tps every world ticks in real time and its client
+# sends a talk every `probe` seconds, measuring latency under that load.
+# Without an address the server runs in a child process, so the client
+# side does not share its core.
+async def _load_client(address, world, duration, tps, probe, size, population, seed):
+    if isinstance(address, str):
+        reader, writer = await asyncio.open_unix_connection(address)
+    else:
+        reader, writer = await asyncio.open_connection(*address)
+
+    async def ask(req):
+        writer.write((json.dumps(req) + "\n").encode())
+        await writer.drain()
+        return json.loads(await reader.readline())
+
+    await ask({"cmd": "new", "size": size, "population": population, "seed": seed + world,
+               "tps": tps or 0})
+    latencies = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        await ask({"cmd": "tick" if tps is None else "talk"})
+        latencies.append(time.perf_counter() - start)
+        if tps is not None:
+            await asyncio.sleep(probe)
+    stats = await ask({"cmd": "stats"})
+    await ask({"cmd": "close"})
+    writer.close()
+    return latencies, stats
+
+def load_test(worlds=8, duration=5.0, tps=None, w=MAP_W, h=MAP_H, population=20, address=None,
+              probe=0.1, seed=0):
+    child = None
+    if address is None:
+        parent, conn = multiprocessing.Pipe()
+        child = multiprocessing.Process(target=_serve_child, args=(conn, w, h, population, None), daemon=True)
+        child.start()
+        address = tuple(parent.recv())
+
+    async def main():
+        return await asyncio.gather(*[_load_client(address, i, duration, tps, probe, f"{w}x{h}",
+                                                   population, seed) for i in range(worlds)])
+    try:
+        results = asyncio.run(main())
+    finally:
+        if child is not None:
+            child.terminate()
+            child.join()
+    lat = np.concatenate([np.array(r[0]) for r in results]) * 1000
+    rates = np.array([r[1]["ticks_per_sec"] for r in results])
+    report = {"worlds": worlds, "duration": duration, "tps": tps, "map": [w, h], "population": population,
+              "ticks_per_sec": float(rates.sum()), "world_ticks_per_sec": {"min": float(rates.min()),
+                                                                           "mean": float(rates.mean())},
+              "requests": int(len(lat)),
+              "latency_ms": {"p50": float(np.percentile(lat, 50)), "p95": float(np.percentile(lat, 95)),
+                             "max": float(lat.max())}}
+    if tps:
+        # a world keeps up if it ran at 95% of its rate or better
+        report["keeping_up"] = int(np.count_nonzero(rates >= 0.95 * tps))
+    return report
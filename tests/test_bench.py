@@ -0,0 +1,38 @@
+import json
+
+from bench import benchmark_suite, compare_benchmarks
+from V3_carnival import main
+
+
+def _result(case, best, **params):
+    return {"case": case, "params": params, "best": best}
+
+
+def test_compare_flags_only_what_slowed_past_the_tolerance():
+    baseline = {"results": [_result("engine.tick", 1.0, size="40x20"), _result("render.2d", 1.0, size="40x20")]}
+    current = {"results": [_result("engine.tick", 1.3, size="40x20"), _result("render.2d", 1.1, size="40x20"),
+                           _result("biome.tick", 1.0, size="40x20")]}
+    rows = {row["key"]: row for row in compare_benchmarks(current, baseline, tolerance=0.2)}
+    assert rows["engine.tick[size=40x20]"]["regression"]
+    assert abs(rows["engine.tick[size=40x20]"]["ratio"] - 1.3) < 1e-12
+    assert not rows["render.2d[size=40x20]"]["regression"]
+    assert rows["biome.tick[size=40x20]"]["ratio"] is None
+    assert not rows["biome.tick[size=40x20]"]["regression"]
+
+
+def test_suite_runs_only_the_selected_cases():
+    out = benchmark_suite(sizes=((40, 20),), counts=(20,), repeat=1, only=["biome"])
+    assert sorted(r["case"] for r in out["results"]) == ["biome.init", "biome.tick"]
+    assert all(r["best"] > 0 and r["params"] == {"size": "40x20"} for r in out["results"])
+
+
+def test_cli_exits_non_zero_on_a_regression(tmp_path, capsys):
+    args = ["bench", "--sizes", "40x20", "--entities", "20", "--repeat", "1", "--only", "biome.tick"]
+    assert main(args + ["--out", str(tmp_path / "base.json")]) == 0
+    base = json.loads((tmp_path / "base.json").read_text())
+    assert main(args + ["--baseline", str(tmp_path / "base.json"), "--tolerance", "100"]) == 0
+    for r in base["results"]:
+        r["best"] /= 1000
+    (tmp_path / "fast.json").write_text(json.dumps(base))
+    assert main(args + ["--baseline", str(tmp_path / "fast.json")]) == 1
+    assert "REGRESSION" in capsys.readouterr().out
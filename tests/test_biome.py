@@ -0,0 +1,100 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from V3_carnival import Biome, ChunkedBiome, ScalarBiome
+
+FIELDS = ("nutrients", "water", "fungi", "bacteria")
+
+
+def _start(w, h, seed):
+    # Fields spread across every threshold of the rules: wet and dry cells
+    # (fungi grow over 0.6 water), rich and poor soil (bacteria grow over
+    # 0.6 nutrients), fungi over and under 0.5 and bacteria either side of
+    # 0.1 and 0.5.
+    rng = np.random.default_rng(seed)
+    return {"nutrients": rng.uniform(0.3, 1.0, (w, h)),
+            "water": rng.uniform(0.2, 1.0, (w, h)),
+            "fungi": rng.uniform(0.0, 1.0, (w, h)),
+            "bacteria": rng.uniform(0.0, 1.0, (w, h))}
+
+
+def _close(a, b, n):
+    # Paired per cell: both runs start from the same grids, so only the rain
+    # differs and the per-cell differences give a tight standard error.
+    d = a - b
+    return abs(d.mean()) <= 4 * d.std() / math.sqrt(n) + 1e-9
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_vectorized_biome_matches_scalar_rules(seed):
+    w, h = 40, 20
+    random.seed(seed)
+    scalar = ScalarBiome(w, h)
+    vector = Biome(w, h)
+    for name, grid in _start(w, h, seed).items():
+        setattr(scalar, name, grid.tolist())
+        setattr(vector, name, grid.copy())
+    n = w * h
+    for t in range(1, 201):
+        scalar.tick()
+        vector.tick()
+        if t not in (10, 50, 200):
+            continue
+        for name in FIELDS:
+            a = np.array(getattr(scalar, name))
+            b = getattr(vector, name)
+            # means and variances within 4 standard errors of each other
+            assert _close(a, b, n), (t, name, "mean")
+            assert _close((a - a.mean()) ** 2, (b - b.mean()) ** 2, n), (t, name, "variance")
+
+
+def _restored(seed, w=50, h=30):
+    start = _start(w, h, seed)
+    biome = ChunkedBiome(w, h, random.Random(seed), chunk=8)
+    for name, grid in start.items():
+        setattr(biome, name, grid)
+    return biome, start
+
+
+def test_chunked_restore_allocates_on_first_touch():
+    biome, start = _restored(4)
+    assert not biome.slots
+    for name, grid in start.items():
+        assert np.array_equal(getattr(biome, name), grid)
+        assert np.array_equal(biome.view(name), grid)
+    assert not biome.slots
+    # (49, 29) sits in a partial chunk at the far corner
+    for x, y in [(13, 9), (49, 29)]:
+        assert biome.is_sea(x, y) == (start["water"][x, y] > 0.6)
+    assert len(biome.slots) == 2
+    for name, grid in start.items():
+        assert np.array_equal(getattr(biome, name), grid)
+
+
+def test_chunked_field_assigned_mid_run_reads_back():
+    biome, start = _restored(5)
+    for _ in range(20):
+        biome.tick(([3, 40], [3, 20]))
+    water = np.random.default_rng(5).uniform(0.0, 1.0, (50, 30))
+    biome.water = water
+    assert np.array_equal(biome.water, water)
+    assert biome.is_sea(25, 25) == (water[25, 25] > 0.6)
+
+
+def test_chunked_reads_do_not_advance_the_chunks():
+    biome, _ = _restored(6)
+    for _ in range(30):
+        biome.tick(([3, 40], [3, 20]))
+    n = len(biome.slots)
+    before = ({name: biome.pool[name][:n].copy() for name in FIELDS},
+              biome.chunk_tick[:n].copy(), biome.rng.bit_generator.state)
+    for name in FIELDS:
+        getattr(biome, name)
+        biome.view(name)
+    assert len(biome.slots) == n
+    assert all(np.array_equal(biome.pool[name][:n], before[0][name]) for name in FIELDS)
+    assert np.array_equal(biome.chunk_tick[:n], before[1])
+    assert biome.rng.bit_generator.state == before[2]
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+import V3_carnival as game
+
+
+def _brute(ax, ay, a_on, b_on, radius, bx=None, by=None, pairs=False):
+    if bx is None:
+        bx, by = ax, ay
+    d = np.abs(ax[:, None] - bx[None]) + np.abs(ay[:, None] - by[None])
+    near = (d <= radius) & a_on[:, None] & b_on[None]
+    if pairs:
+        near &= ~np.eye(len(ax), dtype=bool)[:, :, None]
+    return near.any(axis=(0, 1))
+
+
+def _walk(rng, n, m, size):
+    start = rng.integers(0, size, (n, 1))
+    return (start + np.cumsum(rng.integers(-1, 2, (n, m)), axis=1)).clip(0, size - 1)
+
+
+def _first(hit):
+    # what the callers read: the first meeting, or none
+    return int(hit.argmax()) if hit.any() else None
+
+
+@pytest.mark.parametrize("block", [1, 7, 64, 1 << 20])
+@pytest.mark.parametrize("seed", range(6))
+def test_meet_finds_the_first_meeting_in_bounded_blocks(monkeypatch, block, seed):
+    monkeypatch.setattr(game, "MEET_BLOCK", block)
+    rng = np.random.default_rng(seed)
+    n, nb, m, size = rng.integers(1, 12), rng.integers(1, 12), rng.integers(1, 40), 60
+    ax, ay, bx, by = _walk(rng, n, m, size), _walk(rng, n, m, size), _walk(rng, nb, m, size), _walk(rng, nb, m, size)
+    a_on, b_on = rng.random((n, m)) < 0.8, rng.random((nb, m)) < 0.8
+    for radius in (0, 3, 6):
+        want = _brute(ax, ay, a_on, b_on, radius, bx, by)
+        got = game._meet(ax, ay, a_on, b_on, radius, bx, by)
+        assert _first(got) == _first(want)
+        if want.any():
+            assert (got[:want.argmax() + 1] == want[:want.argmax() + 1]).all()
+        want = _brute(ax, ay, a_on, a_on, radius, pairs=True)
+        assert _first(game._meet(ax, ay, a_on, a_on, radius, pairs=True)) == _first(want)
+
+
+def test_meet_with_nobody_on_either_side():
+    empty = np.zeros((0, 5), dtype=np.int64)
+    one = np.zeros((1, 5), dtype=np.int64)
+    on = np.ones((1, 5), dtype=bool)
+    assert not game._meet(empty, empty, empty.astype(bool), on, 3, one, one).any()
+    assert not game._meet(one, one, on, on, 3, pairs=True).any()
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from V3_carnival import INTERACTIONS, GameEngine, interact_batch
+
+KANBAN = ("awareness", "vibe_bias", "consent_level", "mode", "sub_state", "local_fungi", "distant_dms")
+AWARENESS = ("ECLIPSE", "CRESCENT", "QUARTER", "GIBBOUS", "FULL")
+
+
+def _world(seed):
+    # Kanbans spread over every awareness stage, vibe and consent either
+    # side of the thresholds, and histories near the ADMIRING cut-off.
+    game = GameEngine(40, 20, 300, headless=True, seed=1)
+    rng = np.random.default_rng(seed)
+    for e in game.entities:
+        k = e.consent_kanban
+        k.awareness = AWARENESS[rng.integers(len(AWARENESS))]
+        k.vibe_bias = float(rng.uniform(-1.0, 1.0))
+        k.consent_level = float(rng.choice([0.0, 0.65, 0.7, 0.75, 1.0]))
+        k.local_fungi = int(rng.integers(0, 12))
+        k.distant_dms = int(rng.integers(0, 4))
+        k._evolve_mode()
+    return game
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_interact_batch_matches_interact_in_sequence(seed):
+    batched, scalar = _world(seed), _world(seed)
+    rng = np.random.default_rng(100 + seed)
+    n = len(batched.entities)
+    # repeated targets, so several rounds apply to the same kanban
+    slots = np.array([e.slot for e in batched.entities])[rng.integers(0, n, 1500)]
+    kinds = rng.integers(0, len(INTERACTIONS), 1500)
+    local = rng.random(1500) < 0.7
+    interact_batch(batched.store, slots, kinds, local)
+    for s, kind, is_local in zip(slots.tolist(), kinds.tolist(), local.tolist()):
+        scalar.store.view(s).consent_kanban.interact(INTERACTIONS[kind], is_local)
+    for a, b in zip(batched.entities, scalar.entities):
+        for name in KANBAN:
+            assert getattr(a.consent_kanban, name) == pytest.approx(getattr(b.consent_kanban, name)), (a.slot, name)
@@ -0,0 +1,103 @@
+import os
+import threading
+
+import numpy as np
+
+import pytest
+
+from persistence import Autosaver, CheckpointJournal, journal_ticks, load_checkpoint
+from V3_carnival import GameEngine, read_binary_seed, snapshot_grids
+
+FIELDS = ("nutrients", "water", "fungi", "bacteria")
+
+
+def _logged(game):
+    # Every add_log call as (thread, message)
+    calls = []
+    add_log = game.add_log
+    def record(msg):
+        calls.append((threading.get_ident(), msg))
+        add_log(msg)
+    game.add_log = record
+    return calls
+
+
+def test_autosave_keeps_the_newest_and_logs_on_the_tick_thread(tmp_path):
+    game = GameEngine(60, 30, 40, headless=True, seed=2)
+    calls = _logged(game)
+    game.autosaver = saver = Autosaver(str(tmp_path), every=5, keep=2)
+    for _ in range(30):
+        game.tick()
+        if saver.pending is not None:
+            saver.pending.result()
+    saver.close()
+    saver.drain(game)
+    assert sorted(os.listdir(tmp_path)) == [os.path.basename(p) for p in saver.saved]
+    assert len(saver.saved) == 2
+    assert sum(msg.startswith("Autosaved") for _, msg in calls) == saver.report()["saves"] == 6
+    assert {thread for thread, _ in calls} == {threading.get_ident()}
+
+
+def test_chunked_snapshot_leaves_the_catch_up_to_the_writer():
+    game = GameEngine(300, 200, 60, headless=True, seed=4, chunked=True)
+    for _ in range(40):
+        game.tick()
+    biome = game.biome
+    n = len(biome.slots)
+    pools = {name: biome.pool[name][:n].copy() for name in FIELDS}
+    rng = biome.rng.bit_generator.state
+    expect = {name: getattr(biome, name) for name in FIELDS}
+    snap = game.snapshot(copy=True)
+    assert snap["grids"] is None
+    assert len(biome.slots) == n and len(snap["chunks"]["keys"]) == n
+    assert biome.rng.bit_generator.state == rng
+    assert all(np.array_equal(biome.pool[name][:n], pools[name]) for name in FIELDS)
+    # the copy stands apart from the chunks ticking on
+    for _ in range(10):
+        game.tick()
+    grids = snapshot_grids(snap)
+    for name in FIELDS:
+        assert np.array_equal(grids[name], expect[name])
+    assert np.array_equal(grids["altitude"], biome.altitude)
+
+
+def test_chunked_autosave_restores_the_saved_fields(tmp_path):
+    game = GameEngine(300, 200, 60, headless=True, seed=5, chunked=True)
+    for _ in range(25):
+        game.tick()
+    expect = {name: getattr(game.biome, name) for name in FIELDS}
+    saver = Autosaver(str(tmp_path), every=0)
+    saver.save(game)
+    saver.close()
+    copy = GameEngine(population=0, headless=True, seed=1, chunked=True)
+    copy.restore(read_binary_seed(saver.saved[-1]))
+    assert not copy.biome.slots
+    for name in FIELDS:
+        assert np.array_equal(getattr(copy.biome, name), expect[name])
+
+
+def _same(a, b):
+    return (all(a[key] == b[key] for key in ("strain", "resonance", "tick", "w", "h", "labels"))
+            and all(np.array_equal(a["grids"][name], b["grids"][name]) for name in b["grids"])
+            and all(np.array_equal(a["columns"][name], b["columns"][name]) for name in b["columns"])
+            and np.array_equal(a["genes"], b["genes"]))
+
+
+@pytest.mark.parametrize("chunked", [False, True])
+def test_journal_rebuilds_every_checkpoint(tmp_path, chunked):
+    game = GameEngine(300, 200, 80, headless=True, seed=6, chunked=chunked)
+    calls = _logged(game)
+    game.journal = journal = CheckpointJournal(str(tmp_path), every=10, base_every=3)
+    live = {}
+    for _ in range(80):
+        game.tick()
+        if game.tick_count % 10 == 0:
+            live[game.tick_count] = game.snapshot(copy=True)
+            snapshot_grids(live[game.tick_count])
+    journal.close()
+    journal.drain(game)
+    assert journal_ticks(str(tmp_path)) == sorted(live)
+    assert journal.report()["bases"] == 2 and not journal.errors
+    for tick, snap in live.items():
+        assert _same(load_checkpoint(str(tmp_path), tick), snap), tick
+    assert {thread for thread, _ in calls} <= {threading.get_ident()}
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from V3_carnival import GameEngine, convert_seed, read_binary_seed
+
+FIELDS = ("uid", "x", "y", "energy", "bravery", "curiosity")
+
+
+@pytest.fixture
+def world():
+    game = GameEngine(120, 60, 200, headless=True, seed=3)
+    for _ in range(30):
+        game.tick()
+    return game
+
+
+def _reimport(path, seed=9):
+    game = GameEngine(population=0, headless=True, seed=seed)
+    game.import_seed(str(path), mutate=False)
+    return game
+
+
+def _read(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _state(game, full):
+    # What a seed carries: the map, its water and the entities; a binary
+    # seed also carries the soil, tick, resonance and every entity column.
+    alive = game.store.alive_slots()
+    state = {"size": (game.biome.w, game.biome.h), "strain": game.seed_strain,
+             "altitude": np.asarray(game.biome.altitude).tobytes(),
+             "water": np.asarray(game.biome.water).tobytes(),
+             "roles": [e.role for e in game.entities]}
+    state.update({name: getattr(game.store, name)[alive].tobytes() for name in FIELDS})
+    if full:
+        snap = game.snapshot()
+        state["soil"] = [np.asarray(snap["grids"][name]).tobytes() for name in ("nutrients", "fungi", "bacteria")]
+        state["tick"] = (snap["tick"], snap["resonance"])
+        state["columns"] = {name: col.tobytes() for name, col in snap["columns"].items()}
+        state["genes"] = snap["genes"].tobytes()
+    return state
+
+
+def test_binary_to_binary_is_byte_identical(world, tmp_path):
+    world.export_seed(str(tmp_path / "a.seedb"))
+    copy = _reimport(tmp_path / "a.seedb")
+    assert _state(copy, full=True) == _state(world, full=True)
+    copy.export_seed(str(tmp_path / "b.seedb"))
+    assert _read(tmp_path / "b.seedb") == _read(tmp_path / "a.seedb")
+
+
+def test_json_to_binary_keeps_the_json_state(world, tmp_path):
+    world.export_seed(str(tmp_path / "a.seed"))
+    convert_seed(str(tmp_path / "a.seed"), str(tmp_path / "b.seedb"))
+    copy = _reimport(tmp_path / "b.seedb")
+    assert _state(copy, full=False) == _state(world, full=False)
+    copy.export_seed(str(tmp_path / "c.seed"))
+    assert _read(tmp_path / "c.seed") == _read(tmp_path / "a.seed")
+
+
+def test_binary_to_json_keeps_the_json_state(world, tmp_path):
+    world.export_seed(str(tmp_path / "a.seedb"))
+    world.export_seed(str(tmp_path / "a.seed"))
+    convert_seed(str(tmp_path / "a.seedb"), str(tmp_path / "b.seed"))
+    assert _read(tmp_path / "b.seed") == _read(tmp_path / "a.seed")
+    copy = _reimport(tmp_path / "b.seed")
+    assert _state(copy, full=False) == _state(world, full=False)
+    for _ in range(5):
+        copy.tick()
+
+
+def test_reader_rejects_a_truncated_file(world, tmp_path):
+    path = tmp_path / "a.seedb"
+    world.export_seed(str(path))
+    data = _read(path)
+    for cut in (6, 11, 20, len(data) // 2, len(data) - 1):
+        path.write_bytes(data[:cut])
+        with pytest.raises(ValueError):
+            read_binary_seed(str(path))
+    copy = GameEngine(population=5, headless=True, seed=1)
+    copy.import_seed(str(path))
+    assert copy.log[-1].startswith("Import failed")
+    assert len(copy.entities) == 5
+
+
+def test_reader_rejects_a_bad_magic_header(world, tmp_path):
+    path = tmp_path / "a.seedb"
+    world.export_seed(str(path))
+    data = bytearray(_read(path))
+    data[0] ^= 0xFF
+    path.write_bytes(bytes(data))
+    with pytest.raises(ValueError, match="not a binary seed"):
+        read_binary_seed(str(path))
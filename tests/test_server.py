@@ -0,0 +1,116 @@
+import asyncio
+import json
+
+import server as srv
+
+
+async def _connect(server):
+    reader, writer = await asyncio.open_connection(*server.address())
+
+    async def ask(line):
+        writer.write((line + "\n").encode())
+        await writer.drain()
+        return json.loads(await reader.readline())
+
+    return ask, writer
+
+
+def _serve(body):
+    async def main():
+        server = srv.SessionServer(60, 30, 200)
+        await server.start(port=0)
+        try:
+            return await body(server)
+        finally:
+            await server.close()
+    return asyncio.run(main())
+
+
+def test_a_long_auto_run_does_not_starve_another_world():
+    async def body(server):
+        long_ask, long_w = await _connect(server)
+        short_ask, short_w = await _connect(server)
+        assert (await long_ask("new 60x30 200 1"))["session"] == 1
+        assert (await short_ask("new 60x30 20 2"))["session"] == 2
+        done = []
+
+        async def timed(ask, line, name):
+            reply = await ask(line)
+            done.append(name)
+            return reply
+
+        long_run = asyncio.create_task(timed(long_ask, "auto 900", "long"))
+        await asyncio.sleep(0.01)
+        ticks = [await timed(short_ask, "tick", "short") for _ in range(5)]
+        first = await long_run
+        long_w.close()
+        short_w.close()
+        return done, ticks, first, server.sessions[1].stats()
+
+    done, ticks, first, stats = _serve(body)
+    assert done[:5] == ["short"] * 5
+    assert [r["tick"] for r in ticks] == [1, 2, 3, 4, 5]
+    assert first["ok"] and first["tick"] == 900
+    assert stats["ticks"] == 900
+
+
+def test_round_robin_shares_the_rounds_between_busy_worlds(monkeypatch):
+    # two worlds queue auto-runs at once: each round gives both a slice,
+    # so they finish within a few slices of each other
+    monkeypatch.setattr(srv, "SERVER_SLICE", 0.001)
+
+    async def body(server):
+        a = server.create(60, 30, 200, seed=1)
+        b = server.create(60, 30, 200, seed=2)
+        order = []
+        fa = server.submit(a, 'a', "300")
+        fb = server.submit(b, 'a', "300")
+        for f, name in ((fa, "a"), (fb, "b")):
+            f.add_done_callback(lambda _, name=name: order.append((name, a.engine.tick_count, b.engine.tick_count)))
+        await asyncio.gather(fa, fb)
+        return order
+
+    order = _serve(body)
+    name, ta, tb = order[0]
+    # when the first finished, the other was well into its own run
+    assert min(ta, tb) > 200
+
+
+def test_a_failing_world_is_closed_and_its_clients_told(monkeypatch):
+    async def body(server):
+        ask, writer = await _connect(server)
+        await ask("new 60x30 20 1")
+        other = server.create(seed=2)
+
+        def boom():
+            raise RuntimeError("broken biome")
+        server.sessions[1].engine.tick = boom
+        failed = await ask("tick")
+        after = await ask("tick")
+        fine = await server.submit(other, ' ')
+        writer.close()
+        return failed, after, fine, list(server.sessions)
+
+    failed, after, fine, left = _serve(body)
+    assert not failed["ok"] and "failed and was closed" in failed["error"] and "broken biome" in failed["error"]
+    assert not after["ok"] and "no world 1" in after["error"]
+    assert fine["ok"] and fine["tick"] == 1
+    assert left == [2]
+
+
+def test_closing_a_world_answers_its_pending_commands():
+    async def body(server):
+        ask, writer = await _connect(server)
+        await ask("new 60x30 200 1")
+        pending = asyncio.create_task(ask("auto 900"))
+        await asyncio.sleep(0.01)
+        closer, cw = await _connect(server)
+        closed = await closer("close 1")
+        reply = await pending
+        writer.close()
+        cw.close()
+        return closed, reply
+
+    closed, reply = _serve(body)
+    assert closed["ok"]
+    assert not reply["ok"] and "closed" in reply["error"]
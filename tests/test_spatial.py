@@ -0,0 +1,55 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from V3_carnival import GridIndex, SpatialIndex
+
+
+def _brute(xs, ys, ids, qx, qy, radius, k):
+    # the k nearest (Manhattan) within radius of each query, ties by id
+    out_ids = np.full((len(qx), k), -1)
+    out_d = np.full((len(qx), k), -1)
+    for i, (x, y) in enumerate(zip(qx, qy)):
+        d = np.abs(xs - x) + np.abs(ys - y)
+        near = sorted((int(d[j]), int(ids[j])) for j in np.flatnonzero(d <= radius))[:k]
+        for r, (dist, uid) in enumerate(near):
+            out_ids[i, r], out_d[i, r] = uid, dist
+    return out_ids, out_d
+
+
+@pytest.mark.parametrize("points,queries,cell,radius", [
+    (40, 30, 3, 3),     # few pairs
+    (2000, 300, 3, 3),  # crowded: many ties on distance
+    (300, 200, 8, 5),   # sparse, wide cells
+    (2000, 300, 3, 10), # radius past the neighbouring cells
+    (150, 200, 2, 25),  # sparse: rings out to the radius
+])
+def test_grid_nearest_matches_brute_force(points, queries, cell, radius):
+    rng = np.random.default_rng(points)
+    w, h = 60, 40
+    xs, ys = rng.integers(0, w, points), rng.integers(0, h, points)
+    ids = rng.permutation(4 * points)[:points]
+    qx, qy = rng.integers(0, w, queries), rng.integers(0, h, queries)
+    grid = GridIndex(xs, ys, ids, cell, w, h)
+    for k in (1, 4):
+        got_ids, got_d = grid.nearest(qx, qy, radius, k=k)
+        want_ids, want_d = _brute(xs, ys, ids, qx, qy, radius, k)
+        assert np.array_equal(got_d, want_d)
+        assert np.array_equal(got_ids, want_ids)
+
+
+def test_spatial_nearest_breaks_ties_by_slot():
+    rng = np.random.default_rng(7)
+    people = [SimpleNamespace(x=int(x), y=int(y), slot=int(s))
+              for x, y, s in zip(rng.integers(0, 30, 200), rng.integers(0, 20, 200), rng.permutation(200))]
+    index = SpatialIndex(people)
+    xs = np.array([e.x for e in people])
+    ys = np.array([e.y for e in people])
+    slots = np.array([e.slot for e in people])
+    for x, y in zip(rng.integers(0, 30, 100), rng.integers(0, 20, 100)):
+        want, _ = _brute(xs, ys, slots, [x], [y], 60, 1)
+        assert index.nearest(int(x), int(y)).slot == want[0, 0]
+        near, _ = _brute(xs, ys, slots, [x], [y], 2, 1)
+        got = index.nearest(int(x), int(y), max_r=2)
+        assert (got.slot if got is not None else -1) == near[0, 0]
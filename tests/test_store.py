@@ -0,0 +1,78 @@
+import numpy as np
+
+from V3_carnival import UID_SLOT_BITS, GameEngine, EntityStore
+
+
+def _uids(store):
+    return set(store.uid[store.alive_slots()].tolist())
+
+
+def test_births_reuse_released_slots_with_fresh_uids():
+    game = GameEngine(40, 20, 50, headless=True, seed=3)
+    store = game.store
+    rng = np.random.default_rng(0)
+    seen = _uids(store)
+    size = store.size
+    for _ in range(20):
+        alive = store.alive_slots()
+        dead = alive[rng.random(len(alive)) < 0.3]
+        store.alive[dead] = False
+        assert np.array_equal(store.newly_dead(), dead)
+        store.release(dead)
+        born = store.spawn(rng.choice(store.alive_slots(), len(dead)), rng)
+        # every birth fits in a released slot, under a uid never used before
+        assert sorted(born.tolist()) == sorted(dead.tolist())
+        uids = store.uid[born]
+        assert np.array_equal(uids & ((1 << UID_SLOT_BITS) - 1), born)
+        assert np.array_equal(uids >> UID_SLOT_BITS, store.generation[born])
+        assert not seen & set(uids.tolist())
+        seen |= set(uids.tolist())
+        assert len(_uids(store)) == len(store.alive_slots())
+    assert store.size == size
+
+
+def test_a_birth_grows_the_store_once_the_free_list_is_empty():
+    store = GameEngine(40, 20, 10, headless=True, seed=4).store
+    rng = np.random.default_rng(1)
+    store.release(store.alive_slots()[:2])
+    born = store.spawn(store.alive_slots()[:5], rng)
+    assert len(set(born.tolist())) == 5
+    assert store.size == 13
+    assert len(_uids(store)) == 13
+
+
+def test_uids_stay_unique_after_a_restore():
+    game = GameEngine(40, 20, 30, headless=True, seed=5)
+    store = game.store
+    rng = np.random.default_rng(2)
+    for _ in range(5):
+        dead = store.alive_slots()[:5]
+        store.alive[dead] = False
+        store.release(dead)
+        store.spawn(store.alive_slots()[:5], rng)
+    snap = game.snapshot(copy=True)
+    copy = GameEngine(population=0, headless=True, seed=6)
+    copy.restore(snap)
+    restored = copy.store
+    assert _uids(restored) == _uids(store)
+    # every restored uid must stay unique however slots are reused after
+    used = _uids(restored)
+    for _ in range(5):
+        dead = restored.alive_slots()[:8]
+        restored.alive[dead] = False
+        restored.release(dead)
+        born = restored.spawn(restored.alive_slots()[:8], rng)
+        uids = set(restored.uid[born].tolist())
+        assert not used & uids
+        used |= uids
+
+
+def test_from_columns_starts_births_above_every_generation():
+    store = EntityStore(4)
+    rng = np.random.default_rng(3)
+    store.allocate((7 << UID_SLOT_BITS) | 0, 1, 1, "NORMAL", 0.5, 0.5, {"aggression": 0.5, "curiosity": 0.5,
+                                                                         "social": 0.5, "religiosity": 0.5})
+    copy = EntityStore.from_columns(store.columns(store.alive_slots()), store.genes[:1],
+                                    {name: lab.names for name, lab in store.labels.items()})
+    born = copy.spawn([0], rng)
+    assert copy.uid[born[0]] >> UID_SLOT_BITS == 8
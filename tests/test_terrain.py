@@ -0,0 +1,46 @@
+import os
+
+import numpy as np
+import pytest
+
+import V3_carnival as game
+
+
+@pytest.fixture
+def small_maps(monkeypatch, tmp_path):
+    # every map counts as big, and the default directory is a scratch one
+    monkeypatch.setattr(game, "TERRAIN_CACHE_CELLS", 1)
+    monkeypatch.setattr(game, "TERRAIN_CACHE_DIR", str(tmp_path / "default"))
+    monkeypatch.delenv(game.TERRAIN_CACHE_ENV, raising=False)
+    return tmp_path
+
+
+def test_terrain_is_not_cached_unless_asked(small_maps):
+    grid = game.load_terrain(30, 20, "QUIET")
+    game.GameEngine(30, 20, 5, "QUIET", headless=True, seed=1)
+    game.run_headless(2, 30, 20, 5, "QUIET", seed=1)
+    assert list(small_maps.iterdir()) == []
+    np.testing.assert_array_equal(grid, game.generate_altitude(30, 20, "QUIET"))
+
+
+def test_environment_variable_turns_the_cache_on(small_maps, monkeypatch):
+    cache = small_maps / "env"
+    monkeypatch.setenv(game.TERRAIN_CACHE_ENV, str(cache))
+    first = game.GameEngine(30, 20, 5, "LOUD", headless=True, seed=1)
+    assert len(os.listdir(cache)) == 1
+    again = game.GameEngine(30, 20, 5, "LOUD", headless=True, seed=2)
+    assert isinstance(again.biome.altitude, np.memmap)
+    np.testing.assert_array_equal(first.biome.altitude, again.biome.altitude)
+    # a random strain, or an explicit False, still stays off the disk
+    game.GameEngine(30, 20, 5, headless=True, seed=3)
+    game.GameEngine(30, 20, 5, "OFF", headless=True, seed=3, terrain_cache=False)
+    assert len(os.listdir(cache)) == 1
+
+
+def test_cli_flag_and_true_pick_their_directory(small_maps):
+    cache = small_maps / "flag"
+    assert game.main(["headless", "--ticks", "1", "--size", "30x20", "--population", "3",
+                      "--strain", "FLAG", "--terrain-cache", str(cache), "--json"]) == 0
+    assert len(os.listdir(cache)) == 1
+    game.load_terrain(30, 20, "FLAG", True)
+    assert len(os.listdir(small_maps / "default")) == 1